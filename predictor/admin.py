@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import SignalAnalysis, UserProfile
+from .models import SignalAnalysis, UserProfile, AnalysisJob
 
 
 class UserProfileInline(admin.StackedInline):
@@ -57,3 +57,11 @@ class SignalAnalysisAdmin(admin.ModelAdmin):
     def get_components_count(self, obj):
         return len(obj.parameters.get('sinusoidal_components', []))
     get_components_count.short_description = 'Components'
+
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'progress', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('id', 'user__username')
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
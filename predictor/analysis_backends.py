@@ -0,0 +1,292 @@
+import ast
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .fitting import DEFAULT_FIT_METHOD, DEFAULT_FIT_MODE
+from .global_fit import DEFAULT_BUDGET_SECONDS
+from .plotting import DEFAULT_DOWNSAMPLE_METHOD
+from .result_cache import analysis_cache_key, get_cached_result, set_cached_result
+from .signal_utils import SignalPredictor
+
+logger = logging.getLogger(__name__)
+
+# Prefix used for inline base64 PNG plots so they can be told apart from URLs
+PNG_DATA_URI_PREFIX = 'data:image/png;base64,'
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Process pool shared by batch analyses (SIGNAL_BATCH_WORKERS, 0 = one per CPU)"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Pools are not inherited across forks (e.g. server worker processes)
+        if _pool is None or _pool_pid != os.getpid():
+            workers = getattr(settings, 'SIGNAL_BATCH_WORKERS', 0) or None
+            # spawn: the server may be running threads, which fork does not copy safely
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+class AnalysisBackend:
+    """Base class for signal analysis engines used by the upload endpoint"""
+
+    name = None
+
+    @property
+    def cache_name(self):
+        """Identifies the backend and its configuration in result cache keys"""
+        return self.name
+
+    def analyze(self, csv_data, split_point, noise_lvl):
+        """
+        Analyze a signal and return a structured result
+
+        Args:
+            csv_data: pandas DataFrame with 'x' and 'y' columns
+            split_point: point to split train/test data
+            noise_lvl: noise filter level already applied to csv_data
+
+        Returns:
+            dict with 'success', 'fitted_function', 'parameters', 'mse',
+            'dominant_frequencies' and 'plots' (plot key -> image source)
+        """
+        raise NotImplementedError
+
+
+class LocalAnalysisBackend(AnalysisBackend):
+    """Run the analysis in-process with SignalPredictor"""
+
+    name = 'local'
+
+    def __init__(self):
+        self.fit_mode = getattr(settings, 'SIGNAL_FIT_MODE', DEFAULT_FIT_MODE)
+        self.fit_method = getattr(settings, 'SIGNAL_FIT_METHOD', DEFAULT_FIT_METHOD)
+        self.multistart = getattr(settings, 'SIGNAL_FIT_MULTISTART', 0)
+        self.fit_budget = getattr(settings, 'SIGNAL_FIT_BUDGET', DEFAULT_BUDGET_SECONDS)
+        self.differential_evolution = getattr(settings, 'SIGNAL_FIT_DIFFERENTIAL_EVOLUTION', False)
+        # Spawned pool workers don't load the settings, so the plot setting travels with the options
+        self.plot_downsample = getattr(settings, 'PLOT_DOWNSAMPLE_METHOD', DEFAULT_DOWNSAMPLE_METHOD)
+
+    @property
+    def cache_name(self):
+        name = f'{self.name}:{self.fit_mode}:{self.fit_method}'
+        if self.multistart:
+            name += f':multistart={self.multistart}:de={int(self.differential_evolution)}'
+        return name
+
+    def predictor_options(self):
+        """SignalPredictor keyword arguments for the configured fit"""
+        return {
+            'fit_method': self.fit_method,
+            'fit_mode': self.fit_mode,
+            'multistart': self.multistart,
+            'fit_budget': self.fit_budget,
+            'differential_evolution': self.differential_evolution,
+            'plot_downsample': self.plot_downsample,
+        }
+
+    def analyze(self, csv_data, split_point, noise_lvl):
+        return analyze_locally(csv_data, split_point, self.predictor_options())
+
+
+def analyze_locally(csv_data, split_point, predictor_options):
+    """
+    Run SignalPredictor and normalize its result for storage and JSON
+
+    Module-level (and free of settings access) so it can run in a worker process.
+    """
+    predictor = SignalPredictor(**predictor_options)
+    result = predictor.analyze_signal(csv_data, split_point=split_point)
+    if not result.get('success'):
+        return result
+    # Plots come back as raw base64 PNGs; tag them so callers can store them
+    result['plots'] = {
+        key: f'{PNG_DATA_URI_PREFIX}{encoded}'
+        for key, encoded in result.get('plots', {}).items()
+    }
+    result['mse'] = float(result['mse']) if result.get('mse') is not None else None
+    result['dominant_frequencies'] = [
+        [float(freq), float(amp)] for freq, amp in result.get('dominant_frequencies', [])
+    ]
+    return result
+
+
+class HuggingFaceAnalysisBackend(AnalysisBackend):
+    """Delegate the analysis to the hosted Hugging Face Space"""
+
+    name = 'huggingface'
+    space = 'rndascode/Signal-Predictor'
+
+    def analyze(self, csv_data, split_point, noise_lvl):
+        """Call Hugging Face Space and parse markdown response"""
+        # gradio_client is only needed when the remote Space is enabled
+        from gradio_client import Client, handle_file
+
+        # Write CSV to temp file
+        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
+            csv_data.to_csv(tmp.name, index=False)
+        try:
+            # Call HF API
+            client = Client(self.space)
+            api_result = client.predict(
+                csv_file=handle_file(tmp.name),
+                split_point=split_point,
+                noise_level=noise_lvl,
+                api_name="/predict"
+            )
+        finally:
+            os.remove(tmp.name)
+        result_str, fft_img, orig_img, train_img = api_result
+        # Normalize image outputs
+        fs_url = fft_img.get('url') if isinstance(fft_img, dict) else fft_img
+        ovr_url = orig_img.get('url') if isinstance(orig_img, dict) else orig_img
+        tvt_url = train_img.get('url') if isinstance(train_img, dict) else train_img
+        plots = {
+            'frequency_spectrum': fs_url,
+            'original_vs_reconstructed': ovr_url,
+            'training_vs_testing': tvt_url
+        }
+        # Parse markdown fields
+        func_m = re.search(r"\*\*Function:\*\*\s*`([^`]+)`", result_str)
+        function_string = func_m.group(1) if func_m else result_str
+        mse = None
+        m = re.search(r"\*\*MSE:\*\*\s*`([^`]+)`", result_str)
+        if m:
+            mse = float(m.group(1))
+        parameters = {}
+        p = re.search(r"\*\*Parameters:\*\*\s*`(.+)`", result_str)
+        if p:
+            ps = re.sub(r'np\.float64\(([^)]+)\)', r'\1', p.group(1))
+            parameters = ast.literal_eval(ps)
+        dom_freqs = []
+        d = re.search(r"\*\*Dominant Frequencies:\*\*\s*`(.+)`", result_str)
+        if d:
+            ds = re.sub(r'np\.float64\(([^)]+)\)', r'\1', d.group(1))
+            dom_freqs = ast.literal_eval(ds)
+        return {
+            'success': True,
+            'fitted_function': function_string,
+            'mse': mse,
+            'parameters': parameters,
+            'dominant_frequencies': dom_freqs,
+            'plots': plots
+        }
+
+
+ANALYSIS_BACKENDS = {
+    LocalAnalysisBackend.name: LocalAnalysisBackend,
+    HuggingFaceAnalysisBackend.name: HuggingFaceAnalysisBackend,
+}
+
+
+def get_analysis_backend(name=None):
+    """Return an analysis backend instance, defaulting to SIGNAL_ANALYSIS_BACKEND"""
+    name = name or getattr(settings, 'SIGNAL_ANALYSIS_BACKEND', LocalAnalysisBackend.name)
+    try:
+        return ANALYSIS_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown analysis backend: {name}")
+
+
+def run_analysis(csv_data, split_point, noise_lvl):
+    """
+    Analyze a signal with the configured backend
+
+    Successful results are cached by content (see result_cache), and the
+    SIGNAL_ANALYSIS_FALLBACK_BACKEND (if set) is tried when the primary
+    backend fails or raises.
+    """
+    backend = get_analysis_backend()
+    cache_key = analysis_cache_key(csv_data, split_point, noise_lvl, backend.cache_name)
+    cached = get_cached_result(cache_key)
+    if cached is not None:
+        return cached
+
+    result = _analyze_with_fallback(backend, csv_data, split_point, noise_lvl)
+    set_cached_result(cache_key, result)
+    return result
+
+
+def run_analyses(signals):
+    """
+    Analyze several signals with the configured backend
+
+    Cached results are reused as in run_analysis. With the local backend the
+    remaining signals are fitted in parallel in a process pool; other
+    backends analyze them one after another.
+
+    Args:
+        signals: list of (csv_data, split_point, noise_lvl) tuples
+
+    Returns:
+        list of results in the same order as signals
+    """
+    backend = get_analysis_backend()
+    keys = [analysis_cache_key(*signal, backend.cache_name) for signal in signals]
+    results = [get_cached_result(key) for key in keys]
+    missing = [index for index, result in enumerate(results) if result is None]
+
+    if isinstance(backend, LocalAnalysisBackend) and len(missing) > 1:
+        pool = _get_pool()
+        options = backend.predictor_options()
+        futures = {
+            index: pool.submit(analyze_locally, signals[index][0], signals[index][1], options)
+            for index in missing
+        }
+        for index, future in futures.items():
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. out of memory); start a fresh pool next time
+                _reset_pool()
+                result = {'success': False, 'error': f'Analysis worker failed: {e}'}
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            results[index] = _with_fallback(backend, result, *signals[index])
+    else:
+        for index in missing:
+            results[index] = _analyze_with_fallback(backend, *signals[index])
+
+    for index in missing:
+        set_cached_result(keys[index], results[index])
+    return results
+
+
+def _analyze_with_fallback(backend, csv_data, split_point, noise_lvl):
+    try:
+        result = backend.analyze(csv_data, split_point, noise_lvl)
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    return _with_fallback(backend, result, csv_data, split_point, noise_lvl)
+
+
+def _with_fallback(backend, result, csv_data, split_point, noise_lvl):
+    """Return result, or the fallback backend's result if it failed"""
+    fallback_name = getattr(settings, 'SIGNAL_ANALYSIS_FALLBACK_BACKEND', '')
+    if result.get('success') or not fallback_name or fallback_name == backend.name:
+        return result
+
+    logger.warning("Analysis backend %s failed (%s); falling back to %s",
+                   backend.name, result.get('error'), fallback_name)
+    try:
+        return get_analysis_backend(fallback_name).analyze(csv_data, split_point, noise_lvl)
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
@@ -2,11 +2,13 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .api_views import (
     UserRegistrationView, UserLoginView, UserLogoutView, CurrentUserView,
-    HomeView, SignalAnalysisUploadView, FunctionEvaluationView,
+    HomeView, SignalAnalysisUploadView, SignalAnalysisBatchUploadView, FunctionEvaluationView,
     SignalAnalysisListView, SignalAnalysisDetailView, SignalGeneratorView,
-    UserProfileView, save_session_analysis, clear_session, bulk_delete_analyses,
+    UserProfileView, save_session_analysis, clear_session, bulk_delete_analyses, cache_stats,
     csrf_token, ChangePasswordView, PasswordResetRequestView, PasswordResetConfirmView,
-    AnalysisShareOptionsView, AnalysisShareView, AnalysisDetailWithVisualizationsView, VerifyEmailView
+    AnalysisShareOptionsView, AnalysisShareView, AnalysisDetailWithVisualizationsView, VerifyEmailView,
+    AnalysisJobStatusView, GeneratedSignalPlotView, GeneratedSignalExportView, AnalysisExportView,
+    AnalysisAppendSamplesView, WindowedAnalysisView, AnalysisForecastView
 )
 
 urlpatterns = [
@@ -29,21 +31,32 @@ urlpatterns = [
     path('home/', HomeView.as_view(), name='api_home'),
       # Signal analysis endpoints
     path('upload/', SignalAnalysisUploadView.as_view(), name='api_upload'),
+    path('upload/batch/', SignalAnalysisBatchUploadView.as_view(), name='api_upload_batch'),
+    path('windowed/', WindowedAnalysisView.as_view(), name='api_windowed'),
+    path('jobs/<uuid:job_id>/', AnalysisJobStatusView.as_view(), name='api_job_status'),
     path('evaluate/', FunctionEvaluationView.as_view(), name='api_evaluate'),
     path('analyses/', SignalAnalysisListView.as_view(), name='api_analyses_list'),
     path('analyses/<int:pk>/', SignalAnalysisDetailView.as_view(), name='api_analysis_detail'),
     path('analyses/<int:analysis_id>/details/', AnalysisDetailWithVisualizationsView.as_view(), name='api_analysis_details_with_viz'),
+    path('analyses/<int:analysis_id>/export/<str:file_format>/', AnalysisExportView.as_view(), name='api_analysis_export'),
+    path('analyses/<int:analysis_id>/forecast/', AnalysisForecastView.as_view(), name='api_analysis_forecast'),
+    path('analyses/<int:analysis_id>/append/', AnalysisAppendSamplesView.as_view(), name='api_analysis_append'),
     path('analyses/bulk-delete/', bulk_delete_analyses, name='api_bulk_delete'),
     path('save-analysis/', save_session_analysis, name='api_save_analysis'),
     
     # Signal generator
     path('generator/', SignalGeneratorView.as_view(), name='api_generator'),
+    path('generator/<str:signal_id>/plots/<str:plot>.png', GeneratedSignalPlotView.as_view(), name='api_generator_plot'),
+    path('generator/<str:signal_id>/export/<str:file_format>/', GeneratedSignalExportView.as_view(), name='api_generator_export'),
     
     # User profile
     path('profile/', UserProfileView.as_view(), name='api_profile'),
     
     # Session management
     path('clear-session/', clear_session, name='api_clear_session'),
+
+    # Cache statistics (staff only)
+    path('cache-stats/', cache_stats, name='api_cache_stats'),
     
     # Share functionality
     path('analyses/<int:analysis_id>/share-options/', AnalysisShareOptionsView.as_view(), name='api_share_options'),
@@ -3,37 +3,57 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.renderers import JSONRenderer
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
-from django.http import Http404
+from django.urls import reverse
+from django.http import Http404, HttpResponse
 from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_exempt
 from django.utils.decorators import method_decorator
-from django.core.files.base import ContentFile
 from django.conf import settings
+from django.db import transaction
+import numpy as np
 import pandas as pd
 import io
 import json
-import base64
-import uuid
-from gradio_client import Client, handle_file
-import tempfile
-import re
-import ast
-import requests
-import os
-
-from .models import SignalAnalysis, UserProfile
+
+from .models import SignalAnalysis, UserProfile, AnalysisJob
 from .serializers import (
-    SignalAnalysisSerializer, SignalAnalysisCreateSerializer,
+    SignalAnalysisSerializer, SignalAnalysisCreateSerializer, SignalAnalysisBatchSerializer,
+    SignalAnalysisListSerializer, SignalAnalysisSummarySerializer,
     FunctionEvaluationSerializer, SignalGeneratorSerializer,
     UserSerializer, UserProfileSerializer, AnalysisShareSerializer,
     SharePasswordSerializer, UserRegistrationSerializer, UserLoginSerializer,
-    PasswordResetRequestSerializer, PasswordResetSerializer
+    PasswordResetRequestSerializer, PasswordResetSerializer, AnalysisJobSerializer,
+    AppendSamplesSerializer, WindowedAnalysisSerializer, ForecastSerializer
 )
 from .forms import SignalGeneratorForm
-from .signal_utils import SignalPredictor, SignalGenerator as GeneratorClass
+from .pagination import AnalysisCursorPagination
+from .analysis_backends import PNG_DATA_URI_PREFIX, run_analysis
+from .response_cache import (
+    analysis_revision, conditional_response, get_cached_response, get_response_cache_stats,
+    revision_token, set_cached_response
+)
+from .result_cache import get_cache_stats
+from .storage_backends import get_signed_url_stats
+from .signal_store import (
+    GENERATOR_PLOT_KEYS, encode_series, get_generated_plot, load_generated_signal,
+    store_generated_signal
+)
+from .export import EXPORT_FORMATS, columns_export_response, signal_export_response
+from .windowed import MAX_WINDOW_WORK
+from .forecast import forecast_batches, refit_uncertainty
+from .binary_formats import ArrowStreamParser, ArrowStreamRenderer, Float64Parser, Float64Renderer
+from .batch import BatchValidationError, analyze_batch, collect_batch_files
+from .online import append_samples, stored_samples
+from .ingestion import CSVValidationError, read_signal_csv, validate_csv_header
+from .tasks import (
+    enqueue_analysis, prepare_signal_data, predictor_params_from_result,
+    store_analysis_result, store_analysis_results
+)
+from .signal_utils import SignalPredictor, SignalGenerator as GeneratorClass, evaluation_grid
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib.auth.tokens import default_token_generator
@@ -44,23 +64,16 @@ from django.template.loader import render_to_string
 
 # Constants
 ANALYSIS_NOT_FOUND_ERROR = 'Analysis not found'
+NO_STORED_INPUT_ERROR = 'This analysis has no stored input samples'
 MAX_ANALYSES_PER_USER = 50
 
 
-def save_base64_image(base64_string, filename_prefix):
-    """
-    Convert base64 string to Django ContentFile
-    Returns ContentFile object that can be saved to ImageField
-    """
-    try:
-        # Decode base64 string
-        image_data = base64.b64decode(base64_string)
-        # Create unique filename
-        filename = f"{filename_prefix}_{uuid.uuid4().hex[:8]}.png"
-        # Return ContentFile
-        return ContentFile(image_data, name=filename)
-    except Exception:
-        return None
+def analysis_quota_used(user):
+    """Number of analyses counted towards the user's quota (queued jobs included)"""
+    used = SignalAnalysis.objects.filter(user=user).count()
+    if settings.SIGNAL_ANALYSIS_ASYNC:
+        used += AnalysisJob.objects.filter(user=user, status__in=AnalysisJob.ACTIVE_STATUSES).count()
+    return used
 
 
 @api_view(['GET'])
@@ -178,7 +191,7 @@ class HomeView(APIView):
         }
         
         if request.user.is_authenticated:
-            recent_analyses = SignalAnalysis.objects.filter(user=request.user)[:5]
+            recent_analyses = SignalAnalysis.objects.filter(user=request.user).with_user_counts()[:5]
             total = SignalAnalysis.objects.filter(user=request.user).count()
             data['recent_analyses'] = SignalAnalysisSerializer(recent_analyses, many=True).data
             data['total_analyses'] = total
@@ -194,192 +207,101 @@ class SignalAnalysisUploadView(APIView):
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [permissions.AllowAny]
     
-    def _analyze_with_hf(self, csv_data, split_point, noise_lvl):
-        """Call Hugging Face Space and parse markdown response"""
-        # Write CSV to temp file
-        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
-            csv_data.to_csv(tmp.name, index=False)
-        # Call HF API
-        client = Client("rndascode/Signal-Predictor")
-        api_result = client.predict(
-            csv_file=handle_file(tmp.name),
-            split_point=split_point,
-            noise_level=noise_lvl,
-            api_name="/predict"
-        )
-        result_str, fft_img, orig_img, train_img = api_result
-        # Normalize image outputs
-        fs_url = fft_img.get('url') if isinstance(fft_img, dict) else fft_img
-        ovr_url = orig_img.get('url') if isinstance(orig_img, dict) else orig_img
-        tvt_url = train_img.get('url') if isinstance(train_img, dict) else train_img
-        plots = {
-            'frequency_spectrum': fs_url,
-            'original_vs_reconstructed': ovr_url,
-            'training_vs_testing': tvt_url
-        }
-        # Parse markdown fields
-        func_m = re.search(r"\*\*Function:\*\*\s*`([^`]+)`", result_str)
-        function_string = func_m.group(1) if func_m else result_str
-        mse = None
-        m = re.search(r"\*\*MSE:\*\*\s*`([^`]+)`", result_str)
-        if m:
-            mse = float(m.group(1))
-        parameters = {}
-        p = re.search(r"\*\*Parameters:\*\*\s*`(.+)`", result_str)
-        if p:
-            ps = re.sub(r'np\.float64\(([^)]+)\)', r'\1', p.group(1))
-            parameters = ast.literal_eval(ps)
-        dom_freqs = []
-        d = re.search(r"\*\*Dominant Frequencies:\*\*\s*`(.+)`", result_str)
-        if d:
-            ds = re.sub(r'np\.float64\(([^)]+)\)', r'\1', d.group(1))
-            dom_freqs = ast.literal_eval(ds)
-        return {
-            'success': True,
-            'fitted_function': function_string,
-            'mse': mse,
-            'parameters': parameters,
-            'dominant_frequencies': dom_freqs,
-            'plots': plots
-        }
-
     def post(self, request):  # noqa: C901
         serializer = SignalAnalysisCreateSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        # Enforce maximum analyses per user
+        # Enforce maximum analyses per user (queued jobs count towards the quota)
         if request.user.is_authenticated:
-            current_count = SignalAnalysis.objects.filter(user=request.user).count()
-            if current_count >= MAX_ANALYSES_PER_USER:
+            if analysis_quota_used(request.user) >= MAX_ANALYSES_PER_USER:
                 return Response({'error': f'You have reached the maximum number of analyses ({MAX_ANALYSES_PER_USER}). Please delete previous analyses to continue.'}, status=status.HTTP_400_BAD_REQUEST)
+        options = {
+            'advanced_mode': serializer.validated_data.get('advanced_mode', False),
+            'split_point': serializer.validated_data.get('split_point'),
+            'noise_filter': serializer.validated_data.get('noise_filter', 0),
+        }
+        if settings.SIGNAL_ANALYSIS_ASYNC:
+            # Reject malformed or oversized files before queueing them
+            try:
+                validate_csv_header(serializer.validated_data['csv_file'])
+            except CSVValidationError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return self._enqueue(request, serializer.validated_data['csv_file'], options)
         try:
             # Read the uploaded CSV file
             csv_file = serializer.validated_data['csv_file']
-            csv_data = pd.read_csv(io.StringIO(csv_file.read().decode('utf-8')))
-            
-            # Validate CSV structure
-            if 'x' not in csv_data.columns or 'y' not in csv_data.columns:
+            try:
+                csv_data = read_signal_csv(csv_file)
+            except CSVValidationError as e:
                 return Response({
-                    'error': 'CSV file must contain "x" and "y" columns.'
-                }, status=status.HTTP_400_BAD_REQUEST)                
+                    'error': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
             # Apply advanced mode options
-            advanced = serializer.validated_data.get('advanced_mode', False)
-            noise_lvl = serializer.validated_data.get('noise_filter', 0)
-            
-            if noise_lvl > 0:
-                csv_data = csv_data[csv_data['y'].abs() >= noise_lvl]
-            
-            if not advanced:
-                idx = int(0.8 * len(csv_data))
-                split_point = csv_data['x'].iloc[idx if idx < len(csv_data) else -1]
-            else:
-                split_point = serializer.validated_data.get('split_point')
-               # Perform signal analysis
-            result = self._analyze_with_hf(csv_data, split_point, noise_lvl)
+            csv_data, split_point, noise_lvl = prepare_signal_data(csv_data, options)
+            # Perform signal analysis
+            result = run_analysis(csv_data, split_point, noise_lvl)
             if not result.get('success'):
                 return Response({'error': result.get('error', 'Analysis failed')}, status=status.HTTP_400_BAD_REQUEST)
             
             # Build predictor parameters list for evaluation usage
-            params_dict = result.get('parameters', {})
-            predictor_params = []
-            for comp in params_dict.get('sinusoidal_components', []):
-                predictor_params.extend([comp['amplitude'], comp['frequency'], comp['phase']])
-            # Append offset
-            predictor_params.append(params_dict.get('offset', 0))
-
-            if result['success']:
-                analysis = None
-                if request.user.is_authenticated:
-                    analysis = SignalAnalysis.objects.create(
-                        user=request.user,
-                        uploaded_file=serializer.validated_data['csv_file'],
-                        fitted_function=result['fitted_function'],
-                        parameters=result['parameters'],
-                        mse=result['mse'],
-                        dominant_frequencies=result['dominant_frequencies']
-                    )
-                    
-                    # Save data preview (first 10 rows)
-                    analysis.set_data_preview(csv_data)
-                      # Save visualization plots if they exist in the result
-                    plots = result.get('plots', {})
-                    # Save visualization plots using public URLs, local files, or base64
-                    DATA_PREFIX = 'data:image'
-                    for key, field_name in [
-                        ('frequency_spectrum', 'frequency_analysis_plot'),
-                        ('original_vs_reconstructed', 'fitted_signal_plot'),
-                        ('training_vs_testing', 'original_signal_plot')
-                    ]:
-                        img_src = plots.get(key)
-                        if not img_src:
-                            continue
-                        img_file = None
-                        # Base64-encoded image
-                        if isinstance(img_src, str) and img_src.startswith(DATA_PREFIX):
-                            img_file = save_base64_image(img_src, f'{key}_{analysis.id}')
-                        # HTTP(S) URL
-                        elif isinstance(img_src, str) and img_src.startswith(('http://', 'https://')):
-                            try:
-                                resp = requests.get(img_src)
-                                if resp.ok:
-                                    ext = img_src.split('.')[-1].split('?')[0]
-                                    name = f"{key}_{analysis.id}.{ext}"
-                                    img_file = ContentFile(resp.content, name=name)
-                            except Exception:
-                                img_file = None
-                        # Local file path
-                        elif isinstance(img_src, str) and os.path.exists(img_src):
-                            with open(img_src, 'rb') as f:
-                                ext = img_src.split('.')[-1]
-                                name = f"{key}_{analysis.id}.{ext}"
-                                img_file = ContentFile(f.read(), name=name)
-                        # Save if present
-                        if img_file:
-                            getattr(analysis, field_name).save(img_file.name, img_file, save=False)
-                    # Save the analysis with all the new data
-                    analysis.save()
-
-                    # Store predictor_params in session
-                    request.session['predictor_params'] = predictor_params
-                    request.session['analysis_id'] = analysis.id
-
-                    if 'temp_analysis' in request.session:
-                        del request.session['temp_analysis']
-                    
-                    # For saved analysis, return the serialized data with all visualizations and data preview
-                    analysis_data = SignalAnalysisSerializer(analysis).data
-                    
-                    return Response({
-                        'success': True,
-                        'analysis': analysis_data,
-                        'result': result,
-                        'saved': True  # Flag to indicate this was saved
-                    })
-                else:
-                    # For anonymous users, store in session
-                    request.session['predictor_params'] = predictor_params
-                    request.session['analysis_id'] = None
-                    request.session['temp_analysis'] = {
-                        'fitted_function': result['fitted_function'],
-                        'parameters': result['parameters'],
-                        'mse': result['mse'],
-                        'dominant_frequencies': result['dominant_frequencies']
-                    }
-                    
-                    return Response({
-                        'success': True,
-                        'result': result,
-                        'temp_analysis': True
-                    })
+            predictor_params = predictor_params_from_result(result)
+
+            if request.user.is_authenticated:
+                analysis = store_analysis_result(request.user, csv_file, csv_data, result)
+
+                # Store predictor_params in session
+                request.session['predictor_params'] = predictor_params
+                request.session['analysis_id'] = analysis.id
+
+                if 'temp_analysis' in request.session:
+                    del request.session['temp_analysis']
+                
+                # For saved analysis, return the serialized data with all visualizations and data preview
+                analysis_data = SignalAnalysisSerializer(analysis).data
+                
+                return Response({
+                    'success': True,
+                    'analysis': analysis_data,
+                    'result': result,
+                    'saved': True  # Flag to indicate this was saved
+                })
             else:
+                # For anonymous users, store in session
+                request.session['predictor_params'] = predictor_params
+                request.session['analysis_id'] = None
+                request.session['temp_analysis'] = {
+                    'fitted_function': result['fitted_function'],
+                    'parameters': result['parameters'],
+                    'mse': result['mse'],
+                    'dominant_frequencies': result['dominant_frequencies']
+                }
+                
                 return Response({
-                    'error': result.get('error', 'Analysis failed')
-                }, status=status.HTTP_400_BAD_REQUEST)
+                    'success': True,
+                    'result': result,
+                    'temp_analysis': True
+                })
                 
         except Exception as e:
             return Response({
                 'error': f'Error processing file: {str(e)}'
             }, status=status.HTTP_400_BAD_REQUEST)
+
+    def _enqueue(self, request, csv_file, options):
+        """Queue the upload for the background worker and return 202"""
+        if not request.session.session_key:
+            request.session.create()
+        job = enqueue_analysis(
+            csv_file,
+            options,
+            user=request.user if request.user.is_authenticated else None,
+            session_key=request.session.session_key,
+        )
+        return Response({
+            'success': True,
+            'job': AnalysisJobSerializer(job).data,
+            'status_url': reverse('api_job_status', args=[job.id]),
+        }, status=status.HTTP_202_ACCEPTED)
     
     def convert_stored_params_to_predictor_format(self, stored_parameters):
         """
@@ -404,20 +326,152 @@ class SignalAnalysisUploadView(APIView):
             raise ValueError(f"Invalid parameter format: {e}")
 
 
+class SignalAnalysisBatchUploadView(APIView):
+    """Analyze several CSV files (or zip archives of CSVs) in one request and save them"""
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = SignalAnalysisBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            entries = collect_batch_files(serializer.validated_data['files'])
+        except BatchValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Check the quota once for the whole batch
+        remaining = MAX_ANALYSES_PER_USER - analysis_quota_used(request.user)
+        if len(entries) > remaining:
+            return Response({
+                'error': f'This batch has {len(entries)} files but only {max(remaining, 0)} of your '
+                         f'{MAX_ANALYSES_PER_USER} analyses are left. Please delete previous analyses to continue.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        options = {
+            'advanced_mode': serializer.validated_data.get('advanced_mode', False),
+            'split_point': serializer.validated_data.get('split_point'),
+            'noise_filter': serializer.validated_data.get('noise_filter', 0),
+        }
+        outcomes = analyze_batch(entries, options)
+        succeeded = [outcome for outcome in outcomes if 'result' in outcome]
+        analyses = store_analysis_results(request.user, [
+            (outcome['csv_file'], outcome['csv_data'], outcome['result']) for outcome in succeeded
+        ])
+        # One count for the whole batch instead of one per serialized analysis
+        user_analysis_count = SignalAnalysis.objects.filter(user=request.user).count()
+        for outcome, analysis in zip(succeeded, analyses):
+            analysis.annotated_user_analysis_count = user_analysis_count
+            outcome['analysis'] = analysis
+
+        results = []
+        for outcome in outcomes:
+            if 'analysis' in outcome:
+                results.append({
+                    'file': outcome['file'],
+                    'success': True,
+                    'analysis': SignalAnalysisSerializer(outcome['analysis']).data,
+                })
+            else:
+                results.append({'file': outcome['file'], 'success': False, 'error': outcome['error']})
+        return Response({
+            'success': bool(analyses),
+            'saved': len(analyses),
+            'failed': len(outcomes) - len(analyses),
+            'results': results,
+        })
+
+
+class WindowedAnalysisView(APIView):
+    """Spectrogram and per-frame models of a long or non-stationary signal (not saved)"""
+    parser_classes = [MultiPartParser, FormParser]
+    # Frames are fitted inside the request (bounded by SIGNAL_WINDOWED_MAX_WORK)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = WindowedAnalysisSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            csv_data = read_signal_csv(serializer.validated_data['csv_file'])
+        except CSVValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        predictor = SignalPredictor(fit_method=settings.SIGNAL_FIT_METHOD, fit_mode=settings.SIGNAL_FIT_MODE)
+        result = predictor.analyze_windowed(
+            csv_data,
+            frame_points=serializer.validated_data['frame_points'],
+            overlap=serializer.validated_data['overlap'],
+            max_components=serializer.validated_data['max_components'],
+            max_work=getattr(settings, 'SIGNAL_WINDOWED_MAX_WORK', MAX_WINDOW_WORK),
+        )
+        if not result.get('success'):
+            return Response({'error': result.get('error', 'Analysis failed')}, status=status.HTTP_400_BAD_REQUEST)
+        result['plots'] = {key: f'{PNG_DATA_URI_PREFIX}{encoded}' for key, encoded in result['plots'].items()}
+        return Response({'success': True, 'result': result})
+
+
+class AnalysisJobStatusView(APIView):
+    """Poll the state of a queued analysis job"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, job_id):
+        try:
+            job = AnalysisJob.objects.select_related('analysis').get(id=job_id)
+        except AnalysisJob.DoesNotExist:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        if job.user_id:
+            has_access = request.user.is_authenticated and job.user_id == request.user.id
+        else:
+            has_access = bool(job.session_key) and job.session_key == request.session.session_key
+        if not has_access:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        data = {'job': AnalysisJobSerializer(job).data}
+        if job.status == AnalysisJob.STATUS_SUCCEEDED:
+            result = job.result or {}
+            # Mirror the session state the synchronous upload would have set
+            request.session['predictor_params'] = predictor_params_from_result(result)
+            data['success'] = True
+            data['result'] = result
+            if job.analysis:
+                request.session['analysis_id'] = job.analysis.id
+                if 'temp_analysis' in request.session:
+                    del request.session['temp_analysis']
+                data['analysis'] = SignalAnalysisSerializer(job.analysis).data
+                data['saved'] = True
+            else:
+                request.session['analysis_id'] = None
+                request.session['temp_analysis'] = {
+                    'fitted_function': result.get('fitted_function'),
+                    'parameters': result.get('parameters'),
+                    'mse': result.get('mse'),
+                    'dominant_frequencies': result.get('dominant_frequencies')
+                }
+                data['temp_analysis'] = True
+        elif job.status == AnalysisJob.STATUS_FAILED:
+            data['success'] = False
+            data['error'] = job.error or 'Analysis failed'
+        return Response(data)
+
+
 class FunctionEvaluationView(APIView):
     permission_classes = [permissions.AllowAny]
+    parser_classes = [JSONParser, FormParser, MultiPartParser, Float64Parser, ArrowStreamParser]
+    renderer_classes = [JSONRenderer, Float64Renderer, ArrowStreamRenderer]
     
     def post(self, request):  # noqa: C901
-        serializer = FunctionEvaluationSerializer(data=request.data)
+        # Range-only binary requests have no body; their options are in the query string
+        payload = request.data or request.query_params
+        serializer = FunctionEvaluationSerializer(data=payload)
         if serializer.is_valid():
-            x_values = serializer.validated_data['x_values']
             
             # Try to get predictor params from session first
             predictor_params = request.session.get('predictor_params')
             
             # If no session params, try to get from analysis_id
             if not predictor_params:
-                analysis_id = request.data.get('analysis_id')
+                analysis_id = payload.get('analysis_id')
                 if analysis_id:
                     try:
                         # For authenticated users, check ownership
@@ -445,10 +499,16 @@ class FunctionEvaluationView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             try:
+                data = serializer.validated_data
+                if 'x_values' in data:
+                    x_values = data['x_values']
+                else:
+                    x_values = evaluation_grid(data['start'], data['stop'], data.get('step'), data.get('count'))
                 predictor = SignalPredictor()
                 predictor.params = predictor_params
-                y_values = [predictor.evaluate_function(x) for x in x_values]
+                y_values = predictor.evaluate_batch(x_values)
                 
+                # Arrays are serialized by the negotiated renderer (JSON lists or raw float64)
                 return Response({
                     'x_values': x_values,
                     'y_values': y_values
@@ -484,11 +544,26 @@ class FunctionEvaluationView(APIView):
 
 
 class SignalAnalysisListView(generics.ListAPIView):
-    serializer_class = SignalAnalysisSerializer
+    """
+    Cursor-paginated analyses of the current user
+
+    ``view=summary`` returns lightweight rows (no JSON blobs or presigned
+    URLs) and ``fields=a,b`` keeps only the listed fields.
+    """
     permission_classes = [permissions.IsAuthenticated]
-    
+    pagination_class = AnalysisCursorPagination
+
+    def _summary(self):
+        return self.request.query_params.get('view') == 'summary'
+
+    def get_serializer_class(self):
+        return SignalAnalysisSummarySerializer if self._summary() else SignalAnalysisListSerializer
+
     def get_queryset(self):
-        return SignalAnalysis.objects.filter(user=self.request.user)
+        queryset = SignalAnalysis.objects.filter(user=self.request.user)
+        if self._summary():
+            return queryset.only(*SignalAnalysisSummarySerializer.MODEL_FIELDS)
+        return queryset.with_user_counts()
 
 
 class SignalAnalysisDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -496,23 +571,27 @@ class SignalAnalysisDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return SignalAnalysis.objects.filter(user=self.request.user)
+        return SignalAnalysis.objects.filter(user=self.request.user).with_user_counts()
     
     def retrieve(self, request, *args, **kwargs):
         """Override retrieve to include visualization data and data preview"""
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        
-        # Enhance the response with additional visualization data
-        data = serializer.data
-        data.update({
-            'has_visualizations': instance.has_visualizations,
-            'visualization_urls': instance.get_visualization_urls(),
-            'data_preview': instance.get_data_preview(),
-            'display_mode': 'saved'  # Flag to indicate this is saved data only
-        })
-        
-        return Response(data)
+        entry = get_cached_response('detail', kwargs['pk'])
+        if entry is None or entry['owner_id'] != request.user.id:
+            token = revision_token(analysis_revision(kwargs['pk']), request.user.id)
+            instance = self.get_object()
+            serializer = self.get_serializer(instance)
+
+            # Enhance the response with additional visualization data
+            data = serializer.data
+            data.update({
+                'has_visualizations': instance.has_visualizations,
+                'visualization_urls': instance.get_visualization_urls(),
+                'data_preview': instance.get_data_preview(),
+                'display_mode': 'saved'  # Flag to indicate this is saved data only
+            })
+            entry = set_cached_response('detail', instance.pk, instance.user_id, token, data)
+
+        return conditional_response(request, entry)
 
 
 class SignalGeneratorView(APIView):
@@ -552,20 +631,90 @@ class SignalGeneratorView(APIView):
                 use_random=use_random,
                 num_sinusoids=num_sinusoids
             )
-            # Convert DataFrame to list of dicts
+            if not result.get('success'):
+                return Response({'error': result.get('error', 'Signal generation failed')}, status=status.HTTP_400_BAD_REQUEST)
             df = result.get('data')
-            csv_data = df.to_dict('records') if hasattr(df, 'to_dict') else []
-            # Generate visualization plots
-            plots = generator.generate_visualization(df)
-            return Response({
+            requested_plots = request.data.get('plots')
+            if isinstance(requested_plots, str):
+                requested_plots = [key.strip() for key in requested_plots.split(',') if key.strip()]
+            if data.get('response_mode') == 'url':
+                return self._url_response(request, generator, result, requested_plots, data.get('series_format') or 'binary')
+            # Generate visualization plots (optionally only the requested ones)
+            plots = generator.generate_visualization(df, plots=requested_plots)
+            response = {
                 'success': True,
                 'function_string': result.get('function_string'),
                 'parameters': generator.last_generated_params,
                 'plots': plots,
-                'csv_data': csv_data
-            })
+                'plot_timings': generator.plot_timings,
+            }
+            series_format = data.get('series_format') or 'records'
+            if series_format == 'records':
+                # Convert DataFrame to list of dicts
+                response['csv_data'] = df.to_dict('records') if hasattr(df, 'to_dict') else []
+            else:
+                response['series'] = encode_series(df, series_format)
+            return Response(response)
         return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def _url_response(self, request, generator, result, requested_plots, series_format):
+        """Store the signal briefly and return plot URLs plus compact samples"""
+        df = result['data']
+        params = generator.last_generated_params
+        signal_id = store_generated_signal(df, params)
+        plot_keys = [
+            key for key in GENERATOR_PLOT_KEYS
+            if (requested_plots is None or key in requested_plots)
+            and not (key == 'components' and len(params['sinusoids']) <= 1)
+        ]
+        plots = {
+            key: request.build_absolute_uri(reverse('api_generator_plot', args=[signal_id, key]))
+            for key in plot_keys
+        }
+        return Response({
+            'success': True,
+            'signal_id': signal_id,
+            'function_string': result.get('function_string'),
+            'parameters': params,
+            'plots': plots,
+            'downloads': {
+                file_format: request.build_absolute_uri(
+                    reverse('api_generator_export', args=[signal_id, file_format])
+                )
+                for file_format in EXPORT_FORMATS
+            },
+            'series': encode_series(df, 'columnar' if series_format == 'records' else series_format),
+        })
+
+
+class GeneratedSignalPlotView(APIView):
+    """Serve a plot of a recently generated signal (rendered on first request)"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, signal_id, plot):
+        if plot not in GENERATOR_PLOT_KEYS:
+            return Response({'error': 'Unknown plot'}, status=status.HTTP_404_NOT_FOUND)
+        png = get_generated_plot(signal_id, plot)
+        if png is None:
+            return Response({'error': 'Generated signal has expired'}, status=status.HTTP_404_NOT_FOUND)
+        response = HttpResponse(png, content_type='image/png')
+        response['Cache-Control'] = f'private, max-age={settings.GENERATED_SIGNAL_TTL}'
+        return response
+
+
+class GeneratedSignalExportView(APIView):
+    """Download the samples of a recently generated signal as Arrow, Parquet, NPY or CSV"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, signal_id, file_format):
+        if file_format not in EXPORT_FORMATS:
+            return Response({'error': 'Unsupported export format'}, status=status.HTTP_404_NOT_FOUND)
+        stored = load_generated_signal(signal_id)
+        if stored is None:
+            return Response({'error': 'Generated signal has expired'}, status=status.HTTP_404_NOT_FOUND)
+        df, _ = stored
+        return signal_export_response(df, file_format, f'generated_signal_{signal_id}')
+
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
@@ -646,6 +795,17 @@ def bulk_delete_analyses(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def cache_stats(request):
+    """Hit/miss counters for server-side caches (staff only)"""
+    return Response({
+        'analysis_results': get_cache_stats(),
+        'signed_urls': get_signed_url_stats(),
+        'analysis_responses': get_response_cache_stats(),
+    })
+
+
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def get_csrf_token(request):
@@ -752,31 +912,40 @@ class AnalysisShareView(APIView):
     
     def get(self, request, analysis_id):
         """Get a shared analysis (public view)"""
+        entry = get_cached_response('share', analysis_id)
+        if entry is not None:
+            return conditional_response(request, entry)
         try:
+            revision = analysis_revision(analysis_id)
             analysis = SignalAnalysis.objects.get(id=analysis_id)
             
             if not analysis.is_public:
                 return Response({
                     'error': 'Analysis is not public'
                 }, status=status.HTTP_404_NOT_FOUND)
+            token = revision_token(revision, analysis.user_id)
             
             # Check if password is required but not provided
             if analysis.share_password_hash:
-                return Response({
+                data = {
                     'requires_password': True,
                     'analysis_name': analysis.display_name
+                }
+            else:
+                # Return analysis data for public access with visualizations
+                analysis_data = SignalAnalysisSerializer(analysis).data
+                analysis_data.update({
+                    'has_visualizations': analysis.has_visualizations,
+                    'visualization_urls': analysis.get_visualization_urls(),
+                    'data_preview': analysis.get_data_preview(),
+                    'display_mode': 'shared'  # Flag to indicate this is shared data
                 })
-              # Return analysis data for public access with visualizations
-            analysis_data = SignalAnalysisSerializer(analysis).data
-            analysis_data.update({
-                'has_visualizations': analysis.has_visualizations,
-                'visualization_urls': analysis.get_visualization_urls(),
-                'data_preview': analysis.get_data_preview(),
-                'display_mode': 'shared'  # Flag to indicate this is shared data
-            })
-            
-            return Response({
-                'analysis': analysis_data,                'shared': True            })
+                data = {
+                    'analysis': analysis_data,
+                    'shared': True
+                }
+            entry = set_cached_response('share', analysis.pk, analysis.user_id, token, data)
+            return conditional_response(request, entry)
             
         except SignalAnalysis.DoesNotExist:
             return Response({
@@ -836,12 +1005,16 @@ class AnalysisDetailWithVisualizationsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, analysis_id):
+        entry = get_cached_response('details', analysis_id)
+        if entry is not None and entry['owner_id'] == request.user.id:
+            return conditional_response(request, entry)
         try:
+            token = revision_token(analysis_revision(analysis_id), request.user.id)
             analysis = SignalAnalysis.objects.get(id=analysis_id, user=request.user)
             
             # Get the serialized analysis data
             analysis_data = SignalAnalysisSerializer(analysis).data
-              # Add additional context for frontend display
+            # Add additional context for frontend display
             response_data = {
                 'analysis': analysis_data,
                 'has_visualizations': analysis.has_visualizations,
@@ -850,7 +1023,8 @@ class AnalysisDetailWithVisualizationsView(APIView):
                 'display_mode': 'saved'  # Flag to indicate this is saved data only
             }
             
-            return Response(response_data)
+            entry = set_cached_response('details', analysis.pk, analysis.user_id, token, response_data)
+            return conditional_response(request, entry)
             
         except SignalAnalysis.DoesNotExist:
             return Response({
@@ -858,6 +1032,127 @@ class AnalysisDetailWithVisualizationsView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+class AnalysisAppendSamplesView(APIView):
+    """Append samples to a saved analysis; the fit is only redone when its error drifts"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, analysis_id):
+        serializer = AppendSamplesSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            # Lock the row so concurrent appends don't overwrite each other
+            try:
+                analysis = SignalAnalysis.objects.select_for_update().get(id=analysis_id, user=request.user)
+            except SignalAnalysis.DoesNotExist:
+                return Response({'error': ANALYSIS_NOT_FOUND_ERROR}, status=status.HTTP_404_NOT_FOUND)
+            if not analysis.uploaded_file:
+                return Response({'error': NO_STORED_INPUT_ERROR}, status=status.HTTP_409_CONFLICT)
+            try:
+                report = append_samples(
+                    analysis,
+                    serializer.validated_data['x_values'],
+                    serializer.validated_data['y_values'],
+                    force_refit=serializer.validated_data['force_refit'],
+                )
+            except (OSError, CSVValidationError) as e:
+                return Response({'error': f'Could not read analysis input: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'success': True,
+            'update': report,
+            'analysis': SignalAnalysisSerializer(analysis).data,
+        })
+
+
+class AnalysisExportView(APIView):
+    """Download the input samples of a saved analysis as Arrow, Parquet, NPY or CSV"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, analysis_id, file_format):
+        if file_format not in EXPORT_FORMATS:
+            return Response({'error': 'Unsupported export format'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            analysis = SignalAnalysis.objects.get(id=analysis_id)
+        except SignalAnalysis.DoesNotExist:
+            return Response({'error': ANALYSIS_NOT_FOUND_ERROR}, status=status.HTTP_404_NOT_FOUND)
+        is_owner = request.user.is_authenticated and analysis.user_id == request.user.id
+        if not is_owner and (not analysis.is_public or analysis.share_password_hash):
+            return Response({'error': ANALYSIS_NOT_FOUND_ERROR}, status=status.HTTP_404_NOT_FOUND)
+        if not analysis.uploaded_file:
+            # Analyses saved from a session keep no input file
+            return Response({'error': NO_STORED_INPUT_ERROR}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            with analysis.uploaded_file.open('rb') as csv_file:
+                # Stored inputs were checked at upload time; don't re-apply the limits
+                csv_data = read_signal_csv(csv_file, max_bytes=0, max_rows=0)
+        except (OSError, CSVValidationError) as e:
+            return Response({'error': f'Could not read analysis input: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return signal_export_response(csv_data, file_format, f'analysis_{analysis.id}_input')
+
+
+class AnalysisForecastView(APIView):
+    """Forecast past the end of an analysis' data, with confidence or prediction bands"""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, analysis_id):
+        serializer = ForecastSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            analysis = SignalAnalysis.objects.get(id=analysis_id)
+        except SignalAnalysis.DoesNotExist:
+            return Response({'error': ANALYSIS_NOT_FOUND_ERROR}, status=status.HTTP_404_NOT_FOUND)
+        is_owner = request.user.is_authenticated and analysis.user_id == request.user.id
+        if not is_owner and (not analysis.is_public or analysis.share_password_hash):
+            return Response({'error': ANALYSIS_NOT_FOUND_ERROR}, status=status.HTTP_404_NOT_FOUND)
+
+        if not analysis.parameter_covariance:
+            # Analyses saved before covariances were stored: refit once from the stored data.
+            # Only the owner's requests may write to the row.
+            if not is_owner:
+                return Response({
+                    'error': 'Forecasts for this analysis are not available yet; its owner has to open one first.'
+                }, status=status.HTTP_409_CONFLICT)
+            if not analysis.uploaded_file:
+                # Analyses saved from a session keep no samples to refit
+                return Response({'error': NO_STORED_INPUT_ERROR}, status=status.HTTP_409_CONFLICT)
+            try:
+                x, y = stored_samples(analysis)
+            except (OSError, CSVValidationError) as e:
+                return Response({'error': f'Could not read analysis input: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            params = predictor_params_from_result({'parameters': analysis.parameters})
+            analysis.parameter_covariance = refit_uncertainty(
+                x, y, params, method=settings.SIGNAL_FIT_METHOD, mode=settings.SIGNAL_FIT_MODE
+            )
+            analysis.save(update_fields=['parameter_covariance'])
+
+        options = serializer.validated_data
+        uncertainty = analysis.parameter_covariance
+        start = uncertainty['x_last'] + options['step']
+        batches = forecast_batches(
+            uncertainty, start, options['step'], options['count'],
+            level=options['level'], interval=options['interval'],
+        )
+        if options['output'] != 'json':
+            return columns_export_response(
+                ('x', 'y', 'lower', 'upper'), batches, options['count'],
+                options['output'], f'analysis_{analysis.id}_forecast'
+            )
+        columns = [np.concatenate(column) for column in zip(*batches)]
+        return Response({
+            'success': True,
+            'start': start,
+            'step': options['step'],
+            'count': options['count'],
+            'level': options['level'],
+            'interval': options['interval'],
+            **dict(zip(('x', 'y', 'lower', 'upper'), (column.tolist() for column in columns))),
+        })
+
+
 # Password reset views
 class PasswordResetRequestView(APIView):
     permission_classes = [permissions.AllowAny]
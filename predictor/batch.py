@@ -0,0 +1,126 @@
+"""
+Batch analysis of many uploaded signals in one request
+
+A batch is a multi-file upload of CSVs, zip archives of CSVs, or both.
+Every CSV is read and validated on its own, so one bad file only fails
+its own entry. The valid signals are fitted together by run_analyses,
+which spreads them over a process pool, and the caller saves the
+successful ones with a single bulk insert.
+"""
+import os
+import zipfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.template.defaultfilters import filesizeformat
+
+from .analysis_backends import run_analyses
+from .ingestion import CSVValidationError, DEFAULT_MAX_BYTES, read_signal_csv
+from .tasks import prepare_signal_data
+
+DEFAULT_BATCH_MAX_FILES = 20
+
+
+class BatchValidationError(ValueError):
+    """Raised when a batch upload as a whole is unusable"""
+
+
+def _is_zip(uploaded_file):
+    if not uploaded_file.name.lower().endswith('.zip'):
+        return False
+    is_zip = zipfile.is_zipfile(uploaded_file)
+    uploaded_file.seek(0)
+    return is_zip
+
+
+def _zip_members(uploaded_file, max_bytes):
+    """Yield (name, file or error message) for every CSV in a zip archive"""
+    try:
+        archive = zipfile.ZipFile(uploaded_file)
+    except zipfile.BadZipFile:
+        yield uploaded_file.name, 'Not a valid zip archive.'
+        return
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            # Skip folders and resource forks added by macOS
+            if info.is_dir() or name.startswith('__MACOSX/') or not name.lower().endswith('.csv'):
+                continue
+            # The declared size bounds how much is read, so this also stops zip bombs
+            if max_bytes and info.file_size > max_bytes:
+                yield name, f'CSV file exceeds the maximum upload size of {filesizeformat(max_bytes)}.'
+                continue
+            with archive.open(info) as member:
+                yield name, ContentFile(member.read(), name=os.path.basename(name))
+
+
+def collect_batch_files(uploaded_files, max_files=None):
+    """
+    Expand a batch upload into one entry per CSV
+
+    Args:
+        uploaded_files: uploaded CSV and/or zip files
+        max_files: maximum number of CSVs, defaults to SIGNAL_BATCH_MAX_FILES
+
+    Returns:
+        list of (name, file or error message) tuples
+
+    Raises:
+        BatchValidationError: no CSVs found, or too many of them
+    """
+    if max_files is None:
+        max_files = getattr(settings, 'SIGNAL_BATCH_MAX_FILES', DEFAULT_BATCH_MAX_FILES)
+    max_bytes = getattr(settings, 'SIGNAL_UPLOAD_MAX_BYTES', DEFAULT_MAX_BYTES)
+    entries = []
+    for uploaded_file in uploaded_files:
+        if _is_zip(uploaded_file):
+            entries.extend(_zip_members(uploaded_file, max_bytes))
+        else:
+            entries.append((uploaded_file.name, uploaded_file))
+        if len(entries) > max_files:
+            raise BatchValidationError(f'A batch can contain at most {max_files} CSV files.')
+    if not entries:
+        raise BatchValidationError('The upload does not contain any CSV files.')
+    return entries
+
+
+def analyze_batch(entries, options):
+    """
+    Read and analyze every CSV of a batch
+
+    Args:
+        entries: output of collect_batch_files
+        options: upload options shared by all files (advanced_mode, split_point, noise_filter)
+
+    Returns:
+        list of dicts with 'file' and either 'error', or 'csv_file',
+        'csv_data' and 'result', in the order of entries
+    """
+    outcomes = []
+    signals = []
+    for name, csv_file in entries:
+        outcome = {'file': name}
+        outcomes.append(outcome)
+        if isinstance(csv_file, str):
+            outcome['error'] = csv_file
+            continue
+        try:
+            csv_data = read_signal_csv(csv_file)
+            csv_data, split_point, noise_lvl = prepare_signal_data(csv_data, options)
+        except CSVValidationError as e:
+            outcome['error'] = str(e)
+            continue
+        except Exception as e:
+            outcome['error'] = f'Error processing file: {str(e)}'
+            continue
+        outcome.update(csv_file=csv_file, csv_data=csv_data)
+        signals.append((outcome, (csv_data, split_point, noise_lvl)))
+
+    results = run_analyses([signal for _, signal in signals])
+    for (outcome, _), result in zip(signals, results):
+        if result.get('success'):
+            outcome['result'] = result
+        else:
+            outcome['error'] = result.get('error', 'Analysis failed')
+            del outcome['csv_file'], outcome['csv_data']
+    return outcomes
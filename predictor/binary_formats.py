@@ -0,0 +1,125 @@
+"""
+Binary request/response formats for bulk function evaluation
+
+The evaluate endpoint normally speaks JSON, which means validating and
+printing every float individually. These DRF parsers and renderers move
+the sample arrays as raw little-endian float64 buffers instead:
+
+- application/octet-stream: the request body is the x values; the
+  response body is the y values (same order and length). Options such as
+  analysis_id or a start/stop/count range travel in the query string.
+- application/vnd.apache.arrow.stream: an Arrow IPC stream with an 'x'
+  column in, and 'x' and 'y' columns out. Needs pyarrow.
+
+Error responses are still rendered as JSON.
+"""
+import numpy as np
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .serializers import FunctionEvaluationSerializer
+
+FLOAT64_MEDIA_TYPE = 'application/octet-stream'
+ARROW_STREAM_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+# Largest body accepted (points plus room for Arrow metadata), so a bad
+# request can't exhaust memory before validation
+MAX_BODY_BYTES = FunctionEvaluationSerializer.MAX_POINTS * 8 + 64 * 1024
+
+
+def _read_body(stream):
+    if stream is None:
+        return b''
+    body = stream.read(MAX_BODY_BYTES + 1)
+    if len(body) > MAX_BODY_BYTES:
+        raise ParseError(f"At most {FunctionEvaluationSerializer.MAX_POINTS} points can be sent per request")
+    return body
+
+
+def _with_query_params(parser_context, x_values):
+    request = (parser_context or {}).get('request')
+    data = request.query_params.dict() if request is not None else {}
+    if x_values is not None and len(x_values):
+        data['x_values'] = x_values
+    return data
+
+
+class Float64Parser(BaseParser):
+    """Parse a body of little-endian float64 values into x_values"""
+    media_type = FLOAT64_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = _read_body(stream)
+        if len(body) % 8:
+            raise ParseError("Body length must be a multiple of 8 bytes (little-endian float64)")
+        return _with_query_params(parser_context, np.frombuffer(body, dtype='<f8'))
+
+
+class ArrowStreamParser(BaseParser):
+    """Parse an Arrow IPC stream; uses the 'x' column, or the first column"""
+    media_type = ARROW_STREAM_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        import pyarrow as pa
+
+        body = _read_body(stream)
+        if not body:
+            return _with_query_params(parser_context, None)
+        try:
+            table = pa.ipc.open_stream(body).read_all()
+        except pa.ArrowException as e:
+            raise ParseError(f"Invalid Arrow stream: {e}")
+        if table.num_columns == 0:
+            raise ParseError("Arrow stream has no columns")
+        column = table.column('x') if 'x' in table.column_names else table.column(0)
+        try:
+            x_values = column.cast(pa.float64()).to_numpy()
+        except pa.ArrowException as e:
+            raise ParseError(f"Column 'x' must be numeric: {e}")
+        return _with_query_params(parser_context, x_values)
+
+
+class _EvaluationRenderer(BaseRenderer):
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict) or 'y_values' not in data:
+            # Errors and other payloads fall back to JSON
+            response = (renderer_context or {}).get('response')
+            if response is not None:
+                response['Content-Type'] = 'application/json'
+            return JSONRenderer().render(data, renderer_context=renderer_context)
+        x = np.ascontiguousarray(data['x_values'], dtype='<f8')
+        y = np.ascontiguousarray(data['y_values'], dtype='<f8')
+        return self.render_arrays(x, y, renderer_context or {})
+
+    def render_arrays(self, x, y, renderer_context):
+        raise NotImplementedError
+
+
+class Float64Renderer(_EvaluationRenderer):
+    """Render y_values as raw little-endian float64 bytes"""
+    media_type = FLOAT64_MEDIA_TYPE
+    format = 'f64'
+
+    def render_arrays(self, x, y, renderer_context):
+        response = renderer_context.get('response')
+        if response is not None:
+            response['X-Point-Count'] = str(len(y))
+        return y.tobytes()
+
+
+class ArrowStreamRenderer(_EvaluationRenderer):
+    """Render x_values and y_values as an Arrow IPC stream"""
+    media_type = ARROW_STREAM_MEDIA_TYPE
+    format = 'arrow'
+
+    def render_arrays(self, x, y, renderer_context):
+        import pyarrow as pa
+
+        batch = pa.record_batch([x, y], names=['x', 'y'])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
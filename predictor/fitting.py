@@ -0,0 +1,440 @@
+"""
+Fitting core for the multi-sinusoidal signal model
+
+    f(x) = sum_i A_i * sin(2 * pi * f_i * x + phi_i) + D
+
+Parameters are kept in the flat layout used by SignalPredictor:
+[A_1, f_1, phi_1, ..., A_k, f_k, phi_k, D].
+
+The number of components is chosen greedily: each stage seeds one more
+component from the strongest peak in the residual spectrum (windowed,
+zero-padded and interpolated between bins, so the seed frequency is
+already close to the optimum), refits all
+components starting from the previous solution, and scores the fit with an
+information criterion on the training samples. The search stops as soon as
+the criterion stops improving, so the fits stay small.
+
+Fits use the closed-form Jacobian of the model instead of finite
+differences. The default 'lm' solver is unbounded and the fastest at the
+usual few components; the opt-in 'trf' solver keeps amplitudes
+non-negative and frequencies between zero and the Nyquist frequency, at
+roughly twice the cost per evaluation (`manage.py benchmark_fitting`).
+The 'varpro' fit mode optimizes only the frequencies and solves
+amplitudes, phases and offset linearly at each step.
+"""
+import time
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+from scipy.optimize import curve_fit, least_squares
+from scipy.signal import get_window
+
+from .lomb_scargle import lomb_scargle, median_spacing, sinusoid_lstsq
+
+ORDER_CRITERIA = ('aic', 'bic')
+DEFAULT_ORDER_CRITERION = 'bic'
+DEFAULT_MAX_COMPONENTS = 10
+FIT_METHODS = ('trf', 'lm')
+DEFAULT_FIT_METHOD = 'lm'
+FIT_MODES = ('curve_fit', 'varpro')
+DEFAULT_FIT_MODE = 'curve_fit'
+DEFAULT_SPECTRUM_PADDING = 4
+DEFAULT_SPECTRUM_WINDOW = 'hann'
+PEAK_INTERPOLATIONS = ('quadratic', 'parabolic', 'none')
+DEFAULT_PEAK_INTERPOLATION = 'quadratic'
+
+
+def multi_sinusoid(x, *params):
+    """Evaluate the model for flat parameters [A, f, phi]*k + [D]"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.full_like(x, params[-1])
+    for i in range(0, len(params) - 1, 3):
+        y += params[i] * np.sin(2 * np.pi * params[i + 1] * x + params[i + 2])
+    return y
+
+
+def information_criterion(rss, n_samples, n_params, criterion=DEFAULT_ORDER_CRITERION):
+    """
+    Score a least-squares fit; lower is better
+
+    Args:
+        rss: residual sum of squares
+        n_samples: number of fitted samples
+        n_params: number of free parameters
+        criterion: 'aic' or 'bic'
+    """
+    fit_term = n_samples * np.log(max(rss, np.finfo(np.float64).tiny) / n_samples)
+    if criterion == 'aic':
+        return fit_term + 2 * n_params
+    if criterion == 'bic':
+        return fit_term + n_params * np.log(n_samples)
+    raise ValueError(f"Unknown order criterion: {criterion}")
+
+
+def _window_weights(window, n):
+    if window in (None, 'boxcar'):
+        return np.ones(n)
+    return get_window(window, n, fftbins=False)
+
+
+def windowed_spectrum(y, spacing, padding=DEFAULT_SPECTRUM_PADDING, window=DEFAULT_SPECTRUM_WINDOW):
+    """
+    One-sided amplitude spectrum of the mean-removed, windowed, zero-padded signal
+
+    Args:
+        y: uniformly spaced samples
+        spacing: sample spacing
+        padding: zero-padding factor (the FFT length is the next power of two
+            of at least padding * len(y)); 1 disables padding
+        window: scipy.signal window name, or 'boxcar' for none
+
+    Returns:
+        (frequencies, amplitudes) with amplitudes corrected for the window gain
+    """
+    n = len(y)
+    weights = _window_weights(window, n)
+    n_fft = n if padding <= 1 else int(2 ** np.ceil(np.log2(padding * n)))
+    amplitudes = 2.0 / np.sum(weights) * np.abs(rfft(weights * (y - np.mean(y)), n=n_fft))
+    amplitudes[0] = 0
+    return rfftfreq(n_fft, spacing), amplitudes
+
+
+def interpolate_peak(frequencies, amplitudes, peak, interpolation=DEFAULT_PEAK_INTERPOLATION):
+    """
+    Refine a spectrum peak to a fractional bin
+
+    'parabolic' fits a parabola through the peak and its neighbours;
+    'quadratic' does the same on log amplitudes, which is close to exact for
+    Gaussian-like window main lobes (e.g. Hann); 'none' keeps the bin.
+    """
+    if interpolation == 'none' or peak <= 0 or peak >= len(amplitudes) - 1:
+        return frequencies[peak]
+    left, center, right = amplitudes[peak - 1:peak + 2]
+    if interpolation == 'quadratic':
+        tiny = np.finfo(np.float64).tiny
+        left, center, right = np.log(max(left, tiny)), np.log(max(center, tiny)), np.log(max(right, tiny))
+    elif interpolation != 'parabolic':
+        raise ValueError(f"Unknown peak interpolation: {interpolation}")
+    curvature = left - 2 * center + right
+    offset = 0.5 * (left - right) / curvature if curvature < 0 else 0.0
+    return frequencies[peak] + offset * (frequencies[1] - frequencies[0])
+
+
+def sinusoid_at(x, y, frequency, window=DEFAULT_SPECTRUM_WINDOW):
+    """Amplitude and (sine) phase of y at one frequency, from a windowed single-bin DFT"""
+    weights = _window_weights(window, len(y))
+    coefficient = np.sum(weights * (y - np.mean(y)) * np.exp(-2j * np.pi * frequency * (x - x[0])))
+    amplitude = 2.0 / np.sum(weights) * np.abs(coefficient)
+    # The DFT angle is relative to a cosine at the first sample; the model uses sine
+    phase = np.angle(coefficient) + np.pi / 2 - 2 * np.pi * frequency * x[0]
+    return amplitude, phase
+
+
+def spectrum_peak(x, y, spacing, padding=DEFAULT_SPECTRUM_PADDING, window=DEFAULT_SPECTRUM_WINDOW,
+                  interpolation=DEFAULT_PEAK_INTERPOLATION):
+    """
+    Estimate the strongest sinusoid in y
+
+    The peak of the windowed, zero-padded spectrum is interpolated to a
+    fractional bin, then amplitude and phase are measured at that exact
+    frequency.
+
+    When spacing is None the samples are treated as irregular: the peak
+    comes from a fast Lomb-Scargle periodogram (oversampled by `padding`)
+    and amplitude and phase from a least-squares fit at that frequency.
+
+    Returns:
+        (amplitude, frequency, phase) with the phase referred to x = 0 for
+        the sine-based model
+    """
+    if spacing is None:
+        frequencies, amplitudes = lomb_scargle(x, y, oversampling=padding)
+    else:
+        frequencies, amplitudes = windowed_spectrum(y, spacing, padding, window)
+    peak = int(np.argmax(amplitudes))
+    if amplitudes[peak] == 0:
+        return 0.0, 0.0, 0.0
+    frequency = interpolate_peak(frequencies, amplitudes, peak, interpolation)
+    if spacing is None:
+        amplitude, phase = sinusoid_lstsq(x, y, frequency)
+    else:
+        amplitude, phase = sinusoid_at(x, y, frequency, window)
+    return amplitude, frequency, phase
+
+
+def multi_sinusoid_jacobian(x, *params):
+    """Closed-form Jacobian of multi_sinusoid with respect to the flat parameters"""
+    x = np.asarray(x, dtype=np.float64)
+    jac = np.empty((len(x), len(params)), dtype=np.float64)
+    two_pi_x = 2 * np.pi * x
+    for i in range(0, len(params) - 1, 3):
+        theta = two_pi_x * params[i + 1] + params[i + 2]
+        cos_theta = np.cos(theta)
+        jac[:, i] = np.sin(theta)                           # d/dA
+        jac[:, i + 1] = params[i] * cos_theta * two_pi_x    # d/df
+        jac[:, i + 2] = params[i] * cos_theta               # d/dphi
+    jac[:, -1] = 1.0                                        # d/dD
+    return jac
+
+
+def parameter_covariance(x, y, params):
+    """
+    Covariance of fitted parameters from the Jacobian at the solution
+
+    Same estimate as curve_fit's pcov: s^2 * inv(J^T J), with the residual
+    variance s^2 = RSS / (n - p). Computed from the final parameters, so it
+    is available whichever fit mode produced them.
+
+    Returns:
+        (covariance matrix, residual variance, degrees of freedom)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    params = np.asarray(params, dtype=np.float64)
+    dof = max(len(x) - len(params), 1)
+    rss = float(np.sum((y - multi_sinusoid(x, *params)) ** 2))
+    jac = multi_sinusoid_jacobian(x, *params)
+    # pinv rather than inv: nearly degenerate components make J^T J singular
+    covariance = np.linalg.pinv(jac.T @ jac) * (rss / dof)
+    return covariance, rss / dof, dof
+
+
+def parameter_bounds(n_components, max_frequency=None):
+    """Bounds for the flat parameters: amplitudes >= 0 and 0 <= frequency <= max_frequency"""
+    upper_frequency = np.inf if max_frequency is None else max_frequency
+    lower = [0.0, 0.0, -np.inf] * n_components + [-np.inf]
+    upper = [np.inf, upper_frequency, np.inf] * n_components + [np.inf]
+    return np.array(lower), np.array(upper)
+
+
+def fit_sinusoids(x, y, p0, max_frequency=None, method=DEFAULT_FIT_METHOD):
+    """
+    Least-squares fit of the model from an initial guess
+
+    Args:
+        x, y: samples to fit
+        p0: flat initial parameters
+        max_frequency: upper frequency bound, usually the Nyquist frequency
+        method: 'trf' (bounded) or 'lm' (unbounded Levenberg-Marquardt)
+
+    Returns:
+        (params, nfev) with the fitted flat parameters and the number of
+        model evaluations reported by the solver
+    """
+    if method not in FIT_METHODS:
+        raise ValueError(f"Unknown fit method: {method}")
+    p0 = np.asarray(p0, dtype=np.float64)
+    kwargs = {}
+    if method == 'trf':
+        lower, upper = parameter_bounds((len(p0) - 1) // 3, max_frequency)
+        # Negative amplitudes are the same sinusoid shifted by pi; start inside the bounds
+        p0 = _canonical_params(p0)
+        p0[1:-1:3] = np.clip(p0[1:-1:3], lower[1:-1:3], upper[1:-1:3])
+        kwargs['bounds'] = (lower, upper)
+    params, _, info, _, _ = curve_fit(
+        multi_sinusoid, x, y, p0=p0, jac=multi_sinusoid_jacobian,
+        method=method, full_output=True, **kwargs
+    )
+    return _canonical_params(params), info['nfev']
+
+
+def fit_sinusoids_varpro(x, y, frequencies, max_frequency=None, method=DEFAULT_FIT_METHOD):
+    """
+    Separable least-squares fit that searches over the frequencies only
+
+    For fixed frequencies the model is linear in the sine and cosine
+    coefficients and the offset, so those are solved exactly (via QR) at
+    every step and only the k frequencies are optimized nonlinearly. The
+    Jacobian of the projected residual uses the Kaufman approximation.
+
+    Args:
+        x, y: samples to fit
+        frequencies: initial frequencies
+        max_frequency: upper frequency bound, usually the Nyquist frequency
+        method: 'trf' (bounded) or 'lm'
+
+    Returns:
+        (params, nfev) with flat [A, f, phi]*k + [D] parameters and the
+        number of residual evaluations
+    """
+    if method not in FIT_METHODS:
+        raise ValueError(f"Unknown fit method: {method}")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    two_pi_x = 2 * np.pi * x
+    k = len(frequencies)
+    state = {}
+
+    def solve(freqs):
+        if state.get('freqs') is not None and np.array_equal(state['freqs'], freqs):
+            return state
+        basis = sinusoid_basis(x, freqs)
+        sin_theta, cos_theta = basis[:, :k], basis[:, k:2 * k]
+        q, r = np.linalg.qr(basis)
+        coeffs = np.linalg.lstsq(r, q.T @ y, rcond=None)[0]
+        state.update(freqs=np.array(freqs), sin=sin_theta, cos=cos_theta, q=q,
+                     coeffs=coeffs, residual=basis @ coeffs - y)
+        return state
+
+    def residual(freqs):
+        return solve(freqs)['residual']
+
+    def jacobian(freqs):
+        solved = solve(freqs)
+        sin_coeffs, cos_coeffs = solved['coeffs'][:k], solved['coeffs'][k:2 * k]
+        # d(basis @ coeffs)/df_j, projected onto the complement of the basis
+        dmodel = two_pi_x[:, None] * (solved['cos'] * sin_coeffs - solved['sin'] * cos_coeffs)
+        q = solved['q']
+        return dmodel - q @ (q.T @ dmodel)
+
+    f0 = np.asarray(frequencies, dtype=np.float64)
+    kwargs = {}
+    if method == 'trf':
+        upper = np.inf if max_frequency is None else max_frequency
+        f0 = np.clip(np.abs(f0), 0.0, upper)
+        kwargs['bounds'] = (np.zeros(k), np.full(k, upper))
+    result = least_squares(residual, f0, jac=jacobian, method=method, **kwargs)
+    if not result.success:
+        raise RuntimeError(f"Optimal frequencies not found: {result.message}")
+
+    return _params_from_coefficients(result.x, solve(result.x)['coeffs']), result.nfev
+
+
+def sinusoid_basis(x, frequencies):
+    """Design matrix [sin(2 pi f x)..., cos(2 pi f x)..., 1] for fixed frequencies"""
+    theta = np.outer(2 * np.pi * np.asarray(x, dtype=np.float64), frequencies)
+    return np.hstack([np.sin(theta), np.cos(theta), np.ones((len(x), 1))])
+
+
+def _params_from_coefficients(frequencies, coeffs):
+    """Flat parameters from sine coefficients, cosine coefficients and offset"""
+    k = len(frequencies)
+    params = []
+    for freq, a, b in zip(frequencies, coeffs[:k], coeffs[k:2 * k]):
+        # a*sin(t) + b*cos(t) == hypot(a, b) * sin(t + atan2(b, a))
+        params.extend([np.hypot(a, b), freq, np.arctan2(b, a)])
+    params.append(coeffs[-1])
+    return _canonical_params(params)
+
+
+def linear_params(x, y, frequencies):
+    """Best amplitudes, phases and offset for fixed frequencies, as flat parameters"""
+    coeffs = np.linalg.lstsq(sinusoid_basis(x, frequencies), y, rcond=None)[0]
+    return _params_from_coefficients(frequencies, coeffs)
+
+
+def fit_model(x, y, p0, max_frequency=None, method=DEFAULT_FIT_METHOD, mode=DEFAULT_FIT_MODE):
+    """Fit from flat initial parameters with either fit mode; returns (params, nfev)"""
+    if mode not in FIT_MODES:
+        raise ValueError(f"Unknown fit mode: {mode}")
+    if mode == 'varpro':
+        return fit_sinusoids_varpro(x, y, np.asarray(p0)[1:-1:3], max_frequency=max_frequency, method=method)
+    return fit_sinusoids(x, y, p0, max_frequency=max_frequency, method=method)
+
+
+def _canonical_params(params):
+    """Flip negative amplitudes (and frequencies) into the equivalent positive form"""
+    params = np.array(params, dtype=np.float64)
+    for i in range(0, len(params) - 1, 3):
+        if params[i + 1] < 0:
+            params[i + 1] = -params[i + 1]
+            params[i + 2] = np.pi - params[i + 2]
+        if params[i] < 0:
+            params[i] = -params[i]
+            params[i + 2] += np.pi
+    return params
+
+
+def _components_resolved(params, min_separation, min_relative_amplitude):
+    """Whether fitted components are distinct enough to keep (see select_model_order)"""
+    amplitudes = np.abs(params[0:-1:3])
+    frequencies = np.sort(np.abs(params[1:-1:3]))
+    if min_separation and np.any(np.diff(frequencies) < min_separation):
+        return False
+    return not (min_relative_amplitude and amplitudes.min() < min_relative_amplitude * amplitudes.max())
+
+
+def select_model_order(x, y, spacing, criterion=DEFAULT_ORDER_CRITERION,
+                       max_components=DEFAULT_MAX_COMPONENTS, method=DEFAULT_FIT_METHOD,
+                       mode=DEFAULT_FIT_MODE, spectrum_options=None, min_separation=0.0,
+                       min_relative_amplitude=0.0):
+    """
+    Fit increasing numbers of components and keep the best-scoring model
+
+    On short or non-stationary records the criteria alone can keep adding
+    near-equal-frequency pairs that cancel each other out; min_separation
+    and min_relative_amplitude stop the search at such an order instead.
+
+    Args:
+        x, y: training samples
+        spacing: sample spacing of x, or None for irregular sampling
+        criterion: 'aic' or 'bic'
+        max_components: upper bound on the number of components
+        method: least-squares method, 'trf' or 'lm'
+        mode: 'curve_fit' (all parameters nonlinear) or 'varpro' (frequencies only)
+        spectrum_options: optional padding/window/interpolation for spectrum_peak
+        min_separation: smallest allowed distance between two component
+            frequencies (e.g. one frequency bin); closer components end the search
+        min_relative_amplitude: smallest allowed component amplitude as a
+            fraction of the strongest one; weaker components end the search
+
+    Returns:
+        dict with 'params' (flat fitted parameters), 'order', 'seeds'
+        (spectrum (frequency, amplitude) used to start each kept component),
+        'stages' (per-order score, rss, solver evaluations and fit time) and
+        'max_frequency' (the frequency bound used)
+    """
+    if criterion not in ORDER_CRITERIA:
+        raise ValueError(f"Unknown order criterion: {criterion}")
+    if mode not in FIT_MODES:
+        raise ValueError(f"Unknown fit mode: {mode}")
+    n = len(y)
+    nyquist = 0.5 / (spacing if spacing is not None else median_spacing(x))
+    params = np.array([np.mean(y)])
+    best = None
+    seeds, stages = [], []
+
+    for order in range(1, max_components + 1):
+        n_params = 3 * order + 1
+        if n_params >= n:
+            break
+        start = time.perf_counter()
+        amplitude, frequency, phase = spectrum_peak(
+            x, y - multi_sinusoid(x, *params), spacing, **(spectrum_options or {})
+        )
+        if amplitude == 0:
+            break
+        if min_separation and np.any(np.abs(params[1:-1:3] - frequency) < min_separation):
+            # The next peak is a leftover of a component already in the model
+            break
+        p0 = np.concatenate([params[:-1], [amplitude, frequency, phase], params[-1:]])
+        try:
+            candidate, nfev = fit_model(x, y, p0, max_frequency=nyquist, method=method, mode=mode)
+        except RuntimeError:
+            stages.append({
+                'order': order, 'score': None, 'rss': None, 'nfev': None, 'converged': False,
+                'seconds': round(time.perf_counter() - start, 4),
+            })
+            break
+        rss = float(np.sum((y - multi_sinusoid(x, *candidate)) ** 2))
+        score = float(information_criterion(rss, n, n_params, criterion))
+        stages.append({
+            'order': order, 'score': score, 'rss': rss, 'nfev': int(nfev), 'converged': True,
+            'seconds': round(time.perf_counter() - start, 4),
+        })
+        if best is not None and score >= best['score']:
+            break
+        if order > 1 and not _components_resolved(candidate, min_separation, min_relative_amplitude):
+            break
+        params = candidate
+        seeds.append((frequency, amplitude))
+        best = {'params': candidate, 'order': order, 'score': score, 'seeds': list(seeds)}
+
+    if best is None:
+        raise ValueError("No dominant frequencies found")
+    return {
+        'params': best['params'],
+        'order': best['order'],
+        'seeds': best['seeds'],
+        'stages': stages,
+        'max_frequency': nyquist,
+    }
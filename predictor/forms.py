@@ -306,6 +306,25 @@ class SignalGeneratorForm(forms.Form):
         })
     )
     
+    # Response format
+    response_mode = forms.ChoiceField(
+        label='Response Mode',
+        choices=[('inline', 'Inline base64 plots'), ('url', 'Plot URLs')],
+        required=False,
+        help_text='Return plots inline as base64 or as short-lived URLs'
+    )
+    
+    series_format = forms.ChoiceField(
+        label='Series Format',
+        choices=[
+            ('records', 'List of rows'),
+            ('columnar', 'Column lists'),
+            ('binary', 'Base64 float64 columns'),
+        ],
+        required=False,
+        help_text='Encoding of the generated samples (defaults to rows inline, binary for URLs)'
+    )
+    
     def clean(self):
         cleaned_data = super().clean()
         x_start = cleaned_data.get('x_start')
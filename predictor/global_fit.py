@@ -0,0 +1,235 @@
+"""
+Multi-start global refinement of a multi-sinusoid fit
+
+A single local fit can settle in a poor local minimum on hard signals
+(close or weak components, heavy noise). This module reruns the local fit
+from several perturbed copies of the starting point, optionally adds a
+start found by differential evolution over the frequencies, and keeps the
+fit with the lowest mean squared error. The fits run in a process pool,
+and the whole search respects a wall-clock budget. Running fits cannot be
+cancelled, so when the budget ends with fits still running the pool is
+replaced and its workers stopped; otherwise they would keep the CPUs busy
+and later requests would queue behind them.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import numpy as np
+from scipy.optimize import differential_evolution
+
+from .fitting import (
+    DEFAULT_FIT_METHOD, DEFAULT_FIT_MODE, fit_model, linear_params, multi_sinusoid, sinusoid_basis
+)
+
+DEFAULT_STARTS = 8
+DEFAULT_BUDGET_SECONDS = 10.0
+
+_pool = None
+_pool_pid = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def get_fit_pool(workers=None):
+    """Process pool shared by the parallel fitting helpers (workers defaults to one per CPU)"""
+    global _pool, _pool_pid, _pool_workers
+    workers = workers or os.cpu_count() or 1
+    with _pool_lock:
+        # Pools are not inherited across forks (e.g. analysis worker processes)
+        if _pool is None or _pool_pid != os.getpid() or _pool_workers != workers:
+            if _pool is not None and _pool_pid == os.getpid():
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn: the parent may be running threads (plot rendering), which fork does not copy safely
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_pid = os.getpid()
+            _pool_workers = workers
+        return _pool
+
+
+def reset_fit_pool(pool):
+    """
+    Discard a shared pool that broke (a worker was killed) or is stuck on abandoned fits
+
+    Its workers are stopped, and the next get_fit_pool() call starts a
+    fresh pool. Does nothing if the pool was already replaced.
+    """
+    global _pool
+    with _pool_lock:
+        if pool is not _pool:
+            return
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+    # shutdown() lets running tasks finish; stop the workers instead
+    for process in list((getattr(pool, '_processes', None) or {}).values()):
+        process.terminate()
+
+
+def run_in_fit_pool(func, workers=None, retries=1):
+    """
+    Call func(pool) with the shared pool, replacing the pool and retrying if it broke
+
+    Raises:
+        BrokenProcessPool: the pool broke again on the last retry
+    """
+    for attempt in range(retries + 1):
+        pool = get_fit_pool(workers)
+        try:
+            return func(pool)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool
+            reset_fit_pool(pool)
+            if attempt == retries:
+                raise
+
+
+class _ProjectedRSS:
+    """Residual sum of squares for given frequencies, with the linear parameters solved exactly"""
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __call__(self, frequencies):
+        basis = sinusoid_basis(self.x, frequencies)
+        coeffs = np.linalg.lstsq(basis, self.y, rcond=None)[0]
+        return float(np.sum((basis @ coeffs - self.y) ** 2))
+
+
+def _fit_start(x, y, p0, max_frequency, method, mode):
+    """Run one local fit; returns (params, mse) or None if it failed"""
+    try:
+        params, _ = fit_model(x, y, p0, max_frequency=max_frequency, method=method, mode=mode)
+    except (RuntimeError, ValueError, np.linalg.LinAlgError):
+        return None
+    mse = float(np.mean((y - multi_sinusoid(x, *params)) ** 2))
+    return (params, mse) if np.isfinite(mse) else None
+
+
+def perturbed_starts(p0, n_starts, frequency_scale, rng):
+    """
+    The original start plus n_starts - 1 perturbed copies
+
+    Frequencies move by about frequency_scale (typically one spectral
+    resolution, 1 / span), amplitudes by up to +/-50% and phases are redrawn.
+    """
+    p0 = np.asarray(p0, dtype=np.float64)
+    starts = [p0]
+    for _ in range(n_starts - 1):
+        start = p0.copy()
+        start[0:-1:3] *= rng.uniform(0.5, 1.5, size=len(start[0:-1:3]))
+        start[1:-1:3] = np.abs(start[1:-1:3] + rng.normal(0, frequency_scale, size=len(start[1:-1:3])))
+        start[2:-1:3] = rng.uniform(-np.pi, np.pi, size=len(start[2:-1:3]))
+        starts.append(start)
+    return starts
+
+
+def fit_multistart(x, y, p0, max_frequency, method=DEFAULT_FIT_METHOD, mode=DEFAULT_FIT_MODE,
+                   starts=DEFAULT_STARTS, budget=DEFAULT_BUDGET_SECONDS, differential=False,
+                   workers=None, seed=0):
+    """
+    Refine a fit from several starting points in parallel and keep the best MSE
+
+    Args:
+        x, y: samples to fit
+        p0: flat starting parameters (usually the greedy order-selection fit)
+        max_frequency: upper frequency bound, usually the Nyquist frequency
+        method, mode: local solver settings passed to fitting.fit_model
+        starts: number of local fits, including one from p0 itself
+        budget: wall-clock limit in seconds for the whole search
+        differential: also seed a start with differential evolution over the frequencies
+        workers: process pool size; defaults to the CPU count
+        seed: random seed for the perturbations and differential evolution
+
+    Returns:
+        dict with 'params', 'mse', 'starts' (submitted), 'completed',
+        'best_start' (index, or 'differential_evolution'), 'timed_out' and 'seconds'
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    start_time = time.perf_counter()
+    deadline = start_time + budget
+    workers = workers or os.cpu_count() or 1
+    rng = np.random.default_rng(seed)
+    frequency_scale = 1.0 / max(np.ptp(x), np.finfo(np.float64).eps)
+    initial_starts = perturbed_starts(p0, starts, 0.25 * frequency_scale, rng)
+
+    def search(pool):
+        candidates = dict(enumerate(initial_starts))
+        if differential and len(p0) > 1:
+            de_start = _differential_evolution_start(
+                x, y, np.asarray(p0)[1:-1:3], frequency_scale, max_frequency,
+                # Leave at least half of the budget for the local fits
+                start_time + 0.5 * budget, pool, workers, seed
+            )
+            if de_start is not None:
+                candidates['differential_evolution'] = de_start
+
+        futures = {
+            pool.submit(_fit_start, x, y, start, max_frequency, method, mode): key
+            for key, start in candidates.items()
+        }
+        best = None
+        completed = 0
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                completed += 1
+                result = future.result()
+                if result is not None and (best is None or result[1] < best['mse']):
+                    best = {'params': result[0], 'mse': result[1], 'best_start': futures[future]}
+        if pending:
+            # The abandoned fits would keep occupying the workers
+            reset_fit_pool(pool)
+        return best, len(futures), completed, bool(pending)
+
+    try:
+        best, submitted, completed, timed_out = run_in_fit_pool(search, workers)
+    except BrokenProcessPool:
+        best, submitted, completed, timed_out = None, len(initial_starts), 0, False
+
+    if best is None:
+        params = np.asarray(p0, dtype=np.float64)
+        best = {
+            'params': params,
+            'mse': float(np.mean((y - multi_sinusoid(x, *params)) ** 2)),
+            'best_start': None,
+        }
+    return {
+        **best,
+        'starts': submitted,
+        'completed': completed,
+        'timed_out': timed_out,
+        'seconds': round(time.perf_counter() - start_time, 4),
+    }
+
+
+def _differential_evolution_start(x, y, frequencies, frequency_scale, max_frequency, deadline,
+                                  pool, workers, seed):
+    """Search the frequencies near the current ones globally; returns flat params or None"""
+    upper_limit = np.inf if max_frequency is None else max_frequency
+    bounds = [
+        (max(0.0, freq - frequency_scale), min(upper_limit, freq + frequency_scale))
+        for freq in frequencies
+    ]
+    if any(low >= high for low, high in bounds):
+        return None
+    popsize = 15
+    chunksize = max(1, -(-popsize * len(frequencies) // workers))
+    try:
+        result = differential_evolution(
+            _ProjectedRSS(x, y), bounds, seed=seed, popsize=popsize, maxiter=100, polish=False,
+            updating='deferred', workers=partial(pool.map, chunksize=chunksize),
+            callback=lambda *args, **kwargs: time.perf_counter() > deadline,
+        )
+    except (RuntimeError, ValueError, np.linalg.LinAlgError):
+        return None
+    return linear_params(x, y, result.x)
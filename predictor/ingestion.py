@@ -0,0 +1,149 @@
+"""
+Streaming CSV ingestion for uploaded signals
+
+Uploads are parsed incrementally straight from the uploaded file object
+(Django spools large uploads to disk), reading only the 'x' and 'y'
+columns as float64. The header is validated before any data is parsed,
+and the byte and row limits are enforced while streaming, so peak memory
+is bounded by SIGNAL_UPLOAD_MAX_ROWS rather than by the file size.
+"""
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+
+REQUIRED_COLUMNS = ('x', 'y')
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_ROWS = 2_000_000
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+class CSVValidationError(ValueError):
+    """Raised when an uploaded CSV is malformed or exceeds the upload limits"""
+
+
+class _LimitedReader(io.RawIOBase):
+    """Binary stream wrapper that stops reading once max_bytes is exceeded"""
+
+    def __init__(self, source, max_bytes):
+        self._source = source
+        self._max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._source.read(len(buffer))
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        size = len(data)
+        self.bytes_read += size
+        if self._max_bytes and self.bytes_read > self._max_bytes:
+            raise CSVValidationError(
+                f'CSV file exceeds the maximum upload size of {filesizeformat(self._max_bytes)}.'
+            )
+        buffer[:size] = data
+        return size
+
+
+def _upload_limits(max_bytes, max_rows):
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'SIGNAL_UPLOAD_MAX_BYTES', DEFAULT_MAX_BYTES)
+    if max_rows is None:
+        max_rows = getattr(settings, 'SIGNAL_UPLOAD_MAX_ROWS', DEFAULT_MAX_ROWS)
+    return max_bytes, max_rows
+
+
+def _open_text(csv_file, max_bytes):
+    if hasattr(csv_file, 'seek'):
+        csv_file.seek(0)
+    raw = io.BufferedReader(_LimitedReader(csv_file, max_bytes))
+    # utf-8-sig drops a leading byte order mark from spreadsheet exports
+    return io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+
+def _parse_header(line):
+    if not line.strip():
+        raise CSVValidationError('CSV file is empty.')
+    columns = [column.strip() for column in next(csv.reader([line]))]
+    if any(column not in columns for column in REQUIRED_COLUMNS):
+        raise CSVValidationError('CSV file must contain "x" and "y" columns.')
+    if any(columns.count(column) > 1 for column in REQUIRED_COLUMNS):
+        raise CSVValidationError('CSV file has duplicate "x" or "y" columns.')
+    return columns
+
+
+def validate_csv_header(csv_file, max_bytes=None):
+    """Check the size and header of an upload without parsing its data"""
+    max_bytes, _ = _upload_limits(max_bytes, None)
+    size = getattr(csv_file, 'size', None)
+    if max_bytes and size is not None and size > max_bytes:
+        raise CSVValidationError(
+            f'CSV file exceeds the maximum upload size of {filesizeformat(max_bytes)}.'
+        )
+    text = _open_text(csv_file, max_bytes)
+    try:
+        return _parse_header(text.readline())
+    except UnicodeDecodeError:
+        raise CSVValidationError('CSV file must be UTF-8 encoded.')
+    finally:
+        text.detach()
+        if hasattr(csv_file, 'seek'):
+            csv_file.seek(0)
+
+
+def read_signal_csv(csv_file, max_bytes=None, max_rows=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Stream an uploaded CSV into a DataFrame with float64 'x' and 'y' columns
+
+    Args:
+        csv_file: uploaded file (or any binary file-like object)
+        max_bytes: maximum file size, defaults to SIGNAL_UPLOAD_MAX_BYTES
+        max_rows: maximum number of data rows, defaults to SIGNAL_UPLOAD_MAX_ROWS
+        chunk_rows: rows parsed per chunk
+
+    Returns:
+        pandas DataFrame with 'x' and 'y' columns
+
+    Raises:
+        CSVValidationError: malformed header or data, or limits exceeded
+    """
+    max_bytes, max_rows = _upload_limits(max_bytes, max_rows)
+    columns = validate_csv_header(csv_file, max_bytes)
+
+    text = _open_text(csv_file, max_bytes)
+    text.readline()  # header already validated
+    x_chunks, y_chunks = [], []
+    rows = 0
+    try:
+        reader = pd.read_csv(
+            text,
+            header=None,
+            names=columns,
+            usecols=list(REQUIRED_COLUMNS),
+            dtype={column: np.float64 for column in REQUIRED_COLUMNS},
+            chunksize=chunk_rows,
+        )
+        for chunk in reader:
+            rows += len(chunk)
+            if max_rows and rows > max_rows:
+                raise CSVValidationError(f'CSV file exceeds the maximum of {max_rows} rows.')
+            x_chunks.append(chunk['x'].to_numpy())
+            y_chunks.append(chunk['y'].to_numpy())
+    except CSVValidationError:
+        raise
+    except UnicodeDecodeError:
+        raise CSVValidationError('CSV file must be UTF-8 encoded.')
+    except (ValueError, pd.errors.ParserError) as e:
+        raise CSVValidationError(f'CSV file contains invalid data: {e}')
+
+    if not x_chunks:
+        return pd.DataFrame({
+            'x': np.empty(0, dtype=np.float64),
+            'y': np.empty(0, dtype=np.float64),
+        })
+    return pd.DataFrame({'x': np.concatenate(x_chunks), 'y': np.concatenate(y_chunks)})
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from predictor.signal_utils import SignalPredictor, evaluation_grid
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-point vs vectorized evaluation of a fitted multi-sinusoidal function'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                            help='Number of x values to evaluate')
+        parser.add_argument('--components', type=int, default=3,
+                            help='Number of sinusoidal components in the model')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Best-of-N repetitions per measurement')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        params = []
+        for _ in range(options['components']):
+            params.extend([rng.uniform(0.1, 2.0), rng.uniform(0.01, 0.5), rng.uniform(-np.pi, np.pi)])
+        params.append(0.5)
+
+        predictor = SignalPredictor()
+        predictor.params = params
+
+        self.stdout.write(f"{'points':>10} {'per-point (s)':>14} {'vectorized (s)':>15} {'speedup':>9} {'max abs diff':>13}")
+        for points in options['points']:
+            x_values = evaluation_grid(0.0, 100.0, 100.0 / max(points - 1, 1))[:points]
+
+            per_point = self._best_of(options['repeat'], lambda: [predictor.evaluate_function(x) for x in x_values.tolist()])
+            vectorized = self._best_of(options['repeat'], lambda: predictor.evaluate_batch(x_values))
+
+            expected = np.array([predictor.evaluate_function(x) for x in x_values.tolist()])
+            max_diff = float(np.max(np.abs(predictor.evaluate_batch(x_values) - expected)))
+            self.stdout.write(
+                f"{points:>10} {per_point:>14.5f} {vectorized:>15.5f} {per_point / vectorized:>8.1f}x {max_diff:>13.2e}"
+            )
+
+    @staticmethod
+    def _best_of(repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,125 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from scipy.optimize import curve_fit
+from scipy.signal import find_peaks
+
+from predictor.fitting import (
+    fit_sinusoids_varpro, interpolate_peak, multi_sinusoid, multi_sinusoid_jacobian,
+    parameter_bounds, sinusoid_at, windowed_spectrum
+)
+from predictor.signal_utils import SignalGenerator
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the multi-sinusoid fit: finite-difference curve_fit vs analytic Jacobian (trf/lm) '
+            'and variable projection')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--components', type=int, nargs='+', default=[1, 3, 5],
+                            help='Number of sinusoids in the generated signals')
+        parser.add_argument('--points', type=int, default=5000,
+                            help='Number of samples per signal')
+        parser.add_argument('--noise', type=float, default=0.3,
+                            help='Noise level passed to the signal generator')
+        parser.add_argument('--signals', type=int, default=10,
+                            help='Signals generated per component count')
+        parser.add_argument('--seeds', choices=['bins', 'refined'], default='bins',
+                            help='Initial guesses from raw FFT bins, or from the windowed, zero-padded '
+                                 'and interpolated spectrum')
+
+    def handle(self, *args, **options):
+        variants = [
+            ('baseline', {}),
+            ('lm+jac', {'method': 'lm', 'jac': True}),
+            ('trf+jac', {'method': 'trf', 'jac': True, 'bounds': True}),
+            ('varpro-lm', {'method': 'lm', 'varpro': True}),
+            ('varpro-trf', {'method': 'trf', 'varpro': True}),
+        ]
+        self.stdout.write(
+            f"{'k':>3} {'variant':>10} {'model evals':>12} {'jac evals':>10} {'time (ms)':>10} "
+            f"{'rms error':>10} {'failed':>7}"
+        )
+        for k in options['components']:
+            signals = [self._signal(k, options['points'], options['noise'], seed, options['seeds'])
+                       for seed in range(options['signals'])]
+            for name, variant in variants:
+                evals, jacs, times, errors, failed = [], [], [], [], 0
+                for x, y, p0, nyquist in signals:
+                    counts = {'model': 0, 'jac': 0}
+                    start = time.perf_counter()
+                    try:
+                        params = self._fit(x, y, p0, nyquist, counts, **variant)
+                    except RuntimeError:
+                        failed += 1
+                        continue
+                    times.append(time.perf_counter() - start)
+                    evals.append(counts['model'])
+                    jacs.append(counts['jac'])
+                    errors.append(np.sqrt(np.mean((y - multi_sinusoid(x, *params)) ** 2)))
+                if not times:
+                    self.stdout.write(f"{k:>3} {name:>10} {'-':>12} {'-':>10} {'-':>10} {'-':>10} {failed:>7}")
+                    continue
+                self.stdout.write(
+                    f"{k:>3} {name:>10} {np.mean(evals):>12.1f} {np.mean(jacs):>10.1f} "
+                    f"{np.mean(times) * 1000:>10.2f} {np.mean(errors):>10.4f} {failed:>7}"
+                )
+
+    @staticmethod
+    def _signal(k, points, noise, seed, seeds='bins'):
+        """Generate a signal and an initial guess from its k largest spectrum peaks"""
+        random.seed(seed)
+        np.random.seed(seed)
+        result = SignalGenerator().generate_signal(
+            x_start=0, x_end=50, num_points=points, use_random=True,
+            num_sinusoids=k, noise_level=noise,
+        )
+        x = result['data']['x'].to_numpy()
+        y = result['data']['y'].to_numpy()
+        spacing = x[1] - x[0]
+        if seeds == 'refined':
+            freqs, amplitudes = windowed_spectrum(y, spacing)
+        else:
+            # The FFT-bin guess the original fit used
+            freqs, amplitudes = windowed_spectrum(y, spacing, padding=1, window='boxcar')
+        peaks, _ = find_peaks(amplitudes)
+        peaks = peaks[np.argsort(amplitudes[peaks])[::-1][:k]]
+        p0 = []
+        for peak in peaks:
+            if seeds == 'refined':
+                freq = interpolate_peak(freqs, amplitudes, peak)
+                amplitude, phase = sinusoid_at(x, y, freq)
+            else:
+                freq = freqs[peak]
+                amplitude, phase = sinusoid_at(x, y, freq, window='boxcar')
+            p0.extend([amplitude, freq, phase])
+        p0.append(y.mean())
+        return x, y, np.array(p0), 0.5 / spacing
+
+    @staticmethod
+    def _fit(x, y, p0, nyquist, counts, method=None, jac=False, bounds=False, varpro=False):
+        if varpro:
+            # Residual evaluations; each solves the linear coefficients by QR
+            params, counts['model'] = fit_sinusoids_varpro(x, y, p0[1:-1:3], max_frequency=nyquist, method=method)
+            return params
+
+        def model(x, *params):
+            counts['model'] += 1
+            return multi_sinusoid(x, *params)
+
+        def jacobian(x, *params):
+            counts['jac'] += 1
+            return multi_sinusoid_jacobian(x, *params)
+
+        kwargs = {}
+        if method:
+            kwargs['method'] = method
+        if jac:
+            kwargs['jac'] = jacobian
+        if bounds:
+            kwargs['bounds'] = parameter_bounds((len(p0) - 1) // 3, nyquist)
+            p0 = np.clip(p0, *kwargs['bounds'])
+        params, _ = curve_fit(model, x, y, p0=p0, **kwargs)
+        return params
@@ -0,0 +1,59 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from predictor.plotting import PLOT_DPI, downsample, figure_to_png, new_figure
+
+FIGSIZE = (12, 8)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark full-resolution vs downsampled rendering of large signals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, nargs='+', default=[10_000, 100_000, 500_000],
+                            help='Number of samples in the benchmark signal')
+        parser.add_argument('--methods', nargs='+', default=['minmax', 'lttb'],
+                            help='Downsampling methods to compare against full resolution')
+        parser.add_argument('--noise', type=float, default=0.2,
+                            help='Standard deviation of the Gaussian noise added to the signal')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        self.stdout.write(
+            f"{'points':>9} {'method':>7} {'drawn':>8} {'render (s)':>11} {'png (KB)':>9} {'pixels differing':>17}"
+        )
+        for points in options['points']:
+            x = np.linspace(0, 100, points)
+            y = (1.5 * np.sin(2 * np.pi * 0.2 * x) + 0.7 * np.sin(2 * np.pi * 1.3 * x)
+                 + rng.normal(0, options['noise'], points))
+
+            reference, elapsed, png_size = self._render(x, y, 'none')
+            self.stdout.write(
+                f"{points:>9} {'none':>7} {points:>8} {elapsed:>11.3f} {png_size / 1024:>9.1f} {'-':>17}"
+            )
+            for method in options['methods']:
+                image, elapsed, png_size = self._render(x, y, method)
+                drawn = len(downsample(x, y, FIGSIZE[0], method=method)[0])
+                differing = np.mean(np.any(image != reference, axis=-1)) if image.shape == reference.shape else 1.0
+                self.stdout.write(
+                    f"{points:>9} {method:>7} {drawn:>8} {elapsed:>11.3f} {png_size / 1024:>9.1f} {differing:>16.2%}"
+                )
+
+    @staticmethod
+    def _render(x, y, method):
+        """Draw the analysis-style scatter + line figure; return RGBA pixels, seconds and PNG size"""
+        start = time.perf_counter()
+        fig = new_figure(FIGSIZE)
+        ax = fig.subplots()
+        ax.scatter(*downsample(x, y, FIGSIZE[0], method=method), color='red', s=10)
+        ax.plot(*downsample(x, y, FIGSIZE[0], method=method), color='blue', linewidth=2)
+        ax.grid()
+        png = figure_to_png(fig, dpi=PLOT_DPI)
+        elapsed = time.perf_counter() - start
+
+        fig.set_dpi(PLOT_DPI)
+        fig.canvas.draw()
+        image = np.asarray(fig.canvas.buffer_rgba()).copy()
+        return image, elapsed, len(png)
@@ -0,0 +1,122 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from predictor.models import SignalAnalysis
+
+# Plan fragments that show a query is answered from an index
+INDEX_MARKERS = ('Index Only Scan', 'Index Scan', 'Bitmap Index Scan', 'USING INDEX', 'USING COVERING INDEX',
+                 'USING INTEGER PRIMARY KEY')
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Seed a large SignalAnalysis table inside a transaction that is rolled back, then time and '
+            'EXPLAIN the listing, count and share lookups')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100,
+                            help='Number of users to create')
+        parser.add_argument('--analyses', type=int, default=200_000,
+                            help='Total number of analyses, spread evenly over the users')
+        parser.add_argument('--public-fraction', type=float, default=0.05,
+                            help='Fraction of analyses marked public')
+        parser.add_argument('--batch-size', type=int, default=5_000,
+                            help='Rows per bulk insert')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Best-of-N repetitions per query')
+        parser.add_argument('--database', default='default',
+                            help='Database alias to benchmark')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        try:
+            with transaction.atomic(using=alias):
+                self._run(alias, options)
+                # Leave the database exactly as it was
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, alias, options):
+        start = time.perf_counter()
+        users = self._seed(alias, options)
+        self.stdout.write(f"Seeded {options['analyses']} analyses for {len(users)} users "
+                          f"in {time.perf_counter() - start:.1f}s")
+        self._analyze(alias)
+
+        user = users[len(users) // 2]
+        public_id = (SignalAnalysis.objects.using(alias).filter(is_public=True)
+                     .order_by('id').values_list('id', flat=True).first())
+        analyses = SignalAnalysis.objects.using(alias)
+        queries = [
+            ('list', analyses.filter(user=user).order_by('-created_at', '-id')
+             .values_list('id', 'created_at')[:20]),
+            # Explained as the id scan the COUNT(*) runs over
+            ('count', analyses.filter(user=user).values('id')),
+            ('share', analyses.filter(id=public_id, is_public=True).values_list('id', flat=True)),
+        ]
+
+        self.stdout.write(f"{'query':>6} {'best (ms)':>10} {'indexed':>8}  plan")
+        for name, queryset in queries:
+            if name == 'count':
+                run = queryset.count
+            else:
+                # .all() each time so the result cache is not reused
+                run = lambda queryset=queryset: list(queryset.all())
+            best = self._best_of(options['repeat'], run)
+            plan = queryset.explain().splitlines()
+            indexed = any(marker in line for line in plan for marker in INDEX_MARKERS)
+            self.stdout.write(f"{name:>6} {best * 1000:>10.3f} {'yes' if indexed else 'NO':>8}  {plan[0]}")
+            if options['verbosity'] > 1:
+                for line in plan[1:]:
+                    self.stdout.write(f"{'':>28}{line}")
+
+    @staticmethod
+    def _seed(alias, options):
+        users = User.objects.db_manager(alias).bulk_create([
+            User(username=f'benchmark-{index}', email=f'benchmark-{index}@example.com')
+            for index in range(options['users'])
+        ])
+        if not users[0].pk:
+            # Backends without RETURNING don't set primary keys on bulk_create
+            users = list(User.objects.using(alias).filter(username__startswith='benchmark-').order_by('id'))
+        public_every = round(1 / options['public_fraction']) if options['public_fraction'] > 0 else 0
+        batch = []
+        for index in range(options['analyses']):
+            batch.append(SignalAnalysis(
+                user=users[index % len(users)],
+                fitted_function='f(x) = 0',
+                parameters={},
+                dominant_frequencies=[],
+                is_public=bool(public_every) and index % public_every == 0,
+            ))
+            if len(batch) >= options['batch_size']:
+                SignalAnalysis.objects.using(alias).bulk_create(batch)
+                batch = []
+        SignalAnalysis.objects.using(alias).bulk_create(batch)
+        return users
+
+    @staticmethod
+    def _analyze(alias):
+        """Refresh planner statistics so the plans match a populated production table"""
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE {SignalAnalysis._meta.db_table}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
+
+    @staticmethod
+    def _best_of(repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
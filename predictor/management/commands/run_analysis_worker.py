@@ -0,0 +1,48 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from predictor.tasks import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Process queued signal analysis jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Number of worker processes to run')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=None,
+                            help='Exit after each worker has processed this many jobs')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        worker_args = (options['poll_interval'], options['max_jobs'], options['burst'])
+
+        if processes == 1:
+            processed = run_worker(*worker_args)
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} job(s)'))
+            return
+
+        # Connections must not be shared with forked children
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=worker_args, daemon=False)
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {processes} analysis workers')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS('Analysis workers stopped'))
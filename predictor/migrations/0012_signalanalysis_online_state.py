@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0011_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='signalanalysis',
+            name='online_state',
+            field=models.JSONField(blank=True, help_text='Tracking state for appended samples', null=True),
+        ),
+    ]
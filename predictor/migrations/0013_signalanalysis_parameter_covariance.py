@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0012_signalanalysis_online_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='signalanalysis',
+            name='parameter_covariance',
+            field=models.JSONField(blank=True, help_text='Fitted parameters and their covariance', null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0013_signalanalysis_parameter_covariance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='signalanalysis',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='analysis_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signalanalysis',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['id'], name='analysis_public_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
@@ -8,6 +9,7 @@ from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
 import os
 import uuid
+from .response_cache import bump_analysis_revision, bump_user_revision
 from .storage_backends import PublicMediaStorage
 
 # Constants
@@ -68,6 +70,20 @@ def save_user_profile(sender, instance, **kwargs):
     instance.userprofile.save()
 
 
+class SignalAnalysisQuerySet(models.QuerySet):
+    def with_user_counts(self):
+        """
+        Load the owner and the owner's total analysis count in the same query
+
+        Serializing user_analysis_count then costs no query per row.
+        """
+        per_user = self.model.objects.filter(user=models.OuterRef('user')).order_by().values('user')
+        count = per_user.annotate(total=models.Count('pk')).values('total')
+        return self.select_related('user').annotate(
+            annotated_user_analysis_count=Coalesce(models.Subquery(count), 0)
+        )
+
+
 class SignalAnalysis(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='signal_analyses', null=True, blank=True)
     name = models.CharField(max_length=100, blank=True, help_text="Custom name for this analysis")
@@ -104,6 +120,11 @@ class SignalAnalysis(models.Model):
     is_public = models.BooleanField(default=False)
     share_password_hash = models.CharField(max_length=128, blank=True)
 
+    # Full-precision parameters and their covariance, for forecast bands (see predictor.forecast)
+    parameter_covariance = models.JSONField(null=True, blank=True, help_text="Fitted parameters and their covariance")
+    # Running fit state for samples appended after the upload (see predictor.online)
+    online_state = models.JSONField(null=True, blank=True, help_text="Tracking state for appended samples")
+
     def __str__(self):
         # string representation uses display_name property directly
         return f"{self.display_name} - {self.created_at} - User: {self.user.username if self.user else 'Anonymous'}"
@@ -113,12 +134,23 @@ class SignalAnalysis(models.Model):
         """Return custom name if set, otherwise default to 'Analysis #id'"""
         return self.name if self.name else f"Analysis #{self.id}"
     
+    objects = SignalAnalysisQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
-        
+        indexes = [
+            # Per-user listings (newest first, id as the cursor tie-breaker) and counts
+            models.Index(fields=['user', '-created_at', '-id'], name='analysis_user_created_idx'),
+            # Share lookups only ever touch public analyses
+            models.Index(fields=['id'], condition=models.Q(is_public=True), name='analysis_public_idx'),
+        ]
+
     @property
     def user_analysis_count(self):
         """Get total number of analyses for this user"""
+        # Set by SignalAnalysisQuerySet.with_user_counts()
+        if hasattr(self, 'annotated_user_analysis_count'):
+            return self.annotated_user_analysis_count
         if self.user:
             return SignalAnalysis.objects.filter(user=self.user).count()
         return 0    # Methods to set and check share password
@@ -157,18 +189,92 @@ class SignalAnalysis(models.Model):
         }
 
 
+class AnalysisJob(models.Model):
+    """A queued signal analysis processed by the background worker"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='analysis_jobs', null=True, blank=True)
+    session_key = models.CharField(max_length=40, blank=True, help_text="Owning session for anonymous jobs")
+    input_file = models.FileField(
+        upload_to=csv_upload_to,
+        storage=PublicMediaStorage()
+    )
+    options = models.JSONField(default=dict, help_text="Analysis options (advanced_mode, split_point, noise_filter)")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Completion percentage")
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    analysis = models.ForeignKey(
+        SignalAnalysis, on_delete=models.SET_NULL, related_name='jobs', null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Times a worker has claimed the job")
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Job {self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+
+def plot_in_use(name):
+    """Check whether any remaining analysis references a (deduplicated) plot file"""
+    return SignalAnalysis.objects.filter(
+        models.Q(original_signal_plot=name) |
+        models.Q(fitted_signal_plot=name) |
+        models.Q(frequency_analysis_plot=name)
+    ).exists()
+
+
 # Signal handler to delete associated files when a SignalAnalysis instance is deleted
 @receiver(post_delete, sender=SignalAnalysis)
 def delete_signal_analysis_files(sender, instance, **kwargs):
     # Delete uploaded CSV and generated plots without saving the model
     if instance.uploaded_file:
         instance.uploaded_file.delete(save=False)
-    if instance.original_signal_plot:
-        instance.original_signal_plot.delete(save=False)
-    if instance.fitted_signal_plot:
-        instance.fitted_signal_plot.delete(save=False)
-    if instance.frequency_analysis_plot:
-        instance.frequency_analysis_plot.delete(save=False)
+    # Plots are content-addressed and may be shared with other analyses
+    for plot in (instance.original_signal_plot, instance.fitted_signal_plot, instance.frequency_analysis_plot):
+        if plot and not plot_in_use(plot.name):
+            plot.delete(save=False)
+
+# Cached detail/share responses (see response_cache) are invalidated on every change
+@receiver(post_save, sender=SignalAnalysis)
+def invalidate_saved_analysis_responses(sender, instance, created, **kwargs):
+    bump_analysis_revision(instance.pk)
+    if created:
+        # The owner's other analyses report a new analysis count
+        bump_user_revision(instance.user_id)
+
+
+@receiver(post_delete, sender=SignalAnalysis)
+def invalidate_deleted_analysis_responses(sender, instance, **kwargs):
+    bump_analysis_revision(instance.pk)
+    bump_user_revision(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_analysis_responses(sender, instance, **kwargs):
+    # Payloads embed the owner's user details
+    bump_user_revision(instance.pk)
+
 
 # Signal handler to delete old profile picture when changed
 @receiver(pre_save, sender=UserProfile)
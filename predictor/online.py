@@ -0,0 +1,256 @@
+"""
+Online tracking of a fitted model as new samples are appended
+
+Appending samples should not cost a full analysis. The tracked state of
+an analysis keeps the full-precision parameters, the residual error at
+the last fit and running DFT sums at each fitted frequency. For each
+appended block:
+
+- the running sums are updated with a Goertzel recursion over the block
+  (a direct sum when the block is irregularly sampled), which gives
+  current amplitude estimates at the tracked frequencies in O(block);
+- the current model predicts the block, and the fit is only redone when
+  the block's residual error drifts above DRIFT_RATIO times the error at
+  the last fit. The refit is warm-started from the current parameters
+  rather than repeating order selection.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.files.base import ContentFile
+from scipy.signal import lfilter
+
+from .fitting import DEFAULT_FIT_METHOD, DEFAULT_FIT_MODE, fit_model, multi_sinusoid
+from .forecast import model_uncertainty
+from .ingestion import DEFAULT_MAX_ROWS, read_signal_csv
+from .lomb_scargle import is_uniformly_sampled, median_spacing
+from .signal_utils import SignalPredictor
+from .tasks import predictor_params_from_result
+
+DRIFT_RATIO = 2.0
+
+
+def goertzel(y, frequency, spacing):
+    """
+    Return sum(y[n] * exp(-2j*pi*frequency*spacing*n)) for uniformly spaced samples
+
+    The second-order Goertzel recursion needs one real multiply-add per
+    sample, and runs inside scipy's lfilter.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) == 0:
+        return 0j
+    omega = 2 * np.pi * frequency * spacing
+    state = lfilter([1.0], [1.0, -2.0 * np.cos(omega), 1.0], y)
+    previous = state[-2] if len(y) > 1 else 0.0
+    # s[N-1] - exp(-i*w) * s[N-2] is the sum weighted by exp(i*w*(N-1-n))
+    return np.exp(-1j * omega * (len(y) - 1)) * (state[-1] - np.exp(-1j * omega) * previous)
+
+
+def block_sums(x, y, frequencies):
+    """DFT sums of (x, y) at each frequency, referenced to x = 0"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    if len(x) == 0:
+        return np.zeros(len(frequencies), dtype=np.complex128)
+    if len(x) > 2 and is_uniformly_sampled(x):
+        spacing = (x[-1] - x[0]) / (len(x) - 1)
+        return np.array([
+            np.exp(-2j * np.pi * freq * x[0]) * goertzel(y, freq, spacing) for freq in frequencies
+        ])
+    return np.exp(-2j * np.pi * np.outer(frequencies, x)) @ y
+
+
+def tracked_spectrum(state):
+    """[frequency, amplitude] estimates at the fitted frequencies from the running sums"""
+    sums = np.array([complex(re, im) for re, im in state['sums']])
+    # A sinusoid of amplitude A over n samples has a DFT sum of magnitude ~ n * A / 2
+    amplitudes = 2.0 * np.abs(sums) / max(state['samples'], 1)
+    frequencies = state['params'][1:-1:3]
+    return [[float(freq), float(amp)] for freq, amp in zip(frequencies, amplitudes)]
+
+
+def _build_state(x, y, params, baseline_mse, refits):
+    params = np.asarray(params, dtype=np.float64)
+    sums = block_sums(x, y - params[-1], params[1:-1:3])
+    return {
+        'params': params.tolist(),
+        'samples': len(x),
+        'x_last': float(x[-1]),
+        'baseline_mse': baseline_mse,
+        'sums': [[float(s.real), float(s.imag)] for s in sums],
+        'refits': refits,
+    }
+
+
+def refit_state(x, y, params, window=0, method=DEFAULT_FIT_METHOD, mode=DEFAULT_FIT_MODE, refits=0):
+    """
+    Warm-start a fit from params and build a fresh tracking state
+
+    Args:
+        x, y: all samples of the signal, sorted by x
+        params: flat starting parameters
+        window: fit only the last `window` samples (0 = all)
+        method, mode: local solver settings passed to fitting.fit_model
+        refits: refit count to record in the state
+
+    Returns:
+        tracking state dict (see module docstring)
+    """
+    x_fit, y_fit = (x[-window:], y[-window:]) if window else (x, y)
+    params = np.asarray(params, dtype=np.float64)
+    try:
+        params, _ = fit_model(x_fit, y_fit, params, max_frequency=0.5 / median_spacing(x_fit),
+                              method=method, mode=mode)
+    except (RuntimeError, ValueError, np.linalg.LinAlgError):
+        # Keep the previous parameters if the warm start fails to converge
+        pass
+    baseline_mse = float(np.mean((y_fit - multi_sinusoid(x_fit, *params)) ** 2))
+    return _build_state(x, y, params, baseline_mse, refits)
+
+
+def track_block(state, x_new, y_new, drift_ratio=DRIFT_RATIO):
+    """
+    Fold a block of appended samples into the tracking state
+
+    Args:
+        state: tracking state dict (not modified)
+        x_new, y_new: the appended samples, all after state['x_last']
+        drift_ratio: refit threshold on the block residual error
+
+    Returns:
+        (updated state, report) where report has the block 'residual_mse',
+        'baseline_mse', 'drift' (their ratio) and 'refit_needed'
+    """
+    params = np.asarray(state['params'], dtype=np.float64)
+    residual_mse = float(np.mean((y_new - multi_sinusoid(x_new, *params)) ** 2))
+    sums = np.array([complex(re, im) for re, im in state['sums']])
+    sums = sums + block_sums(x_new, y_new - params[-1], params[1:-1:3])
+
+    baseline = state['baseline_mse']
+    drift = residual_mse / baseline if baseline > 0 else (np.inf if residual_mse > 0 else 1.0)
+    updated = {
+        **state,
+        'samples': state['samples'] + len(x_new),
+        'x_last': float(x_new[-1]),
+        'sums': [[float(s.real), float(s.imag)] for s in sums],
+    }
+    report = {
+        'residual_mse': residual_mse,
+        'baseline_mse': baseline,
+        'drift': float(drift) if np.isfinite(drift) else None,
+        'refit_needed': bool(drift > drift_ratio),
+    }
+    return updated, report
+
+
+def stored_samples(analysis):
+    """Read the samples of a saved analysis, sorted by x"""
+    with analysis.uploaded_file.open('rb') as csv_file:
+        # Stored inputs were checked at upload time; don't re-apply the limits
+        csv_data = read_signal_csv(csv_file, max_bytes=0, max_rows=0)
+    x = csv_data['x'].to_numpy()
+    y = csv_data['y'].to_numpy()
+    order = np.argsort(x, kind='stable')
+    return x[order], y[order]
+
+
+def _appended_csv(analysis, x_new, y_new):
+    """The stored CSV with the new rows added at the end"""
+    with analysis.uploaded_file.open('rb') as csv_file:
+        content = csv_file.read()
+    if content and not content.endswith(b'\n'):
+        content += b'\n'
+    rows = io.StringIO()
+    pd.DataFrame({'x': x_new, 'y': y_new}).to_csv(rows, header=False, index=False)
+    return content + rows.getvalue().encode()
+
+
+def append_samples(analysis, x_new, y_new, force_refit=False):
+    """
+    Append samples to a saved analysis and keep its fit up to date
+
+    The first append builds the tracking state with a warm-started fit on
+    the stored samples. Later appends only update the running sums, unless
+    the residual error drifts (or force_refit is set). The stored CSV is
+    extended either way, and the analysis is saved.
+
+    Args:
+        analysis: SignalAnalysis to extend (ideally locked with select_for_update)
+        x_new, y_new: the new samples; every x must be after the last stored x
+        force_refit: refit even if the error has not drifted
+
+    Returns:
+        dict with 'appended', 'samples', 'refit', 'reason' (why it refit,
+        or None), 'refits', the drift report of track_block and the
+        'tracked_spectrum'
+
+    Raises:
+        ValueError: the samples overlap the stored ones or exceed the row limit
+    """
+    order = np.argsort(x_new, kind='stable')
+    x_new = np.asarray(x_new, dtype=np.float64)[order]
+    y_new = np.asarray(y_new, dtype=np.float64)[order]
+    window = getattr(settings, 'SIGNAL_APPEND_REFIT_WINDOW', 0)
+    drift_ratio = getattr(settings, 'SIGNAL_APPEND_DRIFT_RATIO', DRIFT_RATIO)
+    fit_options = {
+        'window': window,
+        'method': getattr(settings, 'SIGNAL_FIT_METHOD', DEFAULT_FIT_METHOD),
+        'mode': getattr(settings, 'SIGNAL_FIT_MODE', DEFAULT_FIT_MODE),
+    }
+
+    state = analysis.online_state
+    fitted = None
+    reason = None
+    if not state:
+        # Recover full-precision parameters from the stored (rounded) ones
+        fitted = stored_samples(analysis)
+        params = predictor_params_from_result({'parameters': analysis.parameters})
+        state = refit_state(*fitted, params, refits=0, **fit_options)
+        reason = 'initial'
+
+    if x_new[0] <= state['x_last']:
+        raise ValueError(f"Appended samples must come after the last stored sample (x > {state['x_last']})")
+    max_rows = getattr(settings, 'SIGNAL_UPLOAD_MAX_ROWS', DEFAULT_MAX_ROWS)
+    if max_rows and state['samples'] + len(x_new) > max_rows:
+        raise ValueError(f'An analysis can hold at most {max_rows} samples.')
+
+    state, report = track_block(state, x_new, y_new, drift_ratio)
+    if reason is None and (force_refit or report['refit_needed']):
+        reason = 'forced' if force_refit else 'drift'
+        x, y = stored_samples(analysis)
+        fitted = (np.concatenate([x, x_new]), np.concatenate([y, y_new]))
+        state = refit_state(*fitted, state['params'], refits=state['refits'] + 1, **fit_options)
+
+    old_name = analysis.uploaded_file.name
+    analysis.uploaded_file.save('signal.csv', ContentFile(_appended_csv(analysis, x_new, y_new)), save=False)
+    analysis.online_state = state
+    spectrum = tracked_spectrum(state)
+    analysis.dominant_frequencies = spectrum
+    if reason is not None:
+        predictor = SignalPredictor()
+        predictor.params = state['params']
+        analysis.fitted_function, analysis.parameters = predictor.fit_summary()
+        x_fit, y_fit = (fitted[0][-window:], fitted[1][-window:]) if window else fitted
+        analysis.parameter_covariance = model_uncertainty(x_fit, y_fit, state['params'])
+    if analysis.parameter_covariance:
+        # Forecasts start after the newest sample
+        analysis.parameter_covariance['x_last'] = state['x_last']
+    analysis.save()
+    # Only drop the previous CSV once the row points at the new one. An
+    # analysis saved by a background job shares that file with the job.
+    analysis.jobs.filter(input_file=old_name).update(input_file='')
+    analysis.uploaded_file.storage.delete(old_name)
+
+    return {
+        'appended': len(x_new),
+        'samples': state['samples'],
+        'refit': reason is not None,
+        'reason': reason,
+        'refits': state['refits'],
+        **report,
+        'tracked_spectrum': spectrum,
+    }
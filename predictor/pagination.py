@@ -0,0 +1,16 @@
+"""
+Pagination for analysis listings
+
+Cursor (keyset) pagination keeps every page an indexed range scan from the
+previous position instead of an OFFSET that grows with the page number,
+and pages stay stable while new analyses are added.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class AnalysisCursorPagination(CursorPagination):
+    """Newest first; the id breaks ties between analyses created at the same time"""
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,192 @@
+"""
+Thread-safe plot rendering
+
+Figures are built with the object-oriented matplotlib API (Figure plus an
+Agg canvas) instead of the global pyplot state machine, so independent
+figures can be rendered concurrently. PNG encoding releases the GIL for
+most of its work, which lets a small thread pool overlap the plots of a
+single request.
+
+Large series are downsampled to the output resolution before drawing
+(per-pixel min/max envelopes by default, LTTB optionally), so render time
+and PNG size stay flat as signals grow.
+"""
+import base64
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+PLOT_DPI = 150
+DEFAULT_DOWNSAMPLE_METHOD = 'minmax'
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def minmax_downsample(x, y, n_bins):
+    """
+    Reduce a series to the min and max sample of each of n_bins index buckets
+
+    Drawn at one bucket per pixel column this is visually identical to the
+    full-resolution line, but the number of points is bounded by 2 * n_bins.
+    Buckets follow the sample order, so x must be sorted (downsample sorts
+    it when needed).
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = len(y)
+    if n_bins <= 0 or n <= 2 * n_bins:
+        return x, y
+    bucket = -(-n // n_bins)
+    buckets = -(-n // bucket)
+    # Pad with the last sample so the series reshapes into equal buckets
+    padded = np.pad(y, (0, buckets * bucket - n), mode='edge').reshape(buckets, bucket)
+    offsets = np.arange(buckets) * bucket
+    imin = np.minimum(padded.argmin(axis=1) + offsets, n - 1)
+    imax = np.minimum(padded.argmax(axis=1) + offsets, n - 1)
+    idx = np.unique(np.concatenate([imin, imax, [0, n - 1]]))
+    return x[idx], y[idx]
+
+
+def lttb_downsample(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling to n_out points"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out < 3 or n <= n_out:
+        return x, y
+    # Bucket boundaries for the points between the fixed first and last samples
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    sizes = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / sizes
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / sizes
+    # The last bucket is compared against the final sample
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[a] - avg_x[i]) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y[i] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+DOWNSAMPLERS = {
+    'minmax': minmax_downsample,
+    'lttb': lttb_downsample,
+}
+
+
+def downsample(x, y, width_inches, dpi=PLOT_DPI, method=None):
+    """
+    Cap the points drawn for a series to the output resolution
+
+    Args:
+        x, y: series to draw, in any x order
+        width_inches: width of the axes' figure in inches
+        dpi: output resolution
+        method: 'minmax', 'lttb' or 'none'; defaults to PLOT_DOWNSAMPLE_METHOD.
+            Code running in worker processes should pass it explicitly:
+            spawned workers don't load the Django settings.
+
+    Returns:
+        (x, y) sorted by x, with at most about one bucket per output pixel
+        column; 'none' returns the series unchanged
+    """
+    if method is None:
+        method = settings.PLOT_DOWNSAMPLE_METHOD if settings.configured else DEFAULT_DOWNSAMPLE_METHOD
+    if method == 'none' or x is None or len(x) == 0:
+        return x, y
+    pixels = int(width_inches * dpi)
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if np.any(x[1:] < x[:-1]):
+        # Both downsamplers bucket by position, which only matches x buckets for sorted x
+        order = np.argsort(x, kind='stable')
+        x, y = x[order], y[order]
+    if method == 'lttb':
+        return lttb_downsample(x, y, 2 * pixels)
+    return DOWNSAMPLERS[method](x, y, pixels)
+
+
+def new_figure(figsize):
+    """Create a figure attached to its own Agg canvas"""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def figure_to_png(fig, dpi=PLOT_DPI):
+    """Render a figure to PNG bytes"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        # Pool threads do not survive a fork (e.g. analysis worker processes)
+        if _executor is None or _executor_pid != os.getpid():
+            workers = settings.PLOT_RENDER_WORKERS if settings.configured else None
+            _executor = ThreadPoolExecutor(
+                max_workers=workers or min(4, os.cpu_count() or 1),
+                thread_name_prefix='plot-render',
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _render_one(builder, as_png):
+    start = time.perf_counter()
+    fig = builder()
+    if fig is None:
+        return None, time.perf_counter() - start
+    png = figure_to_png(fig)
+    encoded = png if as_png else base64.b64encode(png).decode()
+    return encoded, time.perf_counter() - start
+
+
+def render_plots(builders, only=None, as_png=False):
+    """
+    Render figures concurrently and return them as base64 PNGs
+
+    Args:
+        builders: dict of plot key -> callable returning a Figure (or None to skip)
+        only: optional iterable of plot keys to render; defaults to all
+        as_png: return raw PNG bytes instead of base64 strings
+
+    Returns:
+        (plots, timings) where plots maps key -> base64 PNG and timings maps
+        key -> render time in seconds
+    """
+    if only is not None:
+        only = set(only)
+        builders = {key: builder for key, builder in builders.items() if key in only}
+
+    futures = {
+        key: _get_executor().submit(_render_one, builder, as_png)
+        for key, builder in builders.items()
+    }
+    plots, timings = {}, {}
+    for key, future in futures.items():
+        encoded, elapsed = future.result()
+        timings[key] = round(elapsed, 4)
+        if encoded is not None:
+            plots[key] = encoded
+    return plots, timings
@@ -0,0 +1,140 @@
+"""
+Versioned response cache for saved analyses
+
+Saved analyses barely change after creation, yet the detail and share
+endpoints rebuild the same payload (DB query, serializer, presigned URLs)
+on every hit. Built payloads are cached per endpoint and analysis id,
+together with the revision tokens they were built from:
+
+- the analysis revision, replaced whenever the analysis is saved or
+  deleted (post_save / post_delete in models.py);
+- the owner's revision, replaced when the owner's analyses are added or
+  removed (the payload carries user_analysis_count) or the user changes.
+  bulk_create sends no signals, so bulk inserts replace it explicitly.
+
+A cached payload is only served while both tokens still match, so there
+is nothing to delete on invalidation. Each payload also has an ETag, and
+GET requests with a matching If-None-Match get a 304.
+
+Payloads embed presigned URLs, so the cache TTL (settings.CACHES) has to
+stay below SIGNED_URL_CACHE_MARGIN. The cache must be shared by all web
+processes for the invalidation to reach every one of them.
+"""
+import hashlib
+import json
+import time
+import uuid
+
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .result_cache import counter_stats, increment_counter
+
+RESPONSE_CACHE_ALIAS = 'analysis_responses'
+KEY_PREFIX = 'analysis-response'
+ANALYSIS_REVISION_PREFIX = 'analysis-revision'
+USER_REVISION_PREFIX = 'analysis-user-revision'
+HITS_KEY = 'analysis-response-stats:hits'
+MISSES_KEY = 'analysis-response-stats:misses'
+
+
+def _revision_key(prefix, object_id):
+    return f'{prefix}:{object_id}'
+
+
+def _bump(key):
+    # A fresh random token rather than incr(): no read-modify-write race
+    caches[RESPONSE_CACHE_ALIAS].set(key, uuid.uuid4().hex, timeout=None)
+
+
+def bump_analysis_revision(analysis_id):
+    """Invalidate cached responses of one analysis"""
+    _bump(_revision_key(ANALYSIS_REVISION_PREFIX, analysis_id))
+
+
+def bump_user_revision(user_id):
+    """Invalidate cached responses of every analysis owned by a user"""
+    _bump(_revision_key(USER_REVISION_PREFIX, user_id))
+
+
+def _current(key):
+    response_cache = caches[RESPONSE_CACHE_ALIAS]
+    # Start a revision for objects that have none yet (or were evicted)
+    response_cache.add(key, uuid.uuid4().hex, timeout=None)
+    return response_cache.get(key)
+
+
+def analysis_revision(analysis_id):
+    """
+    Return the current revision of an analysis
+
+    Read it before loading the analysis: a change made while the payload
+    is being built then leaves the cached copy unused instead of stale.
+    """
+    return _current(_revision_key(ANALYSIS_REVISION_PREFIX, analysis_id))
+
+
+def revision_token(revision, owner_id):
+    """Combine an analysis revision with the current revision of its owner"""
+    return f'{revision}:{_current(_revision_key(USER_REVISION_PREFIX, owner_id))}'
+
+
+def _entry_key(kind, analysis_id):
+    return f'{KEY_PREFIX}:{kind}:{analysis_id}'
+
+
+def get_cached_response(kind, analysis_id):
+    """
+    Return the cached payload entry of an endpoint for an analysis
+
+    Returns:
+        dict with 'owner_id', 'data', 'etag' and 'last_modified', or None
+        when nothing is cached or the analysis or its owner changed since
+    """
+    response_cache = caches[RESPONSE_CACHE_ALIAS]
+    entry = response_cache.get(_entry_key(kind, analysis_id))
+    if entry is not None:
+        keys = [
+            _revision_key(ANALYSIS_REVISION_PREFIX, analysis_id),
+            _revision_key(USER_REVISION_PREFIX, entry['owner_id']),
+        ]
+        current = response_cache.get_many(keys)
+        token = ':'.join(str(current[key]) for key in keys) if len(current) == len(keys) else None
+        if token != entry['token']:
+            entry = None
+    increment_counter(HITS_KEY if entry is not None else MISSES_KEY)
+    return entry
+
+
+def set_cached_response(kind, analysis_id, owner_id, token, data):
+    """Cache a built payload under the revision token read before building it"""
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    entry = {
+        'token': token,
+        'owner_id': owner_id,
+        'data': data,
+        'etag': f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        'last_modified': int(time.time()),
+    }
+    caches[RESPONSE_CACHE_ALIAS].set(_entry_key(kind, analysis_id), entry)
+    return entry
+
+
+def conditional_response(request, entry):
+    """Response for a cached entry, or a 304 when the client's copy is current"""
+    response = Response(entry['data'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    # Clients may keep the payload but have to revalidate it (presigned URLs expire)
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'], response=response
+    )
+
+
+def get_response_cache_stats():
+    """Return hit/miss counters for the analysis response cache"""
+    return counter_stats(HITS_KEY, MISSES_KEY)
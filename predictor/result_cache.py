@@ -0,0 +1,87 @@
+"""
+Content-addressed cache for signal analysis results
+
+Results are keyed by a SHA-256 of the normalized x/y samples plus the
+analysis parameters, so re-uploading the same CSV with the same options
+skips the fit entirely. Entries live in the ``analysis_results`` cache
+alias (size and TTL limits are configured in settings.CACHES); hit/miss
+counters are kept in the default cache.
+"""
+import hashlib
+import json
+
+import numpy as np
+from django.core.cache import cache, caches
+
+ANALYSIS_CACHE_ALIAS = 'analysis_results'
+KEY_PREFIX = 'analysis-result'
+HITS_KEY = 'analysis-result-stats:hits'
+MISSES_KEY = 'analysis-result-stats:misses'
+
+
+def _normalized_column(csv_data, column):
+    """Return a column as contiguous little-endian float64 bytes"""
+    values = np.ascontiguousarray(csv_data[column].to_numpy(dtype=np.float64), dtype='<f8')
+    # Treat -0.0 and 0.0 as the same sample
+    values = values + 0.0
+    return values.tobytes()
+
+
+def analysis_cache_key(csv_data, split_point, noise_lvl, backend_name):
+    """Build the cache key for a signal and its analysis parameters"""
+    digest = hashlib.sha256()
+    digest.update(_normalized_column(csv_data, 'x'))
+    digest.update(b'|')
+    digest.update(_normalized_column(csv_data, 'y'))
+    params = {
+        'split_point': None if split_point is None else float(split_point),
+        'noise_filter': float(noise_lvl or 0),
+        'backend': backend_name,
+    }
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return f'{KEY_PREFIX}:{digest.hexdigest()}'
+
+
+def increment_counter(key):
+    """Increment a hit/miss counter in the default cache"""
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counter not initialised yet (or evicted)
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_cached_result(key):
+    """Return a cached analysis result, or None on a miss"""
+    result = caches[ANALYSIS_CACHE_ALIAS].get(key)
+    increment_counter(HITS_KEY if result is not None else MISSES_KEY)
+    return result
+
+
+def set_cached_result(key, result):
+    """Cache a successful analysis result"""
+    if result.get('success'):
+        caches[ANALYSIS_CACHE_ALIAS].set(key, result)
+
+
+def counter_stats(hits_key, misses_key):
+    """Return hits, misses and the hit rate for a pair of counters"""
+    hits = cache.get(hits_key, 0)
+    misses = cache.get(misses_key, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+def get_cache_stats():
+    """Return hit/miss counters for the analysis result cache"""
+    return counter_stats(HITS_KEY, MISSES_KEY)
+
+
+def content_addressed_name(data, ext):
+    """Return a filename derived from the SHA-256 of the file contents"""
+    return f"{hashlib.sha256(data).hexdigest()}.{ext}"
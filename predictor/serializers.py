@@ -1,6 +1,11 @@
+import math
+
+import numpy as np
 from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.utils import html
 from django.contrib.auth.models import User
-from .models import SignalAnalysis, UserProfile
+from .models import SignalAnalysis, UserProfile, AnalysisJob
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -18,6 +23,29 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['user', 'profile_picture', 'bio', 'location', 'birth_date', 'website']
 
 
+class SparseFieldsetMixin:
+    """
+    Limit the output to the comma-separated ``fields`` query parameter, if given
+
+    Unknown names raise a ValidationError (a 400 listing them) rather than
+    being dropped silently.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get('fields') if request is not None else None
+        if requested:
+            keep = {name.strip() for name in requested.split(',') if name.strip()}
+            unknown = keep - set(self.fields)
+            if unknown:
+                raise serializers.ValidationError({
+                    'fields': [f"Unknown fields: {', '.join(sorted(unknown))}"]
+                })
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+
 class SignalAnalysisSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     display_name = serializers.ReadOnlyField()
@@ -41,6 +69,27 @@ class SignalAnalysisSerializer(serializers.ModelSerializer):
         ]
 
 
+class SignalAnalysisListSerializer(SparseFieldsetMixin, SignalAnalysisSerializer):
+    """Full analysis representation for listings, with ``fields=`` support"""
+
+
+class SignalAnalysisSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Lightweight listing row: no JSON blobs, nested user or presigned URLs"""
+    display_name = serializers.ReadOnlyField()
+    has_visualizations = serializers.ReadOnlyField()
+
+    # Columns the summary reads, so listings can skip loading the rest
+    MODEL_FIELDS = [
+        'id', 'name', 'created_at', 'mse', 'is_public',
+        'original_signal_plot', 'fitted_signal_plot', 'frequency_analysis_plot',
+    ]
+
+    class Meta:
+        model = SignalAnalysis
+        fields = ['id', 'name', 'display_name', 'created_at', 'mse', 'is_public', 'has_visualizations']
+        read_only_fields = fields
+
+
 class SignalAnalysisCreateSerializer(serializers.Serializer):
     """Serializer for creating signal analysis from CSV upload"""
     csv_file = serializers.FileField()
@@ -49,12 +98,164 @@ class SignalAnalysisCreateSerializer(serializers.Serializer):
     noise_filter = serializers.FloatField(default=0, min_value=0)
 
 
+class SignalAnalysisBatchSerializer(serializers.Serializer):
+    """Serializer for analyzing several CSV files (or zip archives of CSVs) at once"""
+    files = serializers.ListField(child=serializers.FileField(), allow_empty=False)
+    advanced_mode = serializers.BooleanField(default=False)
+    split_point = serializers.FloatField(required=False, allow_null=True)
+    noise_filter = serializers.FloatField(default=0, min_value=0)
+
+
+class WindowedAnalysisSerializer(serializers.Serializer):
+    """Serializer for the sliding-window (spectrogram) analysis of a CSV upload"""
+    csv_file = serializers.FileField()
+    frame_points = serializers.IntegerField(default=256, min_value=16, max_value=16384,
+                                            help_text="Samples per frame")
+    overlap = serializers.FloatField(default=0.5, min_value=0, max_value=0.95,
+                                     help_text="Fraction of each frame shared with the next one")
+    max_components = serializers.IntegerField(default=3, min_value=1, max_value=5,
+                                              help_text="Largest number of sinusoids per frame")
+
+
+class AnalysisJobSerializer(serializers.ModelSerializer):
+    """Serializer for background analysis job status"""
+    analysis_id = serializers.PrimaryKeyRelatedField(source='analysis', read_only=True)
+
+    class Meta:
+        model = AnalysisJob
+        fields = [
+            'id', 'status', 'progress', 'message', 'error', 'analysis_id',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class Float64ArrayField(serializers.Field):
+    """Accept a list or numpy array of numbers as one float64 array (no per-element fields)"""
+
+    def get_value(self, dictionary):
+        # Form submissions repeat the key once per value
+        if html.is_html_input(dictionary):
+            return dictionary.getlist(self.field_name) if self.field_name in dictionary else empty
+        return super().get_value(dictionary)
+
+    def to_internal_value(self, data):
+        if isinstance(data, (str, bytes, dict)):
+            raise serializers.ValidationError("Expected a list of numbers")
+        try:
+            values = np.asarray(data, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError("Expected a list of numbers")
+        if values.ndim != 1:
+            raise serializers.ValidationError("Expected a flat list of numbers")
+        if not np.all(np.isfinite(values)):
+            raise serializers.ValidationError("Values must be finite numbers")
+        return values
+
+    def to_representation(self, value):
+        return np.asarray(value, dtype=np.float64).tolist()
+
+
+class FiniteFloatField(serializers.FloatField):
+    """FloatField that rejects inf and NaN"""
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        if not math.isfinite(value):
+            raise serializers.ValidationError("Must be a finite number")
+        return value
+
+
 class FunctionEvaluationSerializer(serializers.Serializer):
-    """Serializer for evaluating function at specific points"""
-    x_values = serializers.ListField(
-        child=serializers.FloatField(),
+    """Serializer for evaluating function at specific points or over a range"""
+    MAX_POINTS = 1_000_000
+
+    x_values = Float64ArrayField(
+        required=False,
         help_text="List of x values to evaluate the function at"
     )
+    start = FiniteFloatField(required=False, help_text="Range start (inclusive)")
+    stop = FiniteFloatField(required=False, help_text="Range stop (inclusive)")
+    step = FiniteFloatField(required=False, min_value=0, help_text="Range step")
+    count = serializers.IntegerField(required=False, min_value=1, help_text="Number of evenly spaced range points")
+
+    def validate(self, data):
+        range_keys = [key for key in ('start', 'stop', 'step', 'count') if key in data]
+        if 'x_values' in data:
+            if range_keys:
+                raise serializers.ValidationError("Provide either x_values or a start/stop range, not both")
+            points = len(data['x_values'])
+        elif 'start' in data and 'stop' in data and ('step' in data) != ('count' in data):
+            if data['stop'] < data['start']:
+                raise serializers.ValidationError({'stop': "Stop must not be less than start"})
+            if not math.isfinite(data['stop'] - data['start']):
+                raise serializers.ValidationError({'stop': "The range is too wide"})
+            if 'count' in data:
+                points = data['count']
+            elif data['step'] <= 0:
+                raise serializers.ValidationError({'step': "Step must be positive"})
+            else:
+                # The span can overflow to inf; compare as a float before converting to int
+                points = (data['stop'] - data['start']) / data['step'] + 1
+        else:
+            raise serializers.ValidationError("Provide x_values, or start and stop with either step or count")
+        if not math.isfinite(points) or points > self.MAX_POINTS:
+            raise serializers.ValidationError(f"At most {self.MAX_POINTS} points can be evaluated per request")
+        return data
+
+
+class AppendSamplesSerializer(serializers.Serializer):
+    """Serializer for appending samples to a saved analysis"""
+    x_values = Float64ArrayField(help_text="x values of the new samples")
+    y_values = Float64ArrayField(help_text="y values of the new samples")
+    force_refit = serializers.BooleanField(default=False, help_text="Refit even if the error has not drifted")
+
+    def validate(self, data):
+        if len(data['x_values']) != len(data['y_values']):
+            raise serializers.ValidationError("x_values and y_values must have the same length")
+        if not len(data['x_values']):
+            raise serializers.ValidationError("Provide at least one sample")
+        return data
+
+
+class ForecastSerializer(serializers.Serializer):
+    """Query parameters of a forecast after the end of an analysis' data"""
+    JSON_MAX_POINTS = 100_000
+    MAX_POINTS = 10_000_000
+
+    horizon = FiniteFloatField(help_text="How far past the last sample to forecast")
+    step = FiniteFloatField(required=False, help_text="Grid spacing")
+    count = serializers.IntegerField(required=False, min_value=1, help_text="Number of grid points")
+    level = serializers.FloatField(default=0.95, min_value=0.5, max_value=0.999,
+                                   help_text="Coverage of the bands")
+    interval = serializers.ChoiceField(choices=['confidence', 'prediction'], default='confidence')
+    output = serializers.ChoiceField(choices=['json', 'arrow', 'parquet', 'npy', 'csv'], default='json')
+
+    def validate(self, data):
+        if data['horizon'] <= 0:
+            raise serializers.ValidationError({'horizon': "Horizon must be positive"})
+        if ('step' in data) == ('count' in data):
+            raise serializers.ValidationError("Provide either step or count")
+        limit = self.JSON_MAX_POINTS if data['output'] == 'json' else self.MAX_POINTS
+        if 'count' in data:
+            points = data['count']
+        elif data['step'] <= 0:
+            raise serializers.ValidationError({'step': "Step must be positive"})
+        else:
+            # May overflow to inf for tiny steps; check before converting to int
+            points = data['horizon'] / data['step'] + 1e-9
+        if not math.isfinite(points) or points > limit:
+            raise serializers.ValidationError(
+                f"At most {limit} points can be forecast with output={data['output']}"
+                + ("; use a binary output for longer horizons" if data['output'] == 'json' else "")
+            )
+        if 'count' in data:
+            data['step'] = data['horizon'] / data['count']
+        else:
+            data['count'] = int(np.floor(points))
+            if data['count'] < 1:
+                raise serializers.ValidationError({'step': "Step must not exceed the horizon"})
+        return data
 
 
 class SignalGeneratorSerializer(serializers.Serializer):
@@ -0,0 +1,79 @@
+"""
+Short-lived storage for generated signals
+
+When the generator is called with response_mode='url', the generated
+samples are kept in the 'generated_signals' cache and the response only
+carries URLs. Plots are rendered on first request and cached next to the
+samples, so the generator response itself never waits for PNG encoding.
+"""
+import base64
+import uuid
+
+import numpy as np
+import pandas as pd
+from django.core.cache import caches
+
+from .signal_utils import SignalGenerator
+
+GENERATED_SIGNALS_ALIAS = 'generated_signals'
+GENERATOR_PLOT_KEYS = ('signal', 'components', 'fft')
+
+
+def _cache():
+    return caches[GENERATED_SIGNALS_ALIAS]
+
+
+def store_generated_signal(df, parameters):
+    """Store a generated signal and return its key"""
+    key = uuid.uuid4().hex
+    _cache().set(f'signal:{key}', {
+        'x': np.ascontiguousarray(df['x'].to_numpy(dtype=np.float64)),
+        'y': np.ascontiguousarray(df['y'].to_numpy(dtype=np.float64)),
+        'parameters': parameters,
+    })
+    return key
+
+
+def load_generated_signal(key):
+    """Return (DataFrame, parameters) for a stored signal, or None if it expired"""
+    entry = _cache().get(f'signal:{key}')
+    if entry is None:
+        return None
+    return pd.DataFrame({'x': entry['x'], 'y': entry['y']}), entry['parameters']
+
+
+def get_generated_plot(key, plot):
+    """Return PNG bytes for one plot of a stored signal, rendering it on first use"""
+    cache_key = f'plot:{key}:{plot}'
+    png = _cache().get(cache_key)
+    if png is not None:
+        return png
+    stored = load_generated_signal(key)
+    if stored is None:
+        return None
+    df, parameters = stored
+    generator = SignalGenerator()
+    generator.last_generated_params = parameters
+    png = generator.generate_visualization(df, plots=[plot], as_png=True).get(plot)
+    if png is not None:
+        _cache().set(cache_key, png)
+    return png
+
+
+def encode_series(df, series_format='binary'):
+    """
+    Encode generated samples compactly
+
+    'binary' returns base64 little-endian float64 columns; 'columnar' returns
+    plain JSON lists per column instead of one dict per row.
+    """
+    x = df['x'].to_numpy(dtype='<f8')
+    y = df['y'].to_numpy(dtype='<f8')
+    if series_format == 'columnar':
+        return {'format': 'columnar', 'length': len(x), 'x': x.tolist(), 'y': y.tolist()}
+    return {
+        'format': 'float64-le-base64',
+        'length': len(x),
+        'x': base64.b64encode(x.tobytes()).decode(),
+        'y': base64.b64encode(y.tobytes()).decode(),
+    }
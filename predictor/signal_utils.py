@@ -1,17 +1,22 @@
 import numpy as np
 import pandas as pd
 from scipy.fft import fft, fftfreq
-from scipy.signal import find_peaks
-from scipy.optimize import curve_fit
-from scipy.optimize import differential_evolution  # added for global optimization
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
 from sklearn.metrics import mean_squared_error
-import io
-import base64
 import math
 import random
+import time
+
+from .fitting import (
+    DEFAULT_FIT_METHOD, DEFAULT_FIT_MODE, DEFAULT_MAX_COMPONENTS, DEFAULT_ORDER_CRITERION,
+    select_model_order
+)
+from .forecast import model_uncertainty
+from .global_fit import DEFAULT_BUDGET_SECONDS, fit_multistart
+from .lomb_scargle import is_uniformly_sampled, lomb_scargle
+from .plotting import downsample, new_figure, render_plots
+from .windowed import (
+    DEFAULT_FRAME_POINTS, DEFAULT_OVERLAP, DEFAULT_WINDOW_COMPONENTS, MAX_WINDOW_WORK, fit_windows
+)
 
 
 class SignalGenerator:
@@ -19,6 +24,7 @@ class SignalGenerator:
     
     def __init__(self):
         self.last_generated_params = None
+        self.plot_timings = {}
     
     def generate_signal(self, x_start=0, x_end=50, num_points=1000, 
                        sinusoid_params=None, offset=0, noise_level=0, 
@@ -115,93 +121,139 @@ class SignalGenerator:
         
         return function_str
     
-    def generate_visualization(self, df):
-        """Generate visualization plots for the generated signal"""
+    def generate_visualization(self, df, plots=None, as_png=False):
+        """
+        Generate visualization plots for the generated signal
+
+        Args:
+            df: DataFrame returned by generate_signal
+            plots: optional iterable of plot keys ('signal', 'components', 'fft')
+                to render; defaults to all
+            as_png: return raw PNG bytes instead of base64 strings
+
+        Returns:
+            dict of plot key -> base64 PNG. Per-plot render times are kept in
+            self.plot_timings.
+        """
         # Constants for axis labels
         X_LABEL = 'X (time)'
         Y_LABEL = 'Y (signal)'
         
-        plots = {}
         x = df['x'].values
         y = df['y'].values
         params = self.last_generated_params
         
         # Plot 1: Generated Signal
-        plt.figure(figsize=(12, 6))
-        plt.plot(x, y, 'b-', linewidth=1.5, label='Generated Signal')
-        plt.title('Generated Sinusoidal Signal')
-        plt.xlabel(X_LABEL)
-        plt.ylabel(Y_LABEL)
-        plt.grid(True, alpha=0.3)
-        plt.legend()
-        plots['signal'] = self._plot_to_base64()
+        def signal_plot():
+            fig = new_figure((12, 6))
+            ax = fig.subplots()
+            ax.plot(*downsample(x, y, 12), 'b-', linewidth=1.5, label='Generated Signal')
+            ax.set_title('Generated Sinusoidal Signal')
+            ax.set_xlabel(X_LABEL)
+            ax.set_ylabel(Y_LABEL)
+            ax.grid(True, alpha=0.3)
+            ax.legend()
+            return fig
         
         # Plot 2: Individual Components
-        if len(params['sinusoids']) > 1:
-            plt.figure(figsize=(12, 8))
+        def components_plot():
+            if len(params['sinusoids']) <= 1:
+                return None
+            fig = new_figure((12, 8))
+            ax = fig.subplots()
             
             # Plot each sinusoidal component
             y_components = []
             for i, (amplitude, frequency, phase) in enumerate(params['sinusoids']):
                 component = amplitude * np.sin(2 * np.pi * frequency * x + phase)
                 y_components.append(component)
-                plt.plot(x, component, '--', alpha=0.7, 
+                ax.plot(*downsample(x, component, 12), '--', alpha=0.7, 
                         label=f'Component {i+1}: A={amplitude:.2f}, f={frequency:.3f}')
             
             # Plot combined signal (without noise)
             y_clean = np.sum(y_components, axis=0) + params['offset']
-            plt.plot(x, y_clean, 'k-', linewidth=2, label='Combined (no noise)')
+            ax.plot(*downsample(x, y_clean, 12), 'k-', linewidth=2, label='Combined (no noise)')
             
-            plt.title('Individual Sinusoidal Components')
-            plt.xlabel(X_LABEL)
-            plt.ylabel(Y_LABEL)
-            plt.grid(True, alpha=0.3)
-            plt.legend()
-            plots['components'] = self._plot_to_base64()
+            ax.set_title('Individual Sinusoidal Components')
+            ax.set_xlabel(X_LABEL)
+            ax.set_ylabel(Y_LABEL)
+            ax.grid(True, alpha=0.3)
+            ax.legend()
+            return fig
         
         # Plot 3: FFT Analysis of generated signal
-        N = len(x)
-        T = x[1] - x[0] if len(x) > 1 else 1
-        yf = fft(y)
-        xf = fftfreq(N, T)[:N//2]
-        amplitudes = 2.0 / N * np.abs(yf[:N//2])
-        
-        plt.figure(figsize=(10, 6))
-        plt.plot(xf, amplitudes, 'r-', linewidth=1.5)
-        plt.title('FFT Analysis of Generated Signal')
-        plt.xlabel('Frequency')
-        plt.ylabel('Amplitude')
-        plt.grid(True, alpha=0.3)
-        
-        # Mark the theoretical frequencies
-        for amplitude, frequency, phase in params['sinusoids']:
-            plt.axvline(x=frequency, color='green', linestyle='--', alpha=0.7,
-                       label=f'Theoretical f={frequency:.3f}')
-        
-        plt.legend()
-        plots['fft'] = self._plot_to_base64()
-        
-        return plots
-    
-    def _plot_to_base64(self):
-        """Convert current matplotlib plot to base64 string"""
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        plot_data = buffer.getvalue()
-        buffer.close()
-        plt.close()
+        def fft_plot():
+            N = len(x)
+            T = x[1] - x[0] if len(x) > 1 else 1
+            yf = fft(y)
+            xf = fftfreq(N, T)[:N//2]
+            amplitudes = 2.0 / N * np.abs(yf[:N//2])
+            
+            fig = new_figure((10, 6))
+            ax = fig.subplots()
+            ax.plot(*downsample(xf, amplitudes, 10), 'r-', linewidth=1.5)
+            ax.set_title('FFT Analysis of Generated Signal')
+            ax.set_xlabel('Frequency')
+            ax.set_ylabel('Amplitude')
+            ax.grid(True, alpha=0.3)
+            
+            # Mark the theoretical frequencies
+            for amplitude, frequency, phase in params['sinusoids']:
+                ax.axvline(x=frequency, color='green', linestyle='--', alpha=0.7,
+                           label=f'Theoretical f={frequency:.3f}')
+            
+            ax.legend()
+            return fig
         
-        encoded_plot = base64.b64encode(plot_data).decode()
-        return encoded_plot
+        rendered, self.plot_timings = render_plots({
+            'signal': signal_plot,
+            'components': components_plot,
+            'fft': fft_plot,
+        }, only=plots, as_png=as_png)
+        return rendered
+
+
+def evaluation_grid(start, stop, step=None, count=None):
+    """Build an evenly spaced float64 grid from start to stop (inclusive) by step or point count"""
+    if stop < start:
+        raise ValueError("stop must not be less than start")
+    if count is not None:
+        if count < 1:
+            raise ValueError("count must be positive")
+        return np.linspace(start, stop, int(count), dtype=np.float64)
+    if step is None or step <= 0:
+        raise ValueError("step must be positive")
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return start + step * np.arange(count, dtype=np.float64)
 
 
 class SignalPredictor:
-    def __init__(self):
+    def __init__(self, order_criterion=DEFAULT_ORDER_CRITERION, max_components=DEFAULT_MAX_COMPONENTS,
+                 fit_method=DEFAULT_FIT_METHOD, fit_mode=DEFAULT_FIT_MODE, spectrum_options=None,
+                 multistart=0, fit_budget=DEFAULT_BUDGET_SECONDS, differential_evolution=False,
+                 plot_downsample=None):
         self.params = None
         self.mse = None
         self.dominant_freqs = None
         self.dominant_amplitudes = None
+        self.plot_timings = {}
+        self.order_criterion = order_criterion
+        self.max_components = max_components
+        self.fit_method = fit_method
+        self.fit_mode = fit_mode
+        # Zero-padding factor, window and peak interpolation for the initial guesses
+        self.spectrum_options = spectrum_options or {}
+        # Optional multi-start refinement after order selection (0 disables it)
+        self.multistart = multistart
+        self.fit_budget = fit_budget
+        self.differential_evolution = differential_evolution
+        # Plot downsampling method; None reads PLOT_DOWNSAMPLE_METHOD (pass it to worker processes)
+        self.plot_downsample = plot_downsample
+        self.global_search = None
+        self.uncertainty = None
+        self.model_order = None
+        self.uniform_sampling = None
+        self.order_stages = []
         
     def multi_sinusoidal(self, x, *params):
         """Multi-sinusoidal model for curve fitting"""
@@ -214,13 +266,14 @@ class SignalPredictor:
             y += A * np.sin(2 * np.pi * f * x + phi)
         return y
     
-    def analyze_signal(self, csv_data, split_point=20):
+    def analyze_signal(self, csv_data, split_point=20, plots=None):
         """
         Analyze signal using FFT and curve fitting
         
         Args:
             csv_data: pandas DataFrame with 'x' and 'y' columns
             split_point: point to split train/test data
+            plots: optional iterable of plot keys to render; defaults to all
             
         Returns:
             dict with analysis results
@@ -243,63 +296,76 @@ class SignalPredictor:
                 raise ValueError("Not enough training data points")
             
             # Perform FFT on training data
+            timings = {}
+            stage_start = time.perf_counter()
             N = len(x_train)
-            T = x_train[1] - x_train[0] if len(x_train) > 1 else 1
+            self.uniform_sampling = is_uniformly_sampled(x_train)
+            if self.uniform_sampling:
+                T = x_train[1] - x_train[0] if len(x_train) > 1 else 1
 
-            # Detrend to remove DC offset
-            y_detrended = y_train - np.mean(y_train)
+                # Detrend to remove DC offset
+                y_detrended = y_train - np.mean(y_train)
 
-            # Compute one-sided FFT including Nyquist
-            yf = fft(y_detrended)
-            xf = np.fft.rfftfreq(N, T)
-            amplitudes = 2.0 / N * np.abs(yf[:N//2+1])
+                # Compute one-sided FFT including Nyquist
+                yf = fft(y_detrended)
+                xf = np.fft.rfftfreq(N, T)
+                amplitudes = 2.0 / N * np.abs(yf[:N//2+1])
 
-            # Remove DC spike so it doesn't count as a sinusoid
-            amplitudes[0] = 0
+                # Remove DC spike so it doesn't count as a sinusoid
+                amplitudes[0] = 0
+            else:
+                # Jittered or gapped samples (e.g. after the noise filter): no FFT grid
+                order = np.argsort(x_train)
+                x_train, y_train = x_train[order], y_train[order]
+                T = None
+                xf, amplitudes = lomb_scargle(x_train, y_train)
+            timings['spectrum'] = round(time.perf_counter() - stage_start, 4)
 
-            # Find dominant frequencies
-            peaks, _ = find_peaks(amplitudes, height=0.05)
-            # Fallback: if fewer than 2 peaks found, pick top-2 amplitude bins
-            if len(peaks) < 2 and len(amplitudes) >= 2:
-                sorted_idx = np.argsort(amplitudes)
-                peaks = sorted_idx[-2:]
-            # Assign detected frequencies and amplitudes
-            self.dominant_freqs = xf[peaks]
-            self.dominant_amplitudes = amplitudes[peaks]
+            # Add components one at a time, scored by AIC/BIC on the training split
+            stage_start = time.perf_counter()
+            selection = select_model_order(
+                x_train, y_train, T,
+                criterion=self.order_criterion,
+                max_components=self.max_components,
+                method=self.fit_method,
+                mode=self.fit_mode,
+                spectrum_options=self.spectrum_options,
+            )
+            timings['model_selection'] = round(time.perf_counter() - stage_start, 4)
+            self.params = selection['params']
+            self.model_order = selection['order']
+            self.order_stages = selection['stages']
+            self.dominant_freqs = np.array([freq for freq, _ in selection['seeds']])
+            self.dominant_amplitudes = np.array([amp for _, amp in selection['seeds']])
 
-            if len(self.dominant_freqs) == 0:
-                raise ValueError("No dominant frequencies found")
-            
-            # Set initial guesses for curve fitting
-            # Estimate initial amplitudes, frequencies, and phases from FFT
-            # FFT was computed on detrended data, so get phase from original y_train FFT
-            fft_full = fft(y_train - np.mean(y_train))
-            fft_angles = np.angle(fft_full[:N//2+1])
-            initial_guess = []
-            for amp, freq, peak in zip(self.dominant_amplitudes, self.dominant_freqs, peaks):
-                phase_guess = fft_angles[peak]
-                initial_guess.extend([amp, freq, phase_guess])
-            # Use mean of training data as initial offset
-            initial_guess.append(np.mean(y_train))
-            
+            if self.multistart:
+                # Refit the chosen order from perturbed starts in parallel, keeping the best MSE
+                stage_start = time.perf_counter()
+                search = fit_multistart(
+                    x_train, y_train, self.params, selection['max_frequency'],
+                    method=self.fit_method, mode=self.fit_mode, starts=self.multistart,
+                    budget=self.fit_budget, differential=self.differential_evolution,
+                )
+                self.params = search.pop('params')
+                search['train_mse'] = search.pop('mse')
+                self.global_search = search
+                timings['global_search'] = round(time.perf_counter() - stage_start, 4)
 
-            self.params, _ = curve_fit(
-                self.multi_sinusoidal,
-                x_train,
-                y_train,
-                p0=initial_guess,
-            )  
-            
             # Test the model if test data exists
+            stage_start = time.perf_counter()
             if len(x_test) > 0:
                 y_pred = self.multi_sinusoidal(x_test, *self.params)
                 self.mse = mean_squared_error(y_test, y_pred)
             else:
                 y_pred = None
                 self.mse = None
+            # Parameter covariance on the training data, used for forecast bands
+            self.uncertainty = model_uncertainty(x_train, y_train, self.params, x_last=np.max(x_data))
+            timings['evaluation'] = round(time.perf_counter() - stage_start, 4)
             
             # Generate plots
-            plots = self._generate_plots(x_data, y_data, x_train, y_train, x_test, y_test, y_pred, xf, amplitudes)
+            rendered_plots = self._generate_plots(x_data, y_data, x_train, y_train, x_test, y_test, y_pred, xf, amplitudes,
+                                                  plots=plots)
             
             # Generate fitted function string
             fitted_function = self._generate_function_string()
@@ -309,8 +375,20 @@ class SignalPredictor:
                 'fitted_function': fitted_function,
                 'parameters': self._format_parameters(),
                 'mse': self.mse,
+                'parameter_covariance': self.uncertainty,
                 'dominant_frequencies': list(zip(self.dominant_freqs, self.dominant_amplitudes)),
-                'plots': plots,
+                'plots': rendered_plots,
+                'plot_timings': self.plot_timings,
+                'model_selection': {
+                    'criterion': self.order_criterion,
+                    'fit_method': self.fit_method,
+                    'fit_mode': self.fit_mode,
+                    'spectrum': 'fft' if self.uniform_sampling else 'lomb_scargle',
+                    'order': self.model_order,
+                    'stages': self.order_stages,
+                    'global_search': self.global_search,
+                },
+                'timings': timings,
                 'test_predictions': y_pred.tolist() if y_pred is not None else None,
                 'test_x': x_test.tolist() if len(x_test) > 0 else None
             }
@@ -321,60 +399,129 @@ class SignalPredictor:
                 'error': str(e)
             }
     
-    def _generate_plots(self, x_data, y_data, x_train, y_train, x_test, y_test, y_pred, xf, amplitudes):
-        """Generate matplotlib plots and return as base64 encoded images"""
-        plots = {}
+    def analyze_windowed(self, csv_data, frame_points=DEFAULT_FRAME_POINTS, overlap=DEFAULT_OVERLAP,
+                         max_components=DEFAULT_WINDOW_COMPONENTS, max_work=MAX_WINDOW_WORK, plots=None):
+        """
+        Analyze a long or non-stationary signal frame by frame
+
+        Args:
+            csv_data: pandas DataFrame with 'x' and 'y' columns (uniformly sampled)
+            frame_points: samples per frame
+            overlap: fraction of each frame shared with the next one
+            max_components: largest number of sinusoids per frame
+            max_work: cap on frames x frame points x max_components
+            plots: optional iterable of plot keys to render; defaults to all
+
+        Returns:
+            dict with the frame layout, the per-frame parameter 'table' and
+            the 'spectrogram' plot
+        """
+        try:
+            order = np.argsort(csv_data['x'].values, kind='stable')
+            x_data = csv_data['x'].values[order]
+            y_data = csv_data['y'].values[order]
+
+            stage_start = time.perf_counter()
+            windows = fit_windows(
+                x_data, y_data, frame_points=frame_points, overlap=overlap,
+                max_components=max_components, criterion=self.order_criterion,
+                method=self.fit_method, mode=self.fit_mode, max_work=max_work,
+            )
+            timings = {'windows': round(time.perf_counter() - stage_start, 4)}
+            table = windows['table']
+            spectrum = windows['spectrogram']
+
+            def spectrogram_plot():
+                fig = new_figure((12, 6))
+                ax = fig.subplots()
+                times, freqs = spectrum['times'], spectrum['frequencies']
+                mesh = ax.pcolormesh(times, freqs, spectrum['amplitudes'].T, shading='nearest', cmap='viridis')
+                fig.colorbar(mesh, ax=ax, label='Amplitude')
+                fitted = [(t, f) for t, row in zip(table['time'], table['frequency']) for f in (row or [])]
+                if fitted:
+                    ax.scatter(*zip(*fitted), color='red', s=2, alpha=0.6, label='Fitted frequencies')
+                    ax.legend(loc='upper right')
+                # Zoom in on the band holding the strong components (above 10% of the peak mean amplitude)
+                mean_amplitude = spectrum['amplitudes'].mean(axis=0)
+                strong = np.flatnonzero(mean_amplitude >= 0.1 * mean_amplitude.max())
+                if len(strong):
+                    ax.set_ylim(0, min(freqs[-1], 1.5 * freqs[strong[-1]]))
+                ax.set_title('Spectrogram')
+                ax.set_xlabel('X (time)')
+                ax.set_ylabel('Frequency')
+                return fig
+
+            rendered, self.plot_timings = render_plots({'spectrogram': spectrogram_plot}, only=plots)
+            return {
+                'success': True,
+                'frame_points': windows['frame_points'],
+                'hop': windows['hop'],
+                'frames': len(table['time']),
+                'table': table,
+                'plots': rendered,
+                'plot_timings': self.plot_timings,
+                'timings': timings,
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def _generate_plots(self, x_data, y_data, x_train, y_train, x_test, y_test, y_pred, xf, amplitudes, plots=None):
+        """Render the analysis plots concurrently and return them as base64 encoded images"""
+        params = self.params
         
         # Plot 1: Frequency Spectrum
-        plt.figure(figsize=(10, 6))
-        plt.plot(xf, amplitudes)
-        plt.title('Fourier Transform - Frequency Spectrum')
-        plt.xlabel('Frequency')
-        plt.ylabel('Amplitude')
-        plt.grid()
-        plots['frequency_spectrum'] = self._plot_to_base64()
+        def frequency_spectrum():
+            fig = new_figure((10, 6))
+            ax = fig.subplots()
+            ax.plot(*downsample(xf, amplitudes, 10, method=self.plot_downsample))
+            ax.set_title('Fourier Transform - Frequency Spectrum')
+            ax.set_xlabel('Frequency')
+            ax.set_ylabel('Amplitude')
+            ax.grid()
+            return fig
         
         # Plot 2: Original vs Reconstructed Signal
-        plt.figure(figsize=(12, 8))
-        reconstructed_signal = self.multi_sinusoidal(x_data, *self.params)
-        plt.scatter(x_data, y_data, label='Original Data', color='red', s=10)
-        plt.plot(x_data, reconstructed_signal, label='Reconstructed Signal', color='blue', linewidth=2)
-        plt.title('Original Signal vs Reconstructed Signal')
-        plt.xlabel('X (time)')
-        plt.ylabel('Y (signal)')
-        plt.legend()
-        plt.grid()
-        plots['original_vs_reconstructed'] = self._plot_to_base64()
+        def original_vs_reconstructed():
+            fig = new_figure((12, 8))
+            ax = fig.subplots()
+            reconstructed_signal = self.multi_sinusoidal(x_data, *params)
+            ax.scatter(*downsample(x_data, y_data, 12, method=self.plot_downsample), label='Original Data', color='red', s=10)
+            ax.plot(*downsample(x_data, reconstructed_signal, 12, method=self.plot_downsample), label='Reconstructed Signal', color='blue', linewidth=2)
+            ax.set_title('Original Signal vs Reconstructed Signal')
+            ax.set_xlabel('X (time)')
+            ax.set_ylabel('Y (signal)')
+            ax.legend()
+            ax.grid()
+            return fig
         
         # Plot 3: Training vs Testing Performance
-        if y_pred is not None and len(x_test) > 0:
-            plt.figure(figsize=(12, 8))
-            plt.scatter(x_train, y_train, label='Training Data', color='green', s=10)
-            plt.scatter(x_test, y_test, label='Test Data (Ground Truth)', color='red', s=10)
-            plt.plot(x_train, self.multi_sinusoidal(x_train, *self.params), 
+        def training_vs_testing():
+            if y_pred is None or len(x_test) == 0:
+                return None
+            fig = new_figure((12, 8))
+            ax = fig.subplots()
+            ax.scatter(*downsample(x_train, y_train, 12, method=self.plot_downsample), label='Training Data', color='green', s=10)
+            ax.scatter(*downsample(x_test, y_test, 12, method=self.plot_downsample), label='Test Data (Ground Truth)', color='red', s=10)
+            ax.plot(*downsample(x_train, self.multi_sinusoidal(x_train, *params), 12, method=self.plot_downsample), 
                     label='Fitted Model on Training Data', color='blue', linewidth=2)
-            plt.plot(x_test, y_pred, label='Predicted Test Data', color='orange', 
+            ax.plot(*downsample(x_test, y_pred, 12, method=self.plot_downsample), label='Predicted Test Data', color='orange', 
                     linewidth=2, linestyle='--')
-            plt.title('Model Fitting and Prediction')
-            plt.xlabel('X (time)')
-            plt.ylabel('Y (signal)')
-            plt.legend()
-            plt.grid()
-            plots['training_vs_testing'] = self._plot_to_base64()
+            ax.set_title('Model Fitting and Prediction')
+            ax.set_xlabel('X (time)')
+            ax.set_ylabel('Y (signal)')
+            ax.legend()
+            ax.grid()
+            return fig
         
-        return plots
-    
-    def _plot_to_base64(self):
-        """Convert current matplotlib plot to base64 string"""
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        buffer.seek(0)
-        plot_data = buffer.getvalue()
-        buffer.close()
-        plt.close()
-        
-        encoded_plot = base64.b64encode(plot_data).decode()
-        return encoded_plot
+        rendered, self.plot_timings = render_plots({
+            'frequency_spectrum': frequency_spectrum,
+            'original_vs_reconstructed': original_vs_reconstructed,
+            'training_vs_testing': training_vs_testing,
+        }, only=plots)
+        return rendered
     
     def _generate_function_string(self):
         """Generate human-readable fitted function string"""
@@ -405,6 +552,26 @@ class SignalPredictor:
             'offset': round(self.params[-1], 3)
         }
     
+    def fit_summary(self):
+        """Return the fitted function string and display parameters for the current params"""
+        return self._generate_function_string(), self._format_parameters()
+
+    def evaluate_batch(self, x_values):
+        """
+        Evaluate the fitted function at many x values in one vectorized call
+
+        Args:
+            x_values: sequence or numpy array of x values
+
+        Returns:
+            numpy float64 array of y values
+        """
+        if self.params is None:
+            raise ValueError("Model has not been fitted yet")
+
+        x = np.ascontiguousarray(x_values, dtype=np.float64)
+        return self.multi_sinusoidal(x, *np.asarray(self.params, dtype=np.float64))
+
     def evaluate_function(self, x_value):
         """Evaluate the fitted function at a specific x value"""
         if self.params is None:
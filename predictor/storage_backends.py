@@ -1,14 +1,78 @@
+import hashlib
+
 from storages.backends.s3boto3 import S3Boto3Storage
 from django.conf import settings
+from django.core.cache import caches
+
+from .result_cache import counter_stats, increment_counter
+
+SIGNED_URL_CACHE_ALIAS = 'signed_urls'
+SIGNED_URL_KEY_PREFIX = 'signed-url'
+SIGNED_URL_HITS_KEY = 'signed-url-stats:hits'
+SIGNED_URL_MISSES_KEY = 'signed-url-stats:misses'
+# A cached URL is always valid for at least this many more seconds when handed out
+DEFAULT_SIGNED_URL_MARGIN = 300
+
 
 class PrivateMediaStorage(S3Boto3Storage):
     """
     S3 storage for private media files (uploads and analysis plots).
     Generates presigned URLs for access.
+
+    Signing is pure CPU work, and listings sign the same objects over and
+    over, so presigned URLs are cached per object key in the
+    ``signed_urls`` cache. An entry lives for querystring_expire minus a
+    safety margin, so a cached URL never has less than the margin left, and
+    it is dropped when the object is overwritten or deleted. That only
+    reaches every web process if the cache is shared (the default
+    file-based one is, per host; use Redis or Memcached across hosts).
     """
     location = ''
     default_acl = None
     file_overwrite = False
     querystring_auth = True
-    querystring_expire = 3600  
+    querystring_expire = 3600
+
+    def _signed_url_key(self, name):
+        digest = hashlib.sha256(f'{self.bucket_name}/{self._normalize_name(name)}'.encode()).hexdigest()
+        return f'{SIGNED_URL_KEY_PREFIX}:{digest}'
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if parameters or expire is not None or http_method is not None or not self.querystring_auth:
+            # Custom signatures (and unsigned URLs) are cheap or one-off; don't cache them
+            return super().url(name, parameters, expire, http_method)
+        margin = getattr(settings, 'SIGNED_URL_CACHE_MARGIN', DEFAULT_SIGNED_URL_MARGIN)
+        timeout = self.querystring_expire - margin
+        if timeout <= 0:
+            return super().url(name)
+
+        url_cache = caches[SIGNED_URL_CACHE_ALIAS]
+        key = self._signed_url_key(name)
+        url = url_cache.get(key)
+        increment_counter(SIGNED_URL_HITS_KEY if url is not None else SIGNED_URL_MISSES_KEY)
+        if url is None:
+            url = super().url(name)
+            url_cache.set(key, url, timeout=timeout)
+        return url
+
+    def forget_url(self, name):
+        """Drop the cached presigned URL of an object"""
+        caches[SIGNED_URL_CACHE_ALIAS].delete(self._signed_url_key(name))
+
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        # Only matters when a name is reused (file_overwrite or content-addressed names)
+        self.forget_url(name)
+        return name
+
+    def delete(self, name):
+        super().delete(name)
+        self.forget_url(name)
+
+
+def get_signed_url_stats():
+    """Return hit/miss counters for the presigned URL cache"""
+    return counter_stats(SIGNED_URL_HITS_KEY, SIGNED_URL_MISSES_KEY)
+
+
 PublicMediaStorage = PrivateMediaStorage
@@ -0,0 +1,357 @@
+"""
+Background analysis jobs
+
+Uploads can be queued as AnalysisJob rows instead of being analyzed inside
+the request thread. Workers started with ``manage.py run_analysis_worker``
+poll the table, claim pending jobs with an atomic status update and run the
+same pipeline as the synchronous upload view. Jobs left running by a worker
+that died are requeued once they have been running for longer than
+SIGNAL_JOB_STALE_SECONDS, and failed after SIGNAL_JOB_MAX_ATTEMPTS claims.
+"""
+import base64
+import logging
+import os
+import time
+import uuid
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .analysis_backends import run_analysis
+from .ingestion import read_signal_csv
+from .models import AnalysisJob, SignalAnalysis
+from .response_cache import bump_user_revision
+from .result_cache import content_addressed_name
+
+logger = logging.getLogger(__name__)
+
+# Running jobs older than this are assumed to belong to a dead worker
+DEFAULT_JOB_STALE_SECONDS = 1800
+DEFAULT_JOB_MAX_ATTEMPTS = 2
+
+# Concurrent storage uploads when saving a batch of analyses
+STORAGE_UPLOAD_WORKERS = 8
+
+# Plot keys returned by the analysis backends mapped to SignalAnalysis fields
+PLOT_FIELDS = [
+    ('frequency_spectrum', 'frequency_analysis_plot'),
+    ('original_vs_reconstructed', 'fitted_signal_plot'),
+    ('training_vs_testing', 'original_signal_plot'),
+]
+
+
+def save_base64_image(base64_string, filename_prefix):
+    """
+    Convert base64 string to Django ContentFile
+    Returns ContentFile object that can be saved to ImageField
+    """
+    try:
+        # Strip a data URI header (e.g. "data:image/png;base64,") if present
+        if base64_string.startswith('data:'):
+            base64_string = base64_string.split(',', 1)[1]
+        # Decode base64 string
+        image_data = base64.b64decode(base64_string)
+        # Create unique filename
+        filename = f"{filename_prefix}_{uuid.uuid4().hex[:8]}.png"
+        # Return ContentFile
+        return ContentFile(image_data, name=filename)
+    except Exception:
+        return None
+
+
+def prepare_signal_data(csv_data, options):
+    """
+    Apply the upload options to a signal
+
+    Returns:
+        (filtered DataFrame, split_point, noise level)
+    """
+    advanced = options.get('advanced_mode', False)
+    noise_lvl = options.get('noise_filter', 0) or 0
+
+    if noise_lvl > 0:
+        csv_data = csv_data[csv_data['y'].abs() >= noise_lvl]
+
+    if not advanced:
+        idx = int(0.8 * len(csv_data))
+        split_point = csv_data['x'].iloc[idx if idx < len(csv_data) else -1]
+    else:
+        split_point = options.get('split_point')
+    return csv_data, split_point, noise_lvl
+
+
+def predictor_params_from_result(result):
+    """Build the flat predictor parameter list used for function evaluation"""
+    params_dict = result.get('parameters', {})
+    predictor_params = []
+    for comp in params_dict.get('sinusoidal_components', []):
+        predictor_params.extend([comp['amplitude'], comp['frequency'], comp['phase']])
+    # Append offset
+    predictor_params.append(params_dict.get('offset', 0))
+    return predictor_params
+
+
+def _plot_file(img_src):
+    """
+    Load a plot from a data URI, HTTP(S) URL or local path
+
+    The file is named after a hash of its contents so identical plots map to
+    the same stored object.
+    """
+    DATA_PREFIX = 'data:image'
+    if not isinstance(img_src, str):
+        return None
+    data, ext = None, 'png'
+    # Base64-encoded image
+    if img_src.startswith(DATA_PREFIX):
+        img_file = save_base64_image(img_src, 'plot')
+        data = img_file.read() if img_file else None
+    # HTTP(S) URL
+    elif img_src.startswith(('http://', 'https://')):
+        try:
+            resp = requests.get(img_src)
+            if resp.ok:
+                ext = img_src.split('.')[-1].split('?')[0]
+                data = resp.content
+        except Exception:
+            return None
+    # Local file path
+    elif os.path.exists(img_src):
+        with open(img_src, 'rb') as f:
+            ext = img_src.split('.')[-1]
+            data = f.read()
+    if not data:
+        return None
+    return ContentFile(data, name=content_addressed_name(data, ext))
+
+
+def _save_plot(analysis, field_name, img_file):
+    """Attach a plot to the analysis, reusing an identical stored file if present"""
+    field_file = getattr(analysis, field_name)
+    name = field_file.field.generate_filename(analysis, img_file.name)
+    if field_file.storage.exists(name):
+        setattr(analysis, field_name, name)
+    else:
+        field_file.save(img_file.name, img_file, save=False)
+
+
+def build_analysis(user, uploaded_file, csv_data, result):
+    """
+    Build an unsaved SignalAnalysis for a successful result
+
+    The uploaded CSV (a file, or the name of one already in storage) and the
+    plots are written to storage here, so the row itself can be inserted on
+    its own or with bulk_create.
+    """
+    analysis = SignalAnalysis(
+        user=user,
+        fitted_function=result['fitted_function'],
+        parameters=result['parameters'],
+        mse=result['mse'],
+        dominant_frequencies=result['dominant_frequencies'],
+        parameter_covariance=result.get('parameter_covariance'),
+    )
+    if isinstance(uploaded_file, str):
+        analysis.uploaded_file = uploaded_file
+    else:
+        analysis.uploaded_file.save(uploaded_file.name, uploaded_file, save=False)
+
+    # Save data preview (first 10 rows)
+    analysis.set_data_preview(csv_data)
+    # Save visualization plots using public URLs, local files, or base64
+    plots = result.get('plots', {})
+    for key, field_name in PLOT_FIELDS:
+        img_file = _plot_file(plots.get(key))
+        if img_file:
+            _save_plot(analysis, field_name, img_file)
+    return analysis
+
+
+def store_analysis_result(user, uploaded_file, csv_data, result):
+    """Create a SignalAnalysis for a successful result, including its plots"""
+    analysis = build_analysis(user, uploaded_file, csv_data, result)
+    analysis.save()
+    return analysis
+
+
+def store_analysis_results(user, items):
+    """
+    Create SignalAnalysis rows for several successful results at once
+
+    Files are written to storage concurrently and the rows are inserted with
+    a single bulk_create.
+
+    Args:
+        user: owner of the analyses
+        items: list of (uploaded_file, csv_data, result) tuples
+
+    Returns:
+        list of saved SignalAnalysis instances in the same order
+    """
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(STORAGE_UPLOAD_WORKERS, len(items))) as executor:
+        analyses = list(executor.map(lambda item: build_analysis(user, *item), items))
+    analyses = SignalAnalysis.objects.bulk_create(analyses)
+    # bulk_create sends no post_save, so invalidate the owner's cached responses here
+    bump_user_revision(user.pk)
+    return analyses
+
+
+def enqueue_analysis(csv_file, options, user=None, session_key=''):
+    """Queue an uploaded CSV for background analysis"""
+    return AnalysisJob.objects.create(
+        user=user,
+        session_key=session_key or '',
+        input_file=csv_file,
+        options=options,
+    )
+
+
+def _update_job(job, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    AnalysisJob.objects.filter(pk=job.pk).update(**fields)
+
+
+def _discard_input(job):
+    """Delete a job's input CSV, unless a saved analysis still uses the file"""
+    name = job.input_file.name
+    if name and not SignalAnalysis.objects.filter(uploaded_file=name).exists():
+        job.input_file.storage.delete(name)
+    _update_job(job, input_file='')
+
+
+def recover_stale_jobs():
+    """
+    Requeue jobs whose worker died while running them
+
+    A job counts as stale once it has been running for longer than
+    SIGNAL_JOB_STALE_SECONDS. It goes back to pending, unless it has
+    already been claimed SIGNAL_JOB_MAX_ATTEMPTS times (it may be what
+    kills the worker), in which case it fails and its input is deleted.
+
+    Returns:
+        (requeued, failed) job counts
+    """
+    timeout = getattr(settings, 'SIGNAL_JOB_STALE_SECONDS', DEFAULT_JOB_STALE_SECONDS)
+    max_attempts = getattr(settings, 'SIGNAL_JOB_MAX_ATTEMPTS', DEFAULT_JOB_MAX_ATTEMPTS)
+    now = timezone.now()
+    requeued = failed = 0
+    stale = AnalysisJob.objects.filter(
+        status=AnalysisJob.STATUS_RUNNING, started_at__lt=now - timedelta(seconds=timeout)
+    )
+    for job in stale:
+        # Conditional on the claim we saw, in case another worker recovers it first
+        claim = AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.STATUS_RUNNING, started_at=job.started_at)
+        if job.attempts >= max_attempts:
+            if claim.update(status=AnalysisJob.STATUS_FAILED, message='Failed', finished_at=now,
+                            error='The analysis worker stopped before the job finished'):
+                failed += 1
+                if job.input_file and not job.analysis_id:
+                    _discard_input(job)
+        elif claim.update(status=AnalysisJob.STATUS_PENDING, progress=0, message='Requeued', started_at=None):
+            requeued += 1
+    if requeued or failed:
+        logger.warning("Recovered stale analysis jobs: %d requeued, %d failed", requeued, failed)
+    return requeued, failed
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest pending job to running
+
+    The conditional UPDATE makes claiming safe across several worker
+    processes without relying on SELECT ... FOR UPDATE support.
+    """
+    candidates = AnalysisJob.objects.filter(
+        status=AnalysisJob.STATUS_PENDING
+    ).order_by('created_at').values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        claimed = AnalysisJob.objects.filter(pk=pk, status=AnalysisJob.STATUS_PENDING).update(
+            status=AnalysisJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+            progress=5,
+            message='Started',
+        )
+        if claimed:
+            return AnalysisJob.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Run a claimed job to completion, recording progress and the outcome"""
+    analysis = None
+    try:
+        _update_job(job, progress=10, message='Reading CSV')
+        with job.input_file.open('rb') as csv_file:
+            csv_data = read_signal_csv(csv_file)
+        csv_data, split_point, noise_lvl = prepare_signal_data(csv_data, job.options)
+
+        _update_job(job, progress=30, message='Analyzing signal')
+        result = run_analysis(csv_data, split_point, noise_lvl)
+        if not result.get('success'):
+            raise ValueError(result.get('error', 'Analysis failed'))
+
+        if job.user_id:
+            _update_job(job, progress=80, message='Saving results')
+            analysis = store_analysis_result(job.user, job.input_file.name, csv_data, result)
+            # Plots are persisted on the analysis; keep the job row small
+            result = {key: value for key, value in result.items() if key != 'plots'}
+        else:
+            # Anonymous results only live in the session; the input is no longer needed
+            _discard_input(job)
+
+        _update_job(
+            job,
+            status=AnalysisJob.STATUS_SUCCEEDED,
+            progress=100,
+            message='Completed',
+            result=result,
+            analysis=analysis,
+            finished_at=timezone.now(),
+        )
+    except Exception as e:
+        logger.exception("Analysis job %s failed", job.pk)
+        if analysis is None and job.input_file:
+            # No analysis took over the file
+            _discard_input(job)
+        _update_job(
+            job,
+            status=AnalysisJob.STATUS_FAILED,
+            message='Failed',
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+    return job
+
+
+def run_worker(poll_interval=1.0, max_jobs=None, burst=False):
+    """
+    Process queued jobs until stopped
+
+    Args:
+        poll_interval: seconds to sleep when the queue is empty
+        max_jobs: stop after processing this many jobs
+        burst: stop as soon as the queue is empty
+    """
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        close_old_connections()
+        recover_stale_jobs()
+        job = claim_next_job()
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
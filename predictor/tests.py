@@ -1,3 +1,567 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, models
+from django.template.defaultfilters import filesizeformat
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .fitting import multi_sinusoid
+from .analysis_backends import LocalAnalysisBackend
+from .ingestion import CSVValidationError, read_signal_csv, validate_csv_header
+from .models import AnalysisJob, SignalAnalysis
+from .online import block_sums, goertzel, stored_samples
+from .plotting import downsample
+from .tasks import (
+    claim_next_job, enqueue_analysis, recover_stale_jobs, run_job, run_worker, store_analysis_results
+)
+from .windowed import fit_windows
+
+# Per-process caches, so cached responses and revisions never outlive a test
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+    for alias in ('default', 'analysis_results', 'generated_signals', 'signed_urls', 'analysis_responses')
+}
+
+
+def signal_csv(x, y):
+    return ('x,y\n' + ''.join(f'{float(a)!r},{float(b)!r}\n' for a, b in zip(x, y))).encode()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StoredAnalysisTestCase(TestCase):
+    """Keeps model files in a temporary directory instead of S3 and starts with empty caches"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        storage = FileSystemStorage(location=cls.media_root, base_url='/media/')
+        cls.replaced_storages = []
+        for model in (SignalAnalysis, AnalysisJob):
+            for field in model._meta.fields:
+                if isinstance(field, models.FileField):
+                    cls.replaced_storages.append((field, field.storage))
+                    field.storage = storage
+
+    @classmethod
+    def tearDownClass(cls):
+        for field, storage in cls.replaced_storages:
+            field.storage = storage
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'pw-12345678')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_analysis(self, x=None, y=None, user=None, **fields):
+        """Saved analysis of a 0.5 Hz unit sine, with its samples stored unless x is False"""
+        defaults = {
+            'fitted_function': 'f(x) = sin(2*pi*0.5*x)',
+            'parameters': {'offset': 0.0, 'sinusoidal_components': [
+                {'amplitude': 1.0, 'frequency': 0.5, 'phase': 0.0}
+            ]},
+            'dominant_frequencies': [[0.5, 1.0]],
+        }
+        analysis = SignalAnalysis(user=user or self.user, **{**defaults, **fields})
+        if x is not False:
+            if x is None:
+                x = np.linspace(0, 20, 401)
+                y = np.sin(2 * np.pi * 0.5 * x)
+            analysis.uploaded_file.save('signal.csv', ContentFile(signal_csv(x, y)), save=False)
+        analysis.save()
+        return analysis
+
+
+class SignalCSVIngestionTests(TestCase):
+    def upload(self, content):
+        return self.client.post('/api/upload/', {'csv_file': SimpleUploadedFile('signal.csv', content)})
+
+    def assertRejected(self, response, message):
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': message})
+
+    def test_reads_only_x_and_y(self):
+        data = read_signal_csv(io.BytesIO('\ufeffid, y ,x\n1,2.5,0\n2,-1e3,0.5\n'.encode()))
+        self.assertEqual(list(data.columns), ['x', 'y'])
+        np.testing.assert_array_equal(data['x'], [0, 0.5])
+        np.testing.assert_array_equal(data['y'], [2.5, -1000])
+
+    def test_streamed_input_stops_at_the_byte_limit(self):
+        # No size attribute: only the limited reader can notice
+        stream = io.BytesIO(b'x,y\n' + b'1,2\n' * 1000)
+        with self.assertRaisesMessage(CSVValidationError, 'maximum upload size'):
+            read_signal_csv(stream, max_bytes=1024)
+
+    @override_settings(SIGNAL_UPLOAD_MAX_BYTES=1024)
+    def test_oversize_upload_is_rejected(self):
+        response = self.upload(b'x,y\n' + b'1,2\n' * 1000)
+        self.assertRejected(response, f'CSV file exceeds the maximum upload size of {filesizeformat(1024)}.')
+
+    @override_settings(SIGNAL_UPLOAD_MAX_ROWS=10)
+    def test_too_many_rows_are_rejected(self):
+        response = self.upload(b'x,y\n' + b'1,2\n' * 11)
+        self.assertRejected(response, 'CSV file exceeds the maximum of 10 rows.')
+
+    def test_bad_header_is_rejected(self):
+        self.assertRejected(self.upload(b'time,value\n1,2\n'), 'CSV file must contain "x" and "y" columns.')
+        self.assertRejected(self.upload(b'x,y,y\n1,2,3\n'), 'CSV file has duplicate "x" or "y" columns.')
+        with self.assertRaisesMessage(CSVValidationError, 'CSV file is empty.'):
+            validate_csv_header(io.BytesIO(b''))
+
+    @override_settings(SIGNAL_ANALYSIS_ASYNC=True)
+    def test_bad_header_is_rejected_before_queueing(self):
+        self.assertRejected(self.upload(b'time,value\n1,2\n'), 'CSV file must contain "x" and "y" columns.')
+        self.assertFalse(AnalysisJob.objects.exists())
+
+    def test_non_numeric_column_is_rejected(self):
+        response = self.upload(b'x,y\n0,1\n1,abc\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['error'].startswith('CSV file contains invalid data: '))
+
+
+class AnalysisListQueryCountTests(TestCase):
+    """Listing analyses must not run a query per row (user or count lookups)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('lister', 'lister@example.com', 'pw-12345678')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _add_analyses(self, count):
+        SignalAnalysis.objects.bulk_create([
+            SignalAnalysis(user=self.user, fitted_function='f(x) = 0', parameters={}, dominant_frequencies=[])
+            for _ in range(count)
+        ])
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context), response
+
+    def test_list_query_count_is_constant(self):
+        self._add_analyses(2)
+        few, _ = self._queries('/api/analyses/')
+        self._add_analyses(30)
+        many, response = self._queries('/api/analyses/')
+        self.assertEqual(few, many)
+        self.assertEqual(many, 1)
+        self.assertTrue(all(row['user_analysis_count'] == 32 for row in response.json()['results']))
+
+    def test_home_query_count_is_constant(self):
+        self._add_analyses(2)
+        few, _ = self._queries('/api/home/')
+        self._add_analyses(30)
+        many, response = self._queries('/api/home/')
+        self.assertEqual(few, many)
+        self.assertEqual(response.json()['recent_analyses'][0]['user_analysis_count'], 32)
+
+    def test_cursor_pages_cover_every_analysis_once(self):
+        self._add_analyses(25)
+        seen = []
+        url = '/api/analyses/?view=summary&page_size=10'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in response.json()['results'])
+            url = response.json()['next']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_sparse_fieldset(self):
+        self._add_analyses(1)
+        _, response = self._queries('/api/analyses/?fields=id,name')
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'name'})
+
+    def test_unknown_sparse_fields_are_rejected(self):
+        self._add_analyses(1)
+        for url in ('/api/analyses/?fields=bogus,nope', '/api/analyses/?view=summary&fields=id,plots'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 400, url)
+        self.assertEqual(response.json(), {'fields': ['Unknown fields: plots']})
+
+
+class AnalysisExportTests(StoredAnalysisTestCase):
+    def test_export_csv(self):
+        analysis = self.create_analysis()
+        response = self.client.get(f'/api/analyses/{analysis.id}/export/csv/')
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body.splitlines()[0], 'x,y')
+        self.assertEqual(len(body.splitlines()), 402)
+
+    def test_export_without_stored_input(self):
+        analysis = self.create_analysis(x=False)
+        response = self.client.get(f'/api/analyses/{analysis.id}/export/csv/')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('no stored input', response.json()['error'])
+
+
+class AnalysisForecastTests(StoredAnalysisTestCase):
+    def test_forecast_backfills_covariance(self):
+        analysis = self.create_analysis()
+        response = self.client.get(f'/api/analyses/{analysis.id}/forecast/?horizon=1&count=10')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['y']), 10)
+        analysis.refresh_from_db()
+        self.assertIsNotNone(analysis.parameter_covariance)
+
+    def test_forecast_without_stored_samples(self):
+        analysis = self.create_analysis(x=False)
+        response = self.client.get(f'/api/analyses/{analysis.id}/forecast/?horizon=1&count=10')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('no stored input', response.json()['error'])
+
+    def test_invalid_grids_are_rejected(self):
+        analysis = self.create_analysis()
+        for query in ('horizon=inf&count=3', 'horizon=nan&count=3', 'horizon=1e308&step=1e-300',
+                      'horizon=1&step=nan', 'horizon=1e6&step=1e-3'):
+            response = self.client.get(f'/api/analyses/{analysis.id}/forecast/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class FunctionEvaluationValidationTests(TestCase):
+    def setUp(self):
+        session = self.client.session
+        session['predictor_params'] = [1.0, 0.5, 0.0, 0.0]
+        session.save()
+
+    def test_range_evaluation(self):
+        response = self.client.post('/api/evaluate/', {'start': 0, 'stop': 1, 'count': 5}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_ranges_are_rejected(self):
+        for payload in ({'start': 0, 'stop': 'nan', 'step': 1},
+                        {'start': -1e308, 'stop': 1e308, 'step': 1},
+                        {'start': -1e308, 'stop': 1e308, 'count': 3},
+                        {'start': 0, 'stop': 'inf', 'count': 3},
+                        {'start': 0, 'stop': 1e9, 'step': 1e-3}):
+            response = self.client.post('/api/evaluate/', payload, content_type='application/json')
+            self.assertEqual(response.status_code, 400, payload)
+
+
+class PlotDownsampleTests(TestCase):
+    def test_unsorted_series_keeps_its_envelope(self):
+        x = np.linspace(0, 10, 20000)
+        y = np.sin(2 * np.pi * x) + (x > 5)
+        shuffled = np.random.default_rng(0).permutation(len(x))
+        for method in ('minmax', 'lttb'):
+            x_drawn, y_drawn = downsample(x[shuffled], y[shuffled], 2, dpi=50, method=method)
+            self.assertLess(len(x_drawn), 300)
+            self.assertTrue(np.all(np.diff(x_drawn) >= 0), method)
+            # Every drawn sample is an original one, and both halves keep their extremes
+            np.testing.assert_array_equal(y_drawn, np.interp(x_drawn, x, y))
+            self.assertAlmostEqual(y_drawn[x_drawn < 5].max(), 1, places=3)
+            self.assertAlmostEqual(y_drawn[x_drawn > 5].min(), 0, places=3)
+
+    @override_settings(PLOT_DOWNSAMPLE_METHOD='lttb')
+    def test_worker_options_carry_the_method(self):
+        self.assertEqual(LocalAnalysisBackend().predictor_options()['plot_downsample'], 'lttb')
+
+
+class BinaryEvaluationFormatTests(TestCase):
+    PARAMS = [1.5, 0.5, 0.3, 0.7, 2.0, 1.0, 0.25]
+
+    def setUp(self):
+        session = self.client.session
+        session['predictor_params'] = self.PARAMS
+        session.save()
+        self.x = np.linspace(-3, 7, 1001)
+
+    def post(self, body, media_type, query=''):
+        return self.client.post(f'/api/evaluate/{query}', body, content_type=media_type, HTTP_ACCEPT=media_type)
+
+    def test_float64_round_trip(self):
+        response = self.post(self.x.astype('<f8').tobytes(), 'application/octet-stream')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertEqual(response['X-Point-Count'], str(len(self.x)))
+        np.testing.assert_array_equal(np.frombuffer(response.content, dtype='<f8'), multi_sinusoid(self.x, *self.PARAMS))
+
+    def test_float64_range_from_query_string(self):
+        response = self.post(b'', 'application/octet-stream', '?start=0&stop=1&count=5')
+        self.assertEqual(response.status_code, 200)
+        y = np.frombuffer(response.content, dtype='<f8')
+        np.testing.assert_allclose(y, multi_sinusoid(np.linspace(0, 1, 5), *self.PARAMS))
+
+    def test_arrow_round_trip(self):
+        import pyarrow as pa
+
+        batch = pa.record_batch([pa.array(self.x)], names=['x'])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        response = self.post(sink.getvalue().to_pybytes(), 'application/vnd.apache.arrow.stream')
+        self.assertEqual(response.status_code, 200)
+        table = pa.ipc.open_stream(response.content).read_all()
+        np.testing.assert_array_equal(table.column('x').to_numpy(), self.x)
+        np.testing.assert_array_equal(table.column('y').to_numpy(), multi_sinusoid(self.x, *self.PARAMS))
+
+    def test_partial_float64_body_is_rejected_as_json(self):
+        body = self.x[:4].astype('<f8').tobytes()
+        for bad_body in (body[:-1], body[:-4], body[3:]):
+            response = self.post(bad_body, 'application/octet-stream')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('multiple of 8 bytes', response.json()['detail'])
+
+    def test_errors_fall_back_to_json(self):
+        response = self.post(b'not an arrow stream', 'application/vnd.apache.arrow.stream')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('Invalid Arrow stream', response.json()['detail'])
+
+        # A new client has no fitted parameters in its session
+        self.client = self.client_class()
+        response = self.post(self.x.tobytes(), 'application/octet-stream')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'No active analysis session found'})
+
+
+class WindowedAnalysisTests(TestCase):
+    def setUp(self):
+        self.x = np.arange(4000) * 0.05
+
+    def test_chirp_frames_keep_one_component(self):
+        # Frequency sweeps 0.2 -> 1.0; each frame holds one (slightly smeared) tone
+        frequency = 0.2 + 0.8 * self.x / self.x[-1]
+        y = np.sin(2 * np.pi * np.cumsum(frequency) * 0.05)
+        table = fit_windows(self.x, y)['table']
+        self.assertEqual(set(table['order']), {1})
+
+    def test_separated_tones_are_resolved(self):
+        y = np.sin(2 * np.pi * 0.5 * self.x) + 0.5 * np.sin(2 * np.pi * 1.2 * self.x + 1)
+        table = fit_windows(self.x, y)['table']
+        self.assertEqual(set(table['order']), {2})
+        np.testing.assert_allclose(sorted(table['frequency'][0]), [0.5, 1.2], atol=1e-3)
+
+    def test_work_is_capped(self):
+        y = np.sin(2 * np.pi * 0.5 * self.x)
+        windows = fit_windows(self.x, y, frame_points=64, overlap=0.5, max_components=2, max_work=64 * 2 * 10)
+        self.assertLessEqual(len(windows['table']['time']), 10)
+        self.assertGreater(len(windows['table']['time']), 5)
+        single = fit_windows(self.x, y, frame_points=512, max_work=1)
+        self.assertEqual(len(single['table']['time']), 1)
+
+    @override_settings(SIGNAL_WINDOWED_MAX_WORK=64 * 3 * 5)
+    def test_view_requires_authentication_and_honours_the_cap(self):
+        csv = signal_csv(self.x, np.sin(2 * np.pi * 0.5 * self.x))
+        payload = {'frame_points': 64}
+        client = APIClient()
+        response = client.post('/api/windowed/', {**payload, 'csv_file': SimpleUploadedFile('s.csv', csv)})
+        self.assertIn(response.status_code, (401, 403))
+
+        client.force_authenticate(User.objects.create_user('windowed', 'w@example.com', 'pw-12345678'))
+        response = client.post('/api/windowed/', {**payload, 'csv_file': SimpleUploadedFile('s.csv', csv)})
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(response.json()['result']['frames'], 5)
+
+
+class OnlineTrackingTests(StoredAnalysisTestCase):
+    def test_goertzel_matches_direct_dft(self):
+        rng = np.random.default_rng(0)
+        y = rng.normal(size=500)
+        spacing = 0.01
+        n = np.arange(len(y))
+        for frequency in (0.0, 3.7, 12.5, 49.0):
+            direct = np.sum(y * np.exp(-2j * np.pi * frequency * spacing * n))
+            self.assertTrue(np.isclose(goertzel(y, frequency, spacing), direct, rtol=1e-9, atol=1e-9))
+
+    def test_block_sums_match_direct_dft(self):
+        rng = np.random.default_rng(1)
+        frequencies = [0.5, 1.3]
+        uniform = 2.0 + 0.05 * np.arange(300)
+        irregular = np.sort(rng.uniform(0, 15, 300))
+        for x in (uniform, irregular):
+            y = rng.normal(size=len(x))
+            direct = np.exp(-2j * np.pi * np.outer(frequencies, x)) @ y
+            self.assertTrue(np.allclose(block_sums(x, y, frequencies), direct, rtol=1e-9, atol=1e-9))
+
+    def _append(self, analysis, x, y):
+        return self.client.post(f'/api/analyses/{analysis.id}/append/',
+                                {'x_values': list(x), 'y_values': list(y)}, format='json')
+
+    def test_drift_triggers_refit(self):
+        analysis = self.create_analysis()
+        x_new = 20 + 0.05 * np.arange(1, 101)
+        response = self._append(analysis, x_new, np.sin(2 * np.pi * 0.5 * x_new))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['update']['reason'], 'initial')
+
+        x_new = x_new[-1] + 0.05 * np.arange(1, 101)
+        response = self._append(analysis, x_new, np.sin(2 * np.pi * 0.5 * x_new))
+        self.assertFalse(response.json()['update']['refit'])
+
+        x_new = x_new[-1] + 0.05 * np.arange(1, 101)
+        response = self._append(analysis, x_new, 3 * np.sin(2 * np.pi * 0.5 * x_new))
+        update = response.json()['update']
+        self.assertEqual(update['reason'], 'drift')
+        self.assertEqual(update['refits'], 1)
+        analysis.refresh_from_db()
+        self.assertEqual(len(stored_samples(analysis)[0]), 701)
+
+    def test_samples_must_follow_stored_ones(self):
+        analysis = self.create_analysis()
+        response = self._append(analysis, [19.0, 25.0], [0.0, 0.0])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('after the last stored sample', response.json()['error'])
+
+    def test_append_without_stored_samples(self):
+        analysis = self.create_analysis(x=False)
+        response = self._append(analysis, [21.0], [0.0])
+        self.assertEqual(response.status_code, 409)
+
+
+class AnalysisJobQueueTests(StoredAnalysisTestCase):
+    def _enqueue(self, content=b'x,y\n0,0\n1,1\n'):
+        return enqueue_analysis(ContentFile(content, name='signal.csv'), {}, user=self.user)
+
+    def _age(self, job, hours=1):
+        AnalysisJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timezone.timedelta(hours=hours))
+
+    def test_job_is_claimed_once(self):
+        job = self._enqueue()
+        claimed = claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, AnalysisJob.STATUS_RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim_next_job())
+
+    @override_settings(SIGNAL_JOB_STALE_SECONDS=600, SIGNAL_JOB_MAX_ATTEMPTS=2)
+    def test_stale_job_is_requeued_then_failed(self):
+        job = self._enqueue()
+        name = job.input_file.name
+        claim_next_job()
+        self.assertEqual(recover_stale_jobs(), (0, 0))
+
+        self._age(job)
+        self.assertEqual(recover_stale_jobs(), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_PENDING)
+
+        claim_next_job()
+        self._age(job)
+        self.assertEqual(recover_stale_jobs(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertFalse(job.input_file)
+        self.assertFalse(AnalysisJob._meta.get_field('input_file').storage.exists(name))
+
+    def test_failed_job_input_is_deleted(self):
+        job = self._enqueue()
+        name = job.input_file.name
+        with self.assertLogs('predictor.tasks', 'ERROR'):
+            run_job(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertFalse(AnalysisJob._meta.get_field('input_file').storage.exists(name))
+
+    def test_input_shared_with_an_analysis_is_kept(self):
+        analysis = self.create_analysis()
+        name = analysis.uploaded_file.name
+        job = AnalysisJob.objects.create(user=self.user, input_file=name, status=AnalysisJob.STATUS_RUNNING,
+                                         started_at=timezone.now(), attempts=5)
+        self._age(job)
+        recover_stale_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_FAILED)
+        self.assertTrue(analysis.uploaded_file.storage.exists(name))
+
+    @override_settings(SIGNAL_ANALYSIS_ASYNC=True)
+    def test_queued_upload_is_polled_to_completion(self):
+        x = np.linspace(0, 20, 401)
+        upload = SimpleUploadedFile('signal.csv', signal_csv(x, np.sin(2 * np.pi * 0.5 * x)), content_type='text/csv')
+        response = self.client.post('/api/upload/', {'csv_file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['job']['status'], AnalysisJob.STATUS_PENDING)
+
+        self.assertEqual(run_worker(burst=True), 1)
+        data = self.client.get(status_url).json()
+        self.assertEqual(data['job']['status'], AnalysisJob.STATUS_SUCCEEDED)
+        self.assertTrue(data['saved'])
+        self.assertEqual(SignalAnalysis.objects.get(id=data['analysis']['id']).user, self.user)
+
+
+class AnalysisResponseCacheTests(StoredAnalysisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.analysis = self.create_analysis()
+        self.urls = [f'/api/analyses/{self.analysis.id}/', f'/api/analyses/{self.analysis.id}/details/']
+
+    def _get(self, url, client=None, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = (client or self.client).get(url, **headers)
+        return response, len(context)
+
+    def test_second_get_is_served_from_cache(self):
+        for url in self.urls:
+            first, _ = self._get(url)
+            second, queries = self._get(url)
+            self.assertEqual(second.status_code, 200)
+            self.assertEqual(queries, 0)
+            self.assertEqual(second.json(), first.json())
+            self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_matching_etag_gets_304(self):
+        for url in self.urls:
+            etag = self._get(url)[0]['ETag']
+            response, queries = self._get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(queries, 0)
+            self.assertEqual(self._get(url, HTTP_IF_NONE_MATCH='"stale"')[0].status_code, 200)
+
+    def test_save_invalidates(self):
+        for url in self.urls:
+            etag = self._get(url)[0]['ETag']
+            self.analysis.name = f'renamed {url}'
+            self.analysis.save()
+            response, queries = self._get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertGreater(queries, 0)
+            data = response.json()
+            self.assertEqual(data.get('analysis', data)['name'], f'renamed {url}')
+
+    def test_delete_invalidates(self):
+        for url in self.urls:
+            self._get(url)
+        self.analysis.delete()
+        for url in self.urls:
+            self.assertEqual(self._get(url)[0].status_code, 404)
+
+    def test_bulk_created_analyses_invalidate_owner_counts(self):
+        for url in self.urls:
+            self._get(url)
+        x = np.linspace(0, 1, 11)
+        result = {'fitted_function': 'f(x) = 0', 'parameters': {}, 'mse': 0.0, 'dominant_frequencies': []}
+        store_analysis_results(self.user, [
+            (ContentFile(signal_csv(x, x), name='signal.csv'), pd.DataFrame({'x': x, 'y': x}), result)
+            for _ in range(2)
+        ])
+        for url in self.urls:
+            data = self._get(url)[0].json()
+            self.assertEqual(data.get('analysis', data)['user_analysis_count'], 3)
+
+    def test_other_users_are_not_served_the_cached_detail(self):
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user('other', 'other@example.com', 'pw-12345678'))
+        for url in self.urls:
+            self.assertEqual(self._get(url)[0].status_code, 200)
+            self.assertEqual(self._get(url)[1], 0)
+            self.assertEqual(self._get(url, client=other)[0].status_code, 404)
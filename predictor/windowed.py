@@ -0,0 +1,184 @@
+"""
+Sliding-window (short-time) analysis of long or non-stationary signals
+
+One stationary model over a long recording with drifting frequencies is
+both a poor fit and a slow one. Here the signal is cut into overlapping
+frames instead:
+
+- the spectrogram comes from one vectorized FFT over a strided view of
+  all frames (no per-frame Python loop or copies of the signal);
+- every frame gets its own small model (order selection capped at a few
+  components), fitted in parallel in the shared fitting process pool,
+  with contiguous frames sent to a worker together;
+- the result is a compact table of per-frame parameters indexed by the
+  frame centre time.
+
+Frames are fixed-size and their number is capped (the hop grows for very
+long signals), so time and memory per frame stay bounded. The cap follows
+the total work, frames x frame points x components, so larger frames or
+models get fewer frames. Within a frame, components closer than one
+frequency bin or far weaker than the main one are not resolvable and end
+the order search.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, rfftfreq
+
+from .fitting import (
+    DEFAULT_FIT_METHOD, DEFAULT_FIT_MODE, DEFAULT_ORDER_CRITERION, DEFAULT_SPECTRUM_WINDOW,
+    _window_weights, multi_sinusoid, select_model_order
+)
+from .global_fit import run_in_fit_pool
+from .lomb_scargle import is_uniformly_sampled
+
+DEFAULT_FRAME_POINTS = 256
+DEFAULT_OVERLAP = 0.5
+DEFAULT_WINDOW_COMPONENTS = 3
+MAX_FRAMES = 512
+# Cap on frames x frame points x max components per request
+MAX_WINDOW_WORK = 128 * DEFAULT_FRAME_POINTS * DEFAULT_WINDOW_COMPONENTS
+# Per-frame components weaker than this fraction of the strongest end the order search
+MIN_RELATIVE_AMPLITUDE = 0.1
+# Frames fitted per task sent to the process pool
+FRAMES_PER_TASK = 16
+
+
+def frame_layout(n_samples, frame_points, overlap=DEFAULT_OVERLAP, max_frames=MAX_FRAMES):
+    """
+    Return (frame_points, hop) for a signal of n_samples
+
+    The hop follows the overlap fraction but grows when the signal would
+    otherwise need more than max_frames frames.
+    """
+    frame_points = int(min(frame_points, n_samples))
+    hop = max(1, int(round(frame_points * (1 - overlap))))
+    if (n_samples - frame_points) // hop + 1 > max_frames:
+        if max_frames > 1:
+            hop = -(-(n_samples - frame_points) // (max_frames - 1))
+        else:
+            # A single frame: step past the last possible start
+            hop = n_samples - frame_points + 1
+    return frame_points, hop
+
+
+def spectrogram(y, spacing, frame_points, hop, window=DEFAULT_SPECTRUM_WINDOW):
+    """
+    Amplitude spectrogram of overlapping frames
+
+    Args:
+        y: uniformly spaced samples
+        spacing: sample spacing
+        frame_points, hop: frame length and step in samples
+        window: scipy.signal window name, or 'boxcar' for none
+
+    Returns:
+        (frame start indices, frequencies, amplitudes) where amplitudes has
+        one float32 row per frame, corrected for the window gain
+    """
+    frames = sliding_window_view(np.asarray(y, dtype=np.float64), frame_points)[::hop]
+    weights = _window_weights(window, frame_points)
+    centered = frames - frames.mean(axis=1, keepdims=True)
+    amplitudes = (2.0 / np.sum(weights)) * np.abs(rfft(centered * weights, axis=1))
+    amplitudes[:, 0] = 0
+    starts = np.arange(len(frames)) * hop
+    return starts, rfftfreq(frame_points, spacing), amplitudes.astype(np.float32)
+
+
+def _fit_frames(x, y, starts, frame_points, options):
+    """Fit every frame of one contiguous chunk; runs in a worker process"""
+    rows = []
+    for start in starts:
+        x_frame = x[start:start + frame_points]
+        y_frame = y[start:start + frame_points]
+        try:
+            selection = select_model_order(x_frame, y_frame, x_frame[1] - x_frame[0], **options)
+        except (RuntimeError, ValueError, np.linalg.LinAlgError):
+            rows.append(None)
+            continue
+        params = selection['params']
+        mse = float(np.mean((y_frame - multi_sinusoid(x_frame, *params)) ** 2))
+        rows.append((params, mse))
+    return rows
+
+
+def fit_windows(x, y, frame_points=DEFAULT_FRAME_POINTS, overlap=DEFAULT_OVERLAP,
+                max_components=DEFAULT_WINDOW_COMPONENTS, criterion=DEFAULT_ORDER_CRITERION,
+                method=DEFAULT_FIT_METHOD, mode=DEFAULT_FIT_MODE, max_frames=MAX_FRAMES,
+                max_work=MAX_WINDOW_WORK, workers=None):
+    """
+    Spectrogram and per-frame models of a uniformly sampled signal
+
+    Args:
+        x, y: samples, sorted by x with constant spacing
+        frame_points: samples per frame
+        overlap: fraction of each frame shared with the next one
+        max_components: largest number of sinusoids per frame
+        criterion, method, mode: order selection and solver settings (see fitting)
+        max_frames: cap on the number of frames
+        max_work: cap on frames x frame points x max_components
+        workers: process pool size; defaults to the CPU count
+
+    Returns:
+        dict with 'frame_points', 'hop', 'spectrogram' (times, frequencies,
+        amplitudes) and 'table', a columnar per-frame parameter table with
+        'time', 'start', 'stop', 'order', 'offset', 'mse' and per-component
+        'amplitude', 'frequency' and 'phase' lists (None where a fit failed)
+
+    Raises:
+        ValueError: the samples are not uniformly spaced, or too few
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    if len(x) < 8:
+        raise ValueError("Windowed analysis needs at least 8 samples")
+    if not is_uniformly_sampled(x):
+        raise ValueError("Windowed analysis needs uniformly sampled data")
+    spacing = (x[-1] - x[0]) / (len(x) - 1)
+    frame_points = int(min(frame_points, len(x)))
+    max_frames = max(1, min(max_frames, max_work // (frame_points * max_components)))
+    frame_points, hop = frame_layout(len(x), frame_points, overlap, max_frames)
+    starts, frequencies, amplitudes = spectrogram(y, spacing, frame_points, hop)
+
+    options = {
+        'criterion': criterion, 'max_components': max_components, 'method': method, 'mode': mode,
+        # One frequency bin of a frame
+        'min_separation': 1.0 / (frame_points * spacing),
+        'min_relative_amplitude': MIN_RELATIVE_AMPLITUDE,
+    }
+
+    def fit_all(pool):
+        futures = []
+        for first in range(0, len(starts), FRAMES_PER_TASK):
+            chunk = starts[first:first + FRAMES_PER_TASK]
+            # Send only the samples the chunk covers, re-indexed from zero
+            lo, hi = chunk[0], chunk[-1] + frame_points
+            futures.append(pool.submit(_fit_frames, x[lo:hi], y[lo:hi], chunk - lo, frame_points, options))
+        return [row for future in futures for row in future.result()]
+
+    fits = run_in_fit_pool(fit_all, workers)
+
+    times = x[starts + frame_points // 2]
+    table = {
+        'time': times.tolist(),
+        'start': x[starts].tolist(),
+        'stop': x[starts + frame_points - 1].tolist(),
+        'order': [], 'offset': [], 'mse': [], 'amplitude': [], 'frequency': [], 'phase': [],
+    }
+    for fit in fits:
+        if fit is None:
+            for column in ('order', 'offset', 'mse', 'amplitude', 'frequency', 'phase'):
+                table[column].append(None)
+            continue
+        params, mse = fit
+        table['order'].append((len(params) - 1) // 3)
+        table['offset'].append(float(params[-1]))
+        table['mse'].append(mse)
+        table['amplitude'].append([float(value) for value in params[0:-1:3]])
+        table['frequency'].append([float(value) for value in params[1:-1:3]])
+        table['phase'].append([float(value % (2 * np.pi)) for value in params[2:-1:3]])
+    return {
+        'frame_points': frame_points,
+        'hop': hop,
+        'spectrogram': {'times': times, 'frequencies': frequencies, 'amplitudes': amplitudes},
+        'table': table,
+    }
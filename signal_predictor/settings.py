@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os  # for environment variables
+import tempfile
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -230,3 +231,97 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=config('EMAIL_HOST_USER'))
 FRONTEND_BASE_URL = config('FRONTEND_BASE_URL')
+
+# Signal analysis engine: 'local' runs SignalPredictor in-process,
+# 'huggingface' calls the hosted Space. The fallback backend (optional)
+# is tried when the primary one fails.
+SIGNAL_ANALYSIS_BACKEND = config('SIGNAL_ANALYSIS_BACKEND', default='local')
+SIGNAL_ANALYSIS_FALLBACK_BACKEND = config('SIGNAL_ANALYSIS_FALLBACK_BACKEND', default='')
+
+# Local fitting: 'curve_fit' optimizes every parameter, 'varpro' only the
+# frequencies (amplitudes, phases and offset are solved linearly). The
+# method is 'lm' (unbounded, fastest for typical orders) or 'trf' (bounded).
+SIGNAL_FIT_MODE = config('SIGNAL_FIT_MODE', default='curve_fit')
+SIGNAL_FIT_METHOD = config('SIGNAL_FIT_METHOD', default='lm')
+# Multi-start refinement: number of parallel local fits (0 disables it),
+# the wall-clock budget in seconds, and whether differential evolution
+# seeds one of the starts
+SIGNAL_FIT_MULTISTART = config('SIGNAL_FIT_MULTISTART', default=0, cast=int)
+SIGNAL_FIT_BUDGET = config('SIGNAL_FIT_BUDGET', default=10.0, cast=float)
+SIGNAL_FIT_DIFFERENTIAL_EVOLUTION = config('SIGNAL_FIT_DIFFERENTIAL_EVOLUTION', default=False, cast=bool)
+
+# Batch uploads: maximum CSV files per request and analysis processes (0 = one per CPU)
+SIGNAL_BATCH_MAX_FILES = config('SIGNAL_BATCH_MAX_FILES', default=20, cast=int)
+SIGNAL_BATCH_WORKERS = config('SIGNAL_BATCH_WORKERS', default=0, cast=int)
+
+# Appending samples to an analysis: refit when the new samples' error exceeds
+# this multiple of the error at the last fit, using the last N samples (0 = all)
+SIGNAL_APPEND_DRIFT_RATIO = config('SIGNAL_APPEND_DRIFT_RATIO', default=2.0, cast=float)
+SIGNAL_APPEND_REFIT_WINDOW = config('SIGNAL_APPEND_REFIT_WINDOW', default=0, cast=int)
+
+# Windowed analysis: cap on frames x frame points x components per request
+# (the hop grows on long signals to stay under it)
+SIGNAL_WINDOWED_MAX_WORK = config('SIGNAL_WINDOWED_MAX_WORK', default=98_304, cast=int)
+
+# Queue uploads as AnalysisJob rows (processed by `manage.py run_analysis_worker`)
+# and return 202 with a polling URL instead of analyzing inside the request
+SIGNAL_ANALYSIS_ASYNC = config('SIGNAL_ANALYSIS_ASYNC', default=False, cast=bool)
+# Running jobs older than this are requeued (their worker died), failing after SIGNAL_JOB_MAX_ATTEMPTS claims
+SIGNAL_JOB_STALE_SECONDS = config('SIGNAL_JOB_STALE_SECONDS', default=1800, cast=int)
+SIGNAL_JOB_MAX_ATTEMPTS = config('SIGNAL_JOB_MAX_ATTEMPTS', default=2, cast=int)
+
+# Upload limits enforced while streaming CSV files
+SIGNAL_UPLOAD_MAX_BYTES = config('SIGNAL_UPLOAD_MAX_BYTES', default=50 * 1024 * 1024, cast=int)
+SIGNAL_UPLOAD_MAX_ROWS = config('SIGNAL_UPLOAD_MAX_ROWS', default=2_000_000, cast=int)
+
+# Threads used to render analysis/generator plots concurrently (0 = auto)
+PLOT_RENDER_WORKERS = config('PLOT_RENDER_WORKERS', default=0, cast=int)
+# Downsampling applied to large series before plotting: 'minmax', 'lttb' or 'none'
+PLOT_DOWNSAMPLE_METHOD = config('PLOT_DOWNSAMPLE_METHOD', default='minmax')
+
+# Caches. 'analysis_results' holds analysis results keyed by a hash of the
+# uploaded samples and options; TIMEOUT and MAX_ENTRIES bound its age and size.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'analysis_results': {
+        'BACKEND': config('ANALYSIS_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('ANALYSIS_CACHE_LOCATION', default='analysis-results'),
+        'TIMEOUT': config('ANALYSIS_CACHE_TTL', default=86400, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('ANALYSIS_CACHE_MAX_ENTRIES', default=100, cast=int),
+        },
+    },
+    # Presigned S3 URLs by object key (see storage_backends.PrivateMediaStorage); must be
+    # shared by all web workers, or a worker keeps handing out URLs of overwritten objects
+    'signed_urls': {
+        'BACKEND': config('SIGNED_URL_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('SIGNED_URL_CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'signal_predictor_signed_urls')),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('SIGNED_URL_CACHE_MAX_ENTRIES', default=5000, cast=int),
+        },
+    },
+    # Detail/share payloads and their revisions (see predictor.response_cache); must be
+    # shared by all web workers, and the TTL must stay below SIGNED_URL_CACHE_MARGIN
+    'analysis_responses': {
+        'BACKEND': config('ANALYSIS_RESPONSE_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('ANALYSIS_RESPONSE_CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'signal_predictor_responses')),
+        'TIMEOUT': config('ANALYSIS_RESPONSE_CACHE_TTL', default=120, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('ANALYSIS_RESPONSE_CACHE_MAX_ENTRIES', default=2000, cast=int),
+        },
+    },
+    # Generated signals served by URL; must be shared by all web workers
+    'generated_signals': {
+        'BACKEND': config('GENERATED_SIGNAL_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('GENERATED_SIGNAL_CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'signal_predictor_generated')),
+        'TIMEOUT': config('GENERATED_SIGNAL_TTL', default=900, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('GENERATED_SIGNAL_CACHE_MAX_ENTRIES', default=500, cast=int),
+        },
+    },
+}
+GENERATED_SIGNAL_TTL = CACHES['generated_signals']['TIMEOUT']
+# Cached presigned URLs are replaced this many seconds before they expire
+SIGNED_URL_CACHE_MARGIN = config('SIGNED_URL_CACHE_MARGIN', default=300, cast=int)